@@ -0,0 +1,46 @@
+"""Keyset pagination indexes
+
+Company list and search pages seek past a cursor with
+`(sort key, id) > (:key, :id)`; each sort gets a matching (sort key, id)
+index, as does the admin user list. Founding year and size sort on
+coalesced expressions, so the indexes are on the same expressions.
+
+The indexes are built CONCURRENTLY (outside a transaction) so writes keep
+going on large tables. IF NOT EXISTS skips indexes created by hand; a
+concurrent build that failed leaves an INVALID index behind, which has to be
+dropped before running this again.
+
+Revision ID: 1f7b3d9a0c52
+Revises:
+Create Date: 2026-10-17 05:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "1f7b3d9a0c52"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# name -> (table, columns)
+INDEXES = {
+    "ix_companies_status_created_at_id": ("companies", ["status", "created_at", "id"]),
+    "ix_companies_created_at_id": ("companies", ["created_at", "id"]),
+    "ix_companies_name_id": ("companies", ["company_name", "id"]),
+    "ix_companies_founded_id": ("companies", [sa.text("coalesce(year_founded, 0)"), "id"]),
+    "ix_companies_size_id": ("companies", [sa.text("coalesce(company_size, '')"), "id"]),
+    "ix_users_created_at_id": ("users", ["created_at", "id"]),
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, (table, columns) in INDEXES.items():
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, (table, _) in reversed(INDEXES.items()):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
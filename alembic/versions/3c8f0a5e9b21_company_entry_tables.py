@@ -0,0 +1,60 @@
+"""company_services and company_founders entry tables
+
+One row per element of companies.services / companies.founders, so service
+and founder filters are an index lookup plus a join. The tables are filled
+from the existing JSONB arrays before their indexes are built; from then on
+CompanyService rewrites a company's rows whenever its arrays change.
+
+Revision ID: 3c8f0a5e9b21
+Revises: 9e4d7b2f6a18
+Create Date: 2026-10-17 08:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "3c8f0a5e9b21"
+down_revision = "9e4d7b2f6a18"
+branch_labels = None
+depends_on = None
+
+# table -> (extra column, source JSONB column on companies)
+ENTRY_TABLES = {
+    "company_services": ("description", "services"),
+    "company_founders": ("role", "founders"),
+}
+
+# Frozen copy of api.v1.models.company_entries.entry_projection(): one row per
+# array element with a non-blank name
+ENTRY_PROJECTION = (
+    "INSERT INTO {table} (id, company_id, position, name, {extra}) "
+    "SELECT gen_random_uuid()::text, c.id, item.position - 1, item.value->>'name', item.value->>'{extra}' "
+    "FROM companies c, jsonb_array_elements("
+    "CASE WHEN jsonb_typeof(c.{source}) = 'array' THEN c.{source} ELSE '[]'::jsonb END"
+    ") WITH ORDINALITY AS item(value, position) "
+    "WHERE jsonb_typeof(item.value) = 'object' AND coalesce(btrim(item.value->>'name'), '') <> ''"
+)
+
+
+def upgrade() -> None:
+    for table, (extra, source) in ENTRY_TABLES.items():
+        op.create_table(
+            table,
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("company_id", sa.String(), sa.ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("position", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column(extra, sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.execute(ENTRY_PROJECTION.format(table=table, extra=extra, source=source))
+        op.create_index(f"ix_{table}_id", table, ["id"])
+        op.create_index(f"ix_{table}_company_id", table, ["company_id"])
+        op.create_index(f"ix_{table}_lower_name", table, [sa.text("lower(name)"), "company_id"])
+
+
+def downgrade() -> None:
+    for table in reversed(ENTRY_TABLES):
+        op.drop_table(table)
@@ -0,0 +1,71 @@
+"""Typed company size, founding year and acquisitions columns
+
+year_founded and acquisitions become integers, companies get a generated
+employee_range ordinal (lower bound of the company_size bucket), and the
+employees sort and the status/niche/year filter get matching indexes.
+PostgreSQL fills employee_range for every existing row while adding it.
+
+The type changes rewrite the companies table under an exclusive lock; run
+during a quiet period.
+
+Revision ID: 5b2e8c41d7a3
+Revises: 3c8f0a5e9b21
+Create Date: 2026-10-17 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "5b2e8c41d7a3"
+down_revision = "3c8f0a5e9b21"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of api.v1.models.company.EMPLOYEE_RANGE
+EMPLOYEE_RANGE = "substring(replace(company_size, ',', '') from '[0-9]{1,9}')::integer"
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "companies", "year_founded",
+        type_=sa.Integer(), existing_type=sa.Numeric(), existing_nullable=True,
+        postgresql_using="round(year_founded)::integer",
+    )
+    op.alter_column(
+        "companies", "acquisitions",
+        type_=sa.Integer(), existing_type=sa.Numeric(), existing_nullable=True,
+        postgresql_using="round(acquisitions)::integer",
+    )
+    op.add_column(
+        "companies",
+        sa.Column("employee_range", sa.Integer(), sa.Computed(EMPLOYEE_RANGE, persisted=True)),
+    )
+
+    # The old employees sort key (from 1f7b3d9a0c52) ordered size buckets as strings
+    op.drop_index("ix_companies_size_id", table_name="companies")
+    op.create_index(
+        "ix_companies_employees_id", "companies",
+        [sa.text("coalesce(employee_range, 0)"), "id"],
+    )
+    op.create_index(
+        "ix_companies_status_niche_year", "companies",
+        ["status", "niche", "year_founded"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_companies_status_niche_year", table_name="companies")
+    op.drop_index("ix_companies_employees_id", table_name="companies")
+    op.create_index(
+        "ix_companies_size_id", "companies",
+        [sa.text("coalesce(company_size, '')"), "id"],
+    )
+    op.drop_column("companies", "employee_range")
+    op.alter_column(
+        "companies", "acquisitions",
+        type_=sa.Numeric(), existing_type=sa.Integer(), existing_nullable=True,
+    )
+    op.alter_column(
+        "companies", "year_founded",
+        type_=sa.Numeric(), existing_type=sa.Integer(), existing_nullable=True,
+    )
@@ -0,0 +1,54 @@
+"""Weighted full-text search document for companies
+
+companies gets a generated search_document tsvector - name (A), niche and
+services (B), description and founders (C), country (D) - and a GIN index
+over it, which ranked company search filters and scores with.
+
+Adding a stored generated column rewrites the companies table under an
+exclusive lock; run during a quiet period. The GIN index is then built
+CONCURRENTLY.
+
+Revision ID: 6a2c8e4b1d07
+Revises: 1f7b3d9a0c52
+Create Date: 2026-10-17 06:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+revision = "6a2c8e4b1d07"
+down_revision = "1f7b3d9a0c52"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of api.v1.models.company.SEARCH_DOCUMENT
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(company_name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(niche, '')), 'B') || "
+    "setweight(jsonb_to_tsvector('english', coalesce(services, '[]'::jsonb), '[\"string\"]'), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C') || "
+    "setweight(jsonb_to_tsvector('english', coalesce(founders, '[]'::jsonb), '[\"string\"]'), 'C') || "
+    "setweight(to_tsvector('english', coalesce(country, '')), 'D')"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "companies",
+        sa.Column("search_document", TSVECTOR(), sa.Computed(SEARCH_DOCUMENT, persisted=True)),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_companies_search_document", "companies", ["search_document"],
+            postgresql_using="gin", postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_companies_search_document", table_name="companies",
+            postgresql_concurrently=True, if_exists=True,
+        )
+    op.drop_column("companies", "search_document")
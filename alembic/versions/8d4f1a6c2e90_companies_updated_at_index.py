@@ -0,0 +1,33 @@
+"""Index companies.updated_at for watermark refreshes
+
+The columnar browse snapshot re-reads companies changed since its last
+refresh (`updated_at >= :watermark`) every few seconds. Built CONCURRENTLY
+so company writes keep going.
+
+Revision ID: 8d4f1a6c2e90
+Revises: 5b2e8c41d7a3
+Create Date: 2026-10-17 11:00:00
+"""
+from alembic import op
+
+
+revision = "8d4f1a6c2e90"
+down_revision = "5b2e8c41d7a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_companies_updated_at", "companies", ["updated_at"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_companies_updated_at", table_name="companies",
+            postgresql_concurrently=True, if_exists=True,
+        )
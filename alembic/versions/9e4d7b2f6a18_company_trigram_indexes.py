@@ -0,0 +1,45 @@
+"""Trigram indexes for company name, country and niche
+
+Installs pg_trgm and adds gin_trgm_ops indexes, which serve the ILIKE
+'%x%' search filters, fuzzy matching (`%>`, word_similarity) and
+"did you mean" suggestions. Creating the extension needs a role allowed to
+do so (superuser, or CREATE on the database for trusted extensions).
+
+The indexes are built CONCURRENTLY so writes keep going.
+
+Revision ID: 9e4d7b2f6a18
+Revises: 6a2c8e4b1d07
+Create Date: 2026-10-17 07:00:00
+"""
+from alembic import op
+
+
+revision = "9e4d7b2f6a18"
+down_revision = "6a2c8e4b1d07"
+branch_labels = None
+depends_on = None
+
+# name -> column
+INDEXES = {
+    "ix_companies_name_trgm": "company_name",
+    "ix_companies_country_trgm": "country",
+    "ix_companies_niche_trgm": "niche",
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, column in INDEXES.items():
+            op.create_index(
+                name, "companies", [column],
+                postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    # The extension stays: other objects may have come to depend on it
+    with op.get_context().autocommit_block():
+        for name in reversed(INDEXES):
+            op.drop_index(name, table_name="companies", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,40 @@
+"""Unique companies.company_email
+
+CompanyService.create inserts with ON CONFLICT (company_email) DO NOTHING,
+which needs a unique index on the column. Duplicate emails already in the
+table make the index build fail; list them first with
+
+    SELECT company_email, count(*) FROM companies
+    GROUP BY company_email HAVING count(*) > 1;
+
+The index is built CONCURRENTLY so company writes keep going. A failed
+concurrent build leaves an INVALID index behind; drop it before running
+this again.
+
+Revision ID: c3a9e5f27b14
+Revises: 8d4f1a6c2e90
+Create Date: 2026-10-17 13:00:00
+"""
+from alembic import op
+
+
+revision = "c3a9e5f27b14"
+down_revision = "8d4f1a6c2e90"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_companies_company_email", "companies", ["company_email"], unique=True,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "uq_companies_company_email", table_name="companies",
+            postgresql_concurrently=True, if_exists=True,
+        )
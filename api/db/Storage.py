@@ -1,10 +1,11 @@
 from fastapi import HTTPException, status
-from typing import Optional, List
+from typing import Iterable, Optional, List
 from api.db.database import SessionLocal as SessionMaker, engine, Base
+from api.db.filters import filter_compiler
+from api.db.bulk import BulkLoader, BulkLoadResult, DEFAULT_CHUNK_SIZE
 from enum import Enum as Pyenum
-import sys
-from sqlalchemy import  text, desc, asc, or_, and_,  cast, Date, text
-from sqlalchemy.orm import joinedload
+from sqlalchemy import text, desc, asc, update, delete
+from sqlalchemy.orm import Session, joinedload
 
 
 import logging as logger
@@ -19,45 +20,54 @@ logger.basicConfig(
 class APP_INIT(Enum):
 	DATABASE = "DATABASE_INIT"
 
-          
+
 
 class SortEnum(Pyenum):
     asc="asc"
     desc="desc"
 
 class DB:
+    """
+    Request-scoped repository over a single Session.
+
+    Create one per request (see `get_db` below) and close it when the request
+    ends. Filters are Mongo-style specs compiled by `api.db.filters`, so
+    repeated filter shapes reuse a cached statement with bound parameters.
+    """
+
     # ------------------ SYSTEM -----------------
-    def __init__(self):
-        self.session = None
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session if session is not None else SessionMaker()
 
     def connect(self):
+        """Check the connection is usable and return the session"""
         try:
-            if not self.session:
-                self.session = SessionMaker()
-                self.session.execute(text('SELECT 1'))
-                logger.info("[SUCCESS]", extra={
-                    "operation": str(APP_INIT.DATABASE),
-                    "success": "DB CONNECT SUCCESS"
-                })
+            self.session.execute(text('SELECT 1'))
+            logger.info("[SUCCESS]", extra={
+                "operation": str(APP_INIT.DATABASE),
+                "success": "DB CONNECT SUCCESS"
+            })
             return self.session
         except Exception as e:
-            logger.info("[ERROR]", extra={
+            logger.error("[ERROR]", extra={
                     "operation": str(APP_INIT.DATABASE),
                     "error": str(e)
                 })
-            sys.exit(1)
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database unavailable.")
 
-    def createAllTables(self):
+    @staticmethod
+    def createAllTables():
         Base.metadata.create_all(engine)
         logger.info("[SUCCESS]", extra={
                     "operation": str(APP_INIT.DATABASE),
                     "success": "DB TABLE CREATED"
                 })
-    
-    def teardown(self):
-        if self.session:
-            self.session.close()
-    
+
+    def close(self):
+        self.session.close()
+
+    teardown = close
+
     def query(self, *args, **kwargs):
         return self.session.query(*args, **kwargs)
 
@@ -81,13 +91,8 @@ class DB:
     def read(self, model_class, join_loads=None, **filters):
         """Dynamically retrieves a record from the database with optional joined loads."""
         try:
-            query = self._build_query(model_class, **filters)
-    
-            if join_loads:
-                for relation in join_loads:
-                    query = query.options(joinedload(getattr(model_class, relation)))
-    
-            result = query.first()
+            stmt, params = self._compile(model_class, filters, join_loads)
+            result = self.session.execute(stmt.limit(1), params).unique().scalars().first()
 
             if not result:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No {model_class.__name__} found with given filters.")
@@ -105,13 +110,20 @@ class DB:
     def update(self, model_class, filter_conditions: dict, update_values: dict) -> bool:
         """Dynamically updates a record in the database."""
         try:
-            query = self._build_query(model_class, **filter_conditions)
-            result = query.update(update_values)
-            if result == 0:
+            compiled, params = filter_compiler.compile(model_class, filter_conditions)
+            stmt = (
+                update(model_class)
+                .where(*compiled.criteria)
+                .values(update_values)
+                .execution_options(synchronize_session="fetch")
+            )
+            result = self.session.execute(stmt, params)
+            if result.rowcount == 0:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No {model_class.__name__} found to update.")
             self.session.commit()
             return True
         except HTTPException as http_exc:
+            self.session.rollback()
             raise http_exc
         except Exception as e:
             self.session.rollback()
@@ -124,14 +136,20 @@ class DB:
     def delete(self, model_class, **filters) -> bool:
         """Dynamically deletes a record from the database."""
         try:
-            query = self._build_query(model_class, **filters)
-            result = query.delete()
-            self.session.commit()
-
-            if result == 0:
+            compiled, params = filter_compiler.compile(model_class, filters)
+            stmt = (
+                delete(model_class)
+                .where(*compiled.criteria)
+                .execution_options(synchronize_session="fetch")
+            )
+            result = self.session.execute(stmt, params)
+
+            if result.rowcount == 0:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No {model_class.__name__} found to delete.")
+            self.session.commit()
             return True
         except HTTPException as http_exc:
+            self.session.rollback()
             raise http_exc
 
         except Exception as e:
@@ -143,13 +161,40 @@ class DB:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error while deleting the record.")
 
     # --------------------- BULK OPERATIONS ---------------------
-    def bulk_create(self, model_class, data_list: List[dict], **kwargs):
-        """Bulk creates new records in the database."""
+    def bulk_create(self, model_class, data_list: Iterable[dict],
+                    method: str = "auto",
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    on_conflict: str = "error",
+                    conflict_columns: Optional[List[str]] = None,
+                    update_columns: Optional[List[str]] = None) -> BulkLoadResult:
+        """
+        Bulk creates new records in the database.
+
+        :param data_list: Any iterable of dicts (a generator is fine); consumed in chunks.
+        :param method: "copy" (COPY FROM STDIN), "insert" (multi-row INSERT ... RETURNING,
+            fills `result.ids`) or "auto" (COPY when the driver supports it).
+        :param chunk_size: Rows per COPY buffer / INSERT batch.
+        :param on_conflict: "error", "ignore" (DO NOTHING) or "update" (DO UPDATE).
+        :param conflict_columns: Conflict target; defaults to the primary key.
+        :param update_columns: Columns overwritten on "update"; defaults to all sent columns.
+        :return: A BulkLoadResult with row counts and rows per second.
+        """
         try:
-            instances = [model_class(**data) for data in data_list]
-            self.session.bulk_save_objects(instances)
+            loader = BulkLoader(
+                self.session,
+                model_class,
+                chunk_size=chunk_size,
+                on_conflict=on_conflict,
+                conflict_columns=conflict_columns,
+                update_columns=update_columns,
+            )
+            result = loader.load(data_list, method=method)
             self.session.commit()
-            return instances
+            logger.info("[SUCCESS]", extra={
+                "operation": str(APP_INIT.DATABASE),
+                "success": f"DB BULK CREATE {model_class.__name__}: {result.as_dict()}"
+            })
+            return result
         except Exception as e:
             self.session.rollback()
             logger.error("[ERROR]", extra={
@@ -158,56 +203,53 @@ class DB:
             })
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to bulk create {model_class.__name__}")
 
-    def bulk_read(self, model_class, 
-              filters: Optional[dict] = None, 
+    def bulk_read(self, model_class,
+              filters: Optional[dict] = None,
               sort_column: str = None,
               sort_direction: str  = None,
-              limit: int = 0, 
+              limit: int = 0,
               offset: int = 0,
-              join_loads: Optional[List[str]] = None, 
+              join_loads: Optional[List[str]] = None,
               date_filters: Optional[dict] = None,  # New argument for date filtering
              ) -> List[dict]:
         """
         Bulk retrieves records from the database with support for limit, offset, sorting, filtering, and join loading.
 
         :param model_class: The SQLAlchemy model class.
-        :param filters: A dictionary of filters to apply.
-        :param order_by: A list of fields to order by. Use '-' prefix for descending order (e.g., '-created_at').
+        :param filters: A filter spec (see `api.db.filters`).
+        :param sort_column: The column to order by.
+        :param sort_direction: "asc" or "desc".
         :param limit: The number of records to retrieve.
         :param offset: The starting offset for the query.
         :param join_loads: A list of relationships to eagerly load.
         :param date_filters: A dictionary of date filters (field names as keys and date values).
-        :return: A list of dictionaries representing the retrieved records.
+        :return: A list of model instances.
         """
         try:
-            # Start building the query with or without filters
-            query = self._build_query(model_class, join_loads=join_loads, **filters) if filters else self.session.query(model_class)
-            
-            # Apply join loading if provided
-            if join_loads:
-                for relation in join_loads:
-                    query = query.options(joinedload(getattr(model_class, relation)))
-            
-            # Apply date filters
+            spec = dict(filters or {})
+            # Date filters are just `$date` conditions ANDed onto the spec
             if date_filters:
-                for date_field, date_value in date_filters.items():
-                    query = query.filter(cast(getattr(model_class, date_field), Date) == date_value)
+                spec["$and"] = list(spec.get("$and", [])) + [
+                    {date_field: {"$date": date_value}}
+                    for date_field, date_value in date_filters.items()
+                ]
+
+            stmt, params = self._compile(model_class, spec, join_loads)
 
             # Apply ordering
             if sort_column and sort_direction:
                 if sort_direction == "desc":
-                    query = query.order_by(desc(getattr(model_class, sort_column)))    
+                    stmt = stmt.order_by(desc(getattr(model_class, sort_column)))
                 else:
-                    query = query.order_by(asc(getattr(model_class, sort_column)))
-            
+                    stmt = stmt.order_by(asc(getattr(model_class, sort_column)))
+
             # Apply limit and offset
             if limit > 0:
-                query = query.limit(limit).offset(offset)
-            
+                stmt = stmt.limit(limit).offset(offset)
+
             # Execute the query and return results
-            results = query.all()
-            return results
-        
+            return self.session.execute(stmt, params).unique().scalars().all()
+
         except Exception as e:
             logger.error("[ERROR]", extra={
                 "operation": str(APP_INIT.DATABASE),
@@ -221,8 +263,14 @@ class DB:
     def bulk_update(self, model_class, filter_conditions: dict, update_values: dict) -> bool:
         """Bulk updates records in the database."""
         try:
-            query = self._build_query(model_class, **filter_conditions)
-            query.update(update_values, synchronize_session=False)
+            compiled, params = filter_compiler.compile(model_class, filter_conditions)
+            stmt = (
+                update(model_class)
+                .where(*compiled.criteria)
+                .values(update_values)
+                .execution_options(synchronize_session=False)
+            )
+            self.session.execute(stmt, params)
             self.session.commit()
             return True
         except Exception as e:
@@ -236,12 +284,20 @@ class DB:
     def bulk_delete(self, model_class, **filters) -> bool:
         """Bulk deletes records from the database."""
         try:
-            query = self._build_query(model_class, **filters)
-            result = query.delete(synchronize_session=False)
-            self.session.commit()
-            if result == 0:
+            compiled, params = filter_compiler.compile(model_class, filters)
+            stmt = (
+                delete(model_class)
+                .where(*compiled.criteria)
+                .execution_options(synchronize_session=False)
+            )
+            result = self.session.execute(stmt, params)
+            if result.rowcount == 0:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No {model_class.__name__} records found to delete.")
+            self.session.commit()
             return True
+        except HTTPException as http_exc:
+            self.session.rollback()
+            raise http_exc
         except Exception as e:
             self.session.rollback()
             logger.error("[ERROR]", extra={
@@ -250,8 +306,8 @@ class DB:
             })
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error while bulk deleting the records.")
 
-    def read_with_join(self, primary_model, related_model, primary_key, related_key, 
-                       filters: Optional[dict] = None, 
+    def read_with_join(self, primary_model, related_model, primary_key, related_key,
+                       filters: Optional[dict] = None,
                        related_filters: Optional[dict] = None, join_loads=[]) -> dict:
         """
         Reads a record from the primary model and joins it with a related model.
@@ -265,16 +321,17 @@ class DB:
         :return: A dictionary representing the joined records.
         """
         try:
-            query = self._build_query(primary_model, **filters) if filters else self.session.query(primary_model)
-            query = query.join(related_model, getattr(primary_model, primary_key) == getattr(related_model, related_key))
+            stmt, params = self._compile(primary_model, filters)
+            stmt = stmt.join(related_model, getattr(primary_model, primary_key) == getattr(related_model, related_key))
 
             if related_filters:
-                for key, value in related_filters.items():
-                    query = query.filter(getattr(related_model, key) == value)
-            
-            result = query.first()
+                related, related_params = filter_compiler.compile(related_model, related_filters, prefix="related_")
+                stmt = stmt.where(*related.criteria)
+                params.update(related_params)
+
+            result = self.session.execute(stmt.limit(1), params).scalars().first()
             if result:
-                return self.to_dict(result, include_relationships=True, relationships_to_include=join_loads)
+                return result.to_dict()
             return None
 
         except Exception as e:
@@ -287,66 +344,19 @@ class DB:
 
     # --------------------- HELPER METHODS ---------------------
 
-    def _build_query(self, model_class, join_loads=None, **filters):
-        """Dynamically builds a query based on the provided model and filters."""
-        query = self.session.query(model_class)
+    def _compile(self, model_class, filters: Optional[dict] = None, join_loads=None):
+        """Returns the cached SELECT for the filter shape, with eager loads, and its params."""
+        compiled, params = filter_compiler.compile(model_class, filters)
+        stmt = compiled.statement
         if join_loads:
-            for relation in join_loads:
-                query = query.options(joinedload(getattr(model_class, relation)))
-
-
-        for key, value in filters.items():
-            column_attr = getattr(model_class, key)
-
-            if isinstance(value, list):
-                for condition in value:
-                    if isinstance(condition, dict):
-                        for operator, filter_value in condition.items():
-                            query = self._apply_filter(query, column_attr, operator, filter_value)
-
-            elif isinstance(value, dict):
-                for operator, filter_value in value.items():
-                    query = self._apply_filter(query, column_attr, operator, filter_value)
-            else:
-                query = query.filter(column_attr == value)
-
-        return query
-
-    def _apply_filter(self, query, column_attr, operator, filter_value):
-        """Applies the corresponding SQLAlchemy filter based on the operator."""
-        if operator == "$gte":  # Greater than or equal
-            return query.filter(column_attr >= filter_value)
-        elif operator == "$gt":  # Greater than
-            return query.filter(column_attr > filter_value)
-        elif operator == "$lte":  # Less than or equal
-            return query.filter(column_attr <= filter_value)
-        elif operator == "$lt":  # Less than
-            return query.filter(column_attr < filter_value)
-        elif operator == "$eq":  # Equal
-            return query.filter(column_attr == filter_value)
-        elif operator == "$ne":  # Not equal
-            return query.filter(column_attr != filter_value)
-        elif operator == "$in" and filter_value:  # In a list of values
-            return query.filter(column_attr.in_(filter_value))
-        elif operator == "$not_in" and filter_value:  # Not in a list of values
-            return query.filter(~column_attr.in_(filter_value))
-        elif operator == "$like":  # LIKE query
-            return query.filter(column_attr.like(f"%{filter_value}%"))
-        elif operator == "$not_like":  # NOT LIKE query
-            return query.filter(~column_attr.like(f"%{filter_value}%"))
-        elif operator == "$or":  # OR condition
-            conditions = [getattr(column_attr, k) == v for k, v in filter_value.items()]
-            return query.filter(or_(*conditions))
-        elif operator == "$and":  # AND condition
-            conditions = [getattr(column_attr, k) == v for k, v in filter_value.items()]
-            return query.filter(and_(*conditions))
-        else:
-            raise ValueError(f"Unsupported filter operator: {operator}")
-        
+            stmt = stmt.options(*[joinedload(getattr(model_class, relation)) for relation in join_loads])
+        return stmt, params
+
 
 def get_db():
+    """FastAPI dependency: a DB repository bound to a fresh session for this request."""
     db = DB()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,243 @@
+"""
+Bulk ingestion for PostgreSQL.
+
+Two strategies, both chunked so memory stays bounded for any input size:
+
+* ``copy``   - rows are streamed through ``COPY ... FROM STDIN`` (CSV). With a
+  conflict policy other than "error", rows are first copied into a temporary
+  staging table and moved with ``INSERT ... SELECT ... ON CONFLICT``.
+* ``insert`` - multi-row ``INSERT ... ON CONFLICT ... RETURNING <pk>`` through
+  SQLAlchemy's insertmanyvalues batching; used when the driver has no COPY
+  support or when the caller needs the generated primary keys back.
+
+Python-side column defaults (e.g. uuid7 ids) are applied before rows are sent,
+since COPY does not run them.
+"""
+import csv
+import io
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+DEFAULT_CHUNK_SIZE = 5000
+CONFLICT_POLICIES = ("error", "ignore", "update")
+COPY_NULL = "\\N"
+
+
+class BulkLoadResult:
+    """Outcome of a bulk load"""
+
+    __slots__ = ("method", "rows", "inserted", "seconds", "ids")
+
+    def __init__(self, method: str):
+        self.method = method
+        self.rows = 0          # rows sent to the database
+        self.inserted = 0      # rows that ended up in the target table
+        self.seconds = 0.0
+        self.ids: List[Any] = []
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.rows / self.seconds, 1) if self.seconds else float(self.rows)
+
+    def as_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "skipped": self.rows - self.inserted,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _column_map(model_class) -> Dict[str, Any]:
+    """Mapped attribute key -> Column, for plain column attributes"""
+    mapper = inspect(model_class)
+    return {attr.key: attr.columns[0] for attr in mapper.column_attrs}
+
+
+def _python_defaults(columns: Dict[str, Any]) -> Dict[str, Any]:
+    defaults = {}
+    for key, column in columns.items():
+        default = column.default
+        if default is None or default.is_sequence:
+            continue
+        if default.is_callable:
+            defaults[key] = default.arg
+        elif default.is_scalar:
+            defaults[key] = default.arg
+    return defaults
+
+
+def _apply_defaults(row: dict, defaults: Dict[str, Any]) -> dict:
+    if not defaults:
+        return row
+    row = dict(row)
+    for key, default in defaults.items():
+        if row.get(key) is None:
+            # Callable column defaults take an execution context; ours ignore it
+            row[key] = default(None) if callable(default) else default
+    return row
+
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _supports_copy(session: Session) -> bool:
+    return session.get_bind().dialect.driver == "psycopg2"
+
+
+class BulkLoader:
+    """Loads an iterable of dicts into one model's table"""
+
+    def __init__(
+        self,
+        session: Session,
+        model_class,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_conflict: str = "error",
+        conflict_columns: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+    ):
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"on_conflict must be one of {CONFLICT_POLICIES}")
+        self.session = session
+        self.model_class = model_class
+        self.table = model_class.__table__
+        self.chunk_size = chunk_size
+        self.on_conflict = on_conflict
+        self.columns = _column_map(model_class)
+        self.defaults = _python_defaults(self.columns)
+        self.primary_keys = [column.key for column in self.table.primary_key.columns]
+        self.conflict_columns = list(conflict_columns or self.primary_keys)
+        self.update_columns = update_columns
+
+    def load(self, rows: Iterable[dict], method: str = "auto") -> BulkLoadResult:
+        if method == "auto":
+            method = "copy" if _supports_copy(self.session) else "insert"
+        if method == "copy" and not _supports_copy(self.session):
+            method = "insert"
+
+        result = BulkLoadResult(method)
+        start = time.perf_counter()
+        loader = self._copy_chunk if method == "copy" else self._insert_chunk
+        for chunk in _chunks(rows, self.chunk_size):
+            chunk = [_apply_defaults(row, self.defaults) for row in chunk]
+            result.rows += len(chunk)
+            loader(chunk, result)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def _update_keys(self, sent_keys: List[str]) -> List[str]:
+        """
+        Columns overwritten on conflict; never the conflict target or the
+        primary key. Empty when only those were sent: the conflict is then
+        ignored, as there is nothing to update.
+        """
+        if self.update_columns:
+            return list(self.update_columns)
+        return [
+            key for key in sent_keys
+            if key not in self.conflict_columns and key not in self.primary_keys
+        ]
+
+    # --------------------- INSERT ... RETURNING ---------------------
+    def _insert_statement(self, target_columns: List[str]):
+        stmt = pg_insert(self.model_class)
+        update_keys = self._update_keys(target_columns) if self.on_conflict == "update" else []
+        if self.on_conflict == "ignore" or (self.on_conflict == "update" and not update_keys):
+            stmt = stmt.on_conflict_do_nothing(index_elements=self.conflict_columns)
+        elif self.on_conflict == "update":
+            stmt = stmt.on_conflict_do_update(
+                index_elements=self.conflict_columns,
+                set_={self.columns[key].name: getattr(stmt.excluded, self.columns[key].name) for key in update_keys},
+            )
+        return stmt.returning(*[getattr(self.model_class, key) for key in self.primary_keys])
+
+    def _insert_chunk(self, chunk: List[dict], result: BulkLoadResult):
+        # Rows of one executemany must share keys; normalise to the union
+        keys = sorted({key for row in chunk for key in row if key in self.columns})
+        params = [{key: row.get(key) for key in keys} for row in chunk]
+        returned = self.session.execute(self._insert_statement(keys), params).all()
+        result.inserted += len(returned)
+        pk_count = len(self.primary_keys)
+        result.ids.extend(row[0] if pk_count == 1 else tuple(row) for row in returned)
+
+    # --------------------- COPY FROM STDIN ---------------------
+    def _copy_chunk(self, chunk: List[dict], result: BulkLoadResult):
+        keys = sorted({key for row in chunk for key in row if key in self.columns})
+        column_names = [self.columns[key].name for key in keys]
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in chunk:
+            writer.writerow([_copy_value(row.get(key)) for key in keys])
+        buffer.seek(0)
+
+        quoted_columns = ", ".join(f'"{name}"' for name in column_names)
+        copy_options = f"(FORMAT csv, NULL '{COPY_NULL}')"
+        dbapi_connection = self.session.connection().connection.dbapi_connection
+        with dbapi_connection.cursor() as cursor:
+            if self.on_conflict == "error":
+                cursor.copy_expert(
+                    f'COPY "{self.table.name}" ({quoted_columns}) FROM STDIN WITH {copy_options}',
+                    buffer,
+                )
+                result.inserted += len(chunk)
+                return
+
+            # COPY cannot resolve conflicts itself: stage, then INSERT ... SELECT
+            staging = f"_bulk_{self.table.name}"
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS "{staging}" '
+                f'(LIKE "{self.table.name}" INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+            cursor.execute(f'TRUNCATE "{staging}"')
+            cursor.copy_expert(
+                f'COPY "{staging}" ({quoted_columns}) FROM STDIN WITH {copy_options}',
+                buffer,
+            )
+            conflict_target = ", ".join(f'"{self.columns[key].name}"' for key in self.conflict_columns)
+            update_keys = self._update_keys(keys) if self.on_conflict == "update" else []
+            if not update_keys:
+                action = "DO NOTHING"
+            else:
+                assignments = ", ".join(
+                    f'"{self.columns[key].name}" = EXCLUDED."{self.columns[key].name}"' for key in update_keys
+                )
+                action = f"DO UPDATE SET {assignments}"
+            cursor.execute(
+                f'INSERT INTO "{self.table.name}" ({quoted_columns}) '
+                f'SELECT {quoted_columns} FROM "{staging}" '
+                f"ON CONFLICT ({conflict_target}) {action}"
+            )
+            result.inserted += cursor.rowcount
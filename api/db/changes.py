@@ -0,0 +1,132 @@
+"""
+Post-commit change notifications for ORM models.
+
+In-process caches and indexes need to follow writes, but only writes that
+actually commit. Listeners registered with `on_commit(Company, callback)` are
+called once per committed transaction, with snapshots of the rows that were
+inserted/updated and the primary keys of those deleted. Snapshots are taken
+at flush time from already-loaded attributes, so callbacks never touch the
+(possibly closed or async) session. Updated rows also carry the values their
+changed columns had before the transaction under PREVIOUS (so a listener can
+tell a company that *was* visible). Rolled-back work is discarded.
+
+Core statements (bulk loads, UPDATE ... WHERE) bypass the ORM; callers that
+use them report changes with `notify()`. Rows loaded by an ORM-enabled
+INSERT/UPDATE ... RETURNING are not flushed either; `track()` (or
+`track_row()` for Core UPDATE ... RETURNING) queues them for the commit like
+flushed ones.
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# callback(changed: List[dict], deleted_ids: List[Any])
+ChangeListener = Callable[[List[dict], List[Any]], None]
+
+_listeners: Dict[type, List[ChangeListener]] = defaultdict(list)
+
+PENDING_KEY = "_pending_model_changes"
+# Snapshot key holding {column: value before this transaction} for updated rows
+PREVIOUS = "_previous"
+
+
+def on_commit(model_class, callback: ChangeListener):
+    """Call `callback(changed, deleted_ids)` after each commit that touched `model_class`"""
+    _listeners[model_class].append(callback)
+
+
+def snapshot(instance) -> dict:
+    """Loaded column values of `instance`; unloaded attributes are left out, never fetched"""
+    state = inspect(instance)
+    loaded = state.dict
+    return {
+        attr.key: loaded[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in loaded
+    }
+
+
+def _previous_values(instance) -> dict:
+    """Pre-flush values of changed, loaded columns (history is intact in after_flush)"""
+    state = inspect(instance)
+    previous = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.deleted:
+            previous[attr.key] = history.deleted[0]
+    return previous
+
+
+def notify(model_class, changed: List[dict] = (), deleted_ids: List[Any] = ()):
+    """Deliver changes made outside the ORM unit of work (already committed)"""
+    for callback in _listeners.get(model_class, ()):
+        try:
+            callback(list(changed), list(deleted_ids))
+        except Exception as e:
+            logger.error(f"Change listener {callback!r} failed: {str(e)}")
+
+
+def _queue(pending: dict, model_class, identity, row: dict):
+    changes = pending.setdefault(model_class, ({}, {}))
+    changes[1].pop(identity, None)
+    # Merge with an earlier snapshot of the row, keeping its oldest values
+    earlier = changes[0].get(identity) or {}
+    previous = {**row.get(PREVIOUS, {}), **earlier.get(PREVIOUS, {})}
+    changes[0][identity] = {**earlier, **row, PREVIOUS: previous}
+
+
+def _track(pending: dict, instance):
+    row = snapshot(instance)
+    row[PREVIOUS] = _previous_values(instance)
+    _queue(pending, type(instance), inspect(instance).identity, row)
+
+
+def track(session: Session, instance):
+    """Report `instance`, written by a statement rather than a flush, on the session's next commit"""
+    if type(instance) in _listeners:
+        _track(session.info.setdefault(PENDING_KEY, {}), instance)
+
+
+def track_row(session: Session, model_class, row: dict):
+    """
+    Report a row changed by a Core UPDATE on the session's next commit. `row`
+    holds the primary key ("id") and the columns the statement set.
+    """
+    if model_class in _listeners:
+        _queue(session.info.setdefault(PENDING_KEY, {}), model_class, (row["id"],), dict(row))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    if not _listeners:
+        return
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for instance in list(session.new) + list(session.dirty):
+        if type(instance) in _listeners:
+            _track(pending, instance)
+    for instance in session.deleted:
+        model_class = type(instance)
+        if model_class in _listeners:
+            changes = pending.setdefault(model_class, ({}, {}))
+            identity = inspect(instance).identity
+            changes[0].pop(identity, None)
+            changes[1][identity] = identity[0] if len(identity) == 1 else identity
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_changes(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    for model_class, (changed, deleted) in pending.items():
+        notify(model_class, list(changed.values()), list(deleted.values()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(PENDING_KEY, None)
@@ -1,6 +1,14 @@
+import time
+
 from decouple import config
+from fastapi import Depends, Request
 from sqlalchemy.engine import URL, create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+
+from api.db.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+from api.db.query_metrics import instrument_queries
+from api.utils.settings import settings
 
 # Read raw values from .env
 DB_USER = config('DB_USER')           # e.g. "regtechuser"
@@ -19,14 +27,61 @@ db_url = URL.create(
     database=DB_NAME,
 )
 
+# Same database, reached through the asyncpg driver for `async def` routes
+async_db_url = db_url.set(drivername="postgresql+asyncpg")
+
+# Pool sizing comes from Settings. pool_recycle bounds connection age, which
+# is what makes it reasonable to turn pool_pre_ping (one extra round-trip per
+# checkout) off on a stable network.
+pool_options = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
 # Create engine and session factory
-engine = create_engine(db_url, pool_pre_ping=True)
+engine = create_engine(db_url, poolclass=InstrumentedQueuePool, **pool_options)
+instrument_engine(engine, "primary")
+instrument_queries(engine)
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
+# Async engine and session factory. expire_on_commit is off so ORM objects
+# can still be read after commit without an implicit (and illegal) lazy load.
+async_engine = create_async_engine(async_db_url, poolclass=InstrumentedAsyncQueuePool, **pool_options)
+instrument_engine(async_engine, "primary_async")
+instrument_queries(async_engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Read replica: same credentials and database, different host. Without one
+# configured, read sessions are just primary sessions.
+if settings.DB_REPLICA_HOST:
+    replica_db_url = async_db_url.set(host=settings.DB_REPLICA_HOST, port=settings.DB_REPLICA_PORT)
+    async_read_engine = create_async_engine(replica_db_url, poolclass=InstrumentedAsyncQueuePool, **pool_options)
+    instrument_engine(async_read_engine, "replica_async")
+    instrument_queries(async_read_engine)
+else:
+    async_read_engine = async_engine
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Cookie carrying the time until which this client's reads stay on the primary
+READ_YOUR_WRITES_COOKIE = "rw_primary_until"
+
 # Base class for ORM models
 Base = declarative_base()
 
@@ -41,6 +96,98 @@ def get_db():
         db.close()
 
 
+def get_uow(db: Session = Depends(get_db)):
+    """
+    FastAPI dependency: unit of work for routes that write. Services only
+    flush; everything the request did is committed once after the route
+    returns, or rolled back if it raised. This runs before the response is
+    sent, so a failed commit surfaces as an error rather than a false success.
+    Shares the request's `get_db` session, so objects loaded by other
+    dependencies (e.g. the current user) are part of the same transaction.
+    Wrap a step that may fail without failing the request in
+    `db.begin_nested()` (a savepoint).
+    """
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+async def get_async_db():
+    """
+    FastAPI dependency: yield an AsyncSession, then close it.
+    Use this from `async def` routes so queries don't block the event loop.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_write_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    FastAPI dependency for routes that write, and their unit of work (see
+    `get_uow`): always the primary, committed once after the route returns
+    or rolled back if it raised. Also marks the request so
+    `read_your_writes_middleware` can pin the caller's next reads to the
+    primary.
+    """
+    request.state.db_write = True
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def get_read_db(request: Request, primary: AsyncSession = Depends(get_async_db)):
+    """
+    FastAPI dependency for read-only routes. Yields a replica session unless
+    no replica is configured or the caller wrote within the read-your-writes
+    window, in which case the (request-shared) primary session is used.
+    """
+    if async_read_engine is async_engine:
+        yield primary
+        return
+
+    try:
+        pinned_until = int(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        pinned_until = 0
+    if pinned_until > time.time():
+        yield primary
+        return
+
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """
+    HTTP middleware: after a request that used `get_write_db`, set a short-lived
+    cookie that keeps the client's reads on the primary while replicas catch up.
+    Done here rather than in the dependency because most routes return a
+    JSONResponse directly, which drops cookies set on the injected Response.
+    """
+    response = await call_next(request)
+    window = settings.DB_READ_YOUR_WRITES_SECONDS
+    if (
+        window > 0
+        and async_read_engine is not async_engine
+        and getattr(request.state, "db_write", False)
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            str(int(time.time()) + window),
+            max_age=window,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
 def init_db():
     """
     Initialize all tables (call at startup or in migrations).
@@ -0,0 +1,150 @@
+"""
+Compiled filter DSL for the repository layer in `api.db.Storage`.
+
+Filter specs use Mongo-style operators:
+
+    {
+        "status": "active",                       # equality
+        "year_founded": {"$gte": 2000, "$lt": 2020},
+        "country": {"$in": ["Nigeria", "Kenya"]},   # or just ["Nigeria", "Kenya"]
+        "company_name": {"$like": "bank"},
+        "$or": [{"niche": "payments"}, {"niche": "lending"}],
+    }
+
+A spec is reduced to its *shape* (model, keys and operators, never values).
+Each shape is compiled once into a `select()` whose values are bound
+parameters, and cached. Later requests with the same shape only build a
+params dict, and because the statement object is reused SQLAlchemy's
+compiled-statement cache is hit as well.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Date, and_, bindparam, cast, or_, select
+
+# Maximum number of distinct filter shapes kept compiled
+MAX_COMPILED_SHAPES = 512
+
+COMPARISON_OPERATORS = {
+    "$eq": lambda column, param: column == param,
+    "$ne": lambda column, param: column != param,
+    "$gt": lambda column, param: column > param,
+    "$gte": lambda column, param: column >= param,
+    "$lt": lambda column, param: column < param,
+    "$lte": lambda column, param: column <= param,
+    "$in": lambda column, param: column.in_(param),
+    "$not_in": lambda column, param: ~column.in_(param),
+    "$like": lambda column, param: column.like(param),
+    "$not_like": lambda column, param: ~column.like(param),
+    "$date": lambda column, param: cast(column, Date) == param,
+}
+LOGICAL_OPERATORS = {"$or": or_, "$and": and_}
+EXPANDING_OPERATORS = {"$in", "$not_in"}
+LIKE_OPERATORS = {"$like", "$not_like"}
+
+
+class CompiledFilter:
+    """A cached SELECT plus its WHERE criteria, reused for UPDATE/DELETE"""
+
+    __slots__ = ("statement", "criteria")
+
+    def __init__(self, statement, criteria):
+        self.statement = statement
+        self.criteria = criteria
+
+
+def _conditions(key: str, value: Any):
+    """Yield (operator, value) pairs for one spec entry"""
+    if isinstance(value, dict):
+        yield from value.items()
+    elif isinstance(value, list):
+        if all(isinstance(v, dict) for v in value):
+            for condition in value:
+                yield from condition.items()
+        else:
+            yield "$in", value
+    else:
+        yield "$eq", value
+
+
+def _flatten(spec: Dict[str, Any], prefix: str = "") -> Tuple[tuple, Dict[str, Any]]:
+    """
+    Split a spec into a hashable shape and the bind parameter values.
+    Empty `$in`/`$not_in` lists are dropped, matching the old behaviour.
+    """
+    shape = []
+    params = {}
+    for index, key in enumerate(sorted(spec)):
+        value = spec[key]
+        if key in LOGICAL_OPERATORS:
+            branches = []
+            for b_index, branch in enumerate(value):
+                b_shape, b_params = _flatten(branch, f"{prefix}{key[1:]}{index}_{b_index}_")
+                branches.append(b_shape)
+                params.update(b_params)
+            shape.append((key, tuple(branches)))
+            continue
+
+        for c_index, (operator, filter_value) in enumerate(_conditions(key, value)):
+            if operator not in COMPARISON_OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+            if operator in EXPANDING_OPERATORS and not filter_value:
+                continue
+            name = f"{prefix}{key}_{operator[1:]}_{c_index}"
+            if operator in LIKE_OPERATORS:
+                filter_value = f"%{filter_value}%"
+            shape.append((key, operator, name))
+            params[name] = filter_value
+    return tuple(shape), params
+
+
+def _criteria(model_class, shape: tuple) -> List:
+    clauses = []
+    for entry in shape:
+        if entry[0] in LOGICAL_OPERATORS:
+            combine = LOGICAL_OPERATORS[entry[0]]
+            clauses.append(combine(*[and_(*_criteria(model_class, branch)) for branch in entry[1]]))
+            continue
+        key, operator, name = entry
+        column = getattr(model_class, key)
+        param = bindparam(name, expanding=operator in EXPANDING_OPERATORS)
+        clauses.append(COMPARISON_OPERATORS[operator](column, param))
+    return clauses
+
+
+class FilterCompiler:
+    """LRU cache of compiled filter shapes, shared by every request"""
+
+    def __init__(self, max_size: int = MAX_COMPILED_SHAPES):
+        self.max_size = max_size
+        self._cache: "OrderedDict[tuple, CompiledFilter]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, model_class, spec: Dict[str, Any] = None, prefix: str = "") -> Tuple[CompiledFilter, Dict[str, Any]]:
+        """
+        Return the compiled filter for `spec`'s shape and the params to execute it with.
+        `prefix` namespaces the bind parameters when two specs go into one statement.
+        """
+        shape, params = _flatten(spec or {}, prefix)
+        key = (model_class, shape)
+        with self._lock:
+            compiled = self._cache.get(key)
+            if compiled is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return compiled, params
+
+        criteria = _criteria(model_class, shape)
+        compiled = CompiledFilter(select(model_class).where(*criteria), criteria)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = compiled
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return compiled, params
+
+
+filter_compiler = FilterCompiler()
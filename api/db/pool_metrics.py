@@ -0,0 +1,174 @@
+"""
+Connection pool telemetry.
+
+Checkout wait time and checkout timeouts are measured by the pool classes
+below (there is no pool event that fires *before* a caller starts waiting);
+hold time and overflow are collected through the pool's checkout/checkin
+events. One PoolStats object is kept per engine and read by `/health` and
+`/internal/pool`.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Number of recent samples kept for percentile calculation
+SAMPLE_WINDOW = 1024
+
+
+def _percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class PoolStats:
+    """Thread-safe counters for a single engine's pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.hold_total = 0.0
+            self.hold_max = 0.0
+            self.overflow_peak = 0
+            self._waits = deque(maxlen=SAMPLE_WINDOW)
+            self._holds = deque(maxlen=SAMPLE_WINDOW)
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._waits.append(seconds)
+
+    def record_timeout(self, seconds: float):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_checkout(self, overflow: int):
+        with self._lock:
+            self.checkouts += 1
+            self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def record_checkin(self, held: Optional[float]):
+        with self._lock:
+            self.checkins += 1
+            if held is not None:
+                self.hold_total += held
+                self.hold_max = max(self.hold_max, held)
+                self._holds.append(held)
+
+    def snapshot(self, pool=None) -> dict:
+        """Return counters in milliseconds, plus live pool gauges if given"""
+        with self._lock:
+            waits = list(self._waits)
+            holds = list(self._holds)
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "overflow_peak": self.overflow_peak,
+                "wait_ms": {
+                    "avg": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "p95": round(_percentile(waits, 95) * 1000, 3),
+                    "max": round(self.wait_max * 1000, 3),
+                },
+                "hold_ms": {
+                    "avg": round(self.hold_total / self.checkins * 1000, 3) if self.checkins else 0.0,
+                    "p95": round(_percentile(holds, 95) * 1000, 3),
+                    "max": round(self.hold_max * 1000, 3),
+                },
+            }
+
+        if pool is not None and isinstance(pool, QueuePool):
+            data["pool"] = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "timeout": pool.timeout(),
+            }
+        return data
+
+
+class _TimedCheckoutMixin:
+    """Times how long a caller waits for a connection from the queue"""
+
+    _pool_stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self._pool_stats is not None:
+                self._pool_stats.record_timeout(time.perf_counter() - start)
+            raise
+        if self._pool_stats is not None:
+            self._pool_stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting to the same stats
+        new_pool = super().recreate()
+        new_pool._pool_stats = self._pool_stats
+        return new_pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+_registry: Dict[str, tuple] = {}
+
+
+def instrument_engine(engine, name: str) -> PoolStats:
+    """
+    Attach a PoolStats to `engine` (sync or async) and register it under `name`.
+    The engine must have been created with one of the Instrumented pool classes
+    for wait times and timeouts to be recorded.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    stats = PoolStats(name)
+    sync_engine.pool._pool_stats = stats
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        pool = sync_engine.pool
+        stats.record_checkout(pool.overflow() if isinstance(pool, QueuePool) else 0)
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        stats.record_checkin(time.perf_counter() - started if started is not None else None)
+
+    _registry[name] = (sync_engine, stats)
+    return stats
+
+
+def pool_report() -> dict:
+    """Snapshot of every instrumented engine, keyed by name"""
+    return {
+        name: stats.snapshot(sync_engine.pool)
+        for name, (sync_engine, stats) in _registry.items()
+    }
@@ -0,0 +1,198 @@
+"""
+Per-request SQL telemetry.
+
+`before/after_cursor_execute` hooks time every statement and add it to the
+RequestQueryStats of the request currently being served (found through a
+ContextVar, which reaches both threadpool routes and AsyncSession greenlets).
+Statements are grouped by shape - the SQL text with bind placeholders, so the
+same query with different values is one shape. A shape executed
+SQL_N_PLUS_ONE_THRESHOLD times or more within one request is reported as an
+N+1 suspect.
+
+`sql_metrics_middleware` adds a `Server-Timing` header to every response and
+feeds a rolling per-route summary read by `/internal/queries`.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+
+from api.db.pool_metrics import _percentile
+from api.utils.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Slowest statements kept per request, and per route in the summary
+SLOWEST_KEPT = 5
+# Recent requests kept per route for the rolling summary
+ROUTE_WINDOW = 256
+# Statement text is truncated to this many characters in reports
+STATEMENT_PREVIEW = 300
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _shape(statement: str) -> str:
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class RequestQueryStats:
+    """Statements issued while serving one request"""
+
+    __slots__ = ("statements", "db_time", "shapes", "slowest", "_lock")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+        self.slowest: List[tuple] = []  # (seconds, shape), longest first
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float):
+        shape = _shape(statement)
+        with self._lock:
+            self.statements += 1
+            self.db_time += seconds
+            self.shapes[shape] += 1
+            if len(self.slowest) < SLOWEST_KEPT or seconds > self.slowest[-1][0]:
+                self.slowest.append((seconds, shape))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[SLOWEST_KEPT:]
+
+    def n_plus_one_suspects(self) -> Dict[str, int]:
+        threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_time * 1000:.1f};desc="{self.statements} queries"'
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("sql_request_stats", default=None)
+
+
+class RouteStats:
+    """Rolling window of RequestQueryStats for one route"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.n_plus_one_requests = 0
+        self._samples = deque(maxlen=ROUTE_WINDOW)  # (statements, db seconds)
+        self._suspects: Counter = Counter()
+        self._slowest: List[tuple] = []
+
+    def add(self, stats: RequestQueryStats, suspects: Dict[str, int]):
+        with self._lock:
+            self.requests += 1
+            self._samples.append((stats.statements, stats.db_time))
+            if suspects:
+                self.n_plus_one_requests += 1
+                self._suspects.update(suspects.keys())
+            self._slowest.extend(stats.slowest)
+            self._slowest.sort(key=lambda item: item[0], reverse=True)
+            del self._slowest[SLOWEST_KEPT:]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = [sample[0] for sample in self._samples]
+            times = [sample[1] for sample in self._samples]
+            return {
+                "requests": self.requests,
+                "n_plus_one_requests": self.n_plus_one_requests,
+                "statements": {
+                    "avg": round(sum(counts) / len(counts), 2) if counts else 0.0,
+                    "p95": _percentile(counts, 95),
+                    "max": max(counts, default=0),
+                },
+                "db_ms": {
+                    "avg": round(sum(times) / len(times) * 1000, 3) if times else 0.0,
+                    "p95": round(_percentile(times, 95) * 1000, 3),
+                    "max": round(max(times, default=0.0) * 1000, 3),
+                },
+                "n_plus_one_suspects": [
+                    {"statement": shape[:STATEMENT_PREVIEW], "requests": count}
+                    for shape, count in self._suspects.most_common(SLOWEST_KEPT)
+                ],
+                "slowest": [
+                    {"statement": shape[:STATEMENT_PREVIEW], "ms": round(seconds * 1000, 3)}
+                    for seconds, shape in self._slowest
+                ],
+            }
+
+
+_routes: Dict[str, RouteStats] = {}
+_routes_lock = threading.Lock()
+
+
+def _route_stats(key: str) -> RouteStats:
+    with _routes_lock:
+        stats = _routes.get(key)
+        if stats is None:
+            stats = _routes[key] = RouteStats()
+        return stats
+
+
+def instrument_queries(engine):
+    """Attach the per-request statement hooks to `engine` (sync or async)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started_at"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        # after_cursor_execute doesn't fire for failed statements
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started_at"):
+            connection.info["query_started_at"].pop()
+
+
+async def sql_metrics_middleware(request: Request, call_next):
+    """
+    HTTP middleware: collect the statements issued by this request, add a
+    `Server-Timing` header and fold the result into the per-route summary.
+    """
+    if not settings.SQL_METRICS_ENABLED:
+        return await call_next(request)
+
+    stats = RequestQueryStats()
+    token = _current.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+
+    route = request.scope.get("route")
+    # Route templates, not raw paths, so ids and 404 probes don't each get an entry
+    key = f"{request.method} {getattr(route, 'path', '<unmatched>')}"
+    suspects = stats.n_plus_one_suspects()
+    if suspects:
+        worst_shape, worst_count = max(suspects.items(), key=lambda item: item[1])
+        logger.warning(
+            f"Possible N+1 on {key}: {worst_count} x {worst_shape[:STATEMENT_PREVIEW]}"
+        )
+    _route_stats(key).add(stats, suspects)
+
+    response.headers.append("Server-Timing", stats.server_timing())
+    return response
+
+
+def query_report() -> dict:
+    """Per-route statement counts, DB time, N+1 suspects and slowest statements"""
+    with _routes_lock:
+        routes = dict(_routes)
+    return {key: stats.snapshot() for key, stats in sorted(routes.items())}
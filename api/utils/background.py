@@ -0,0 +1,19 @@
+"""
+Fire-and-forget background tasks on the running event loop.
+
+The loop only keeps a weak reference to a task, so a task nobody holds can be
+garbage-collected before it has run; `spawn` keeps each one referenced until
+it is done.
+"""
+import asyncio
+from typing import Coroutine, Set
+
+_tasks: Set[asyncio.Task] = set()
+
+
+def spawn(coroutine: Coroutine) -> asyncio.Task:
+    """Run `coroutine` as a task of the running loop, held until it finishes"""
+    task = asyncio.get_running_loop().create_task(coroutine)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
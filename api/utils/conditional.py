@@ -0,0 +1,95 @@
+"""
+Conditional GET helpers: weak ETags, Last-Modified and 304 Not Modified.
+
+Routes compute a cheap version of what they would return (typically
+`updated_at` values, read without the heavy columns), check it against the
+request with `not_modified()` and only build the body when it changed:
+
+    etag = weak_etag("company", company_id, updated_at)
+    if (cached := not_modified(request, etag, updated_at)) is not None:
+        return cached
+    ...
+    set_validators(response, etag, updated_at)
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# Stored copies must be revalidated, which is what makes them cheap to keep
+REVALIDATE = "no-cache"
+# Per-user responses: the browser may revalidate them, shared proxies may not store them
+REVALIDATE_PRIVATE = "private, no-cache"
+
+
+def weak_etag(*parts) -> str:
+    """W/"..." over the repr of `parts` (datetimes, ids, counts)"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored"""
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole seconds
+    return last_modified.replace(microsecond=0) <= since
+
+
+def set_validators(
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = REVALIDATE,
+):
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = REVALIDATE,
+    modified_since: bool = True,
+) -> Optional[Response]:
+    """
+    A 304 response if the client's copy is current, else None. If-None-Match
+    takes precedence; If-Modified-Since is only consulted without it, and not
+    at all with `modified_since=False` (for collections, where a removed row
+    leaves the newest updated_at unchanged).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since") if modified_since else None
+        fresh = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+    if not fresh:
+        return None
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified, cache_control)
+    return response
@@ -0,0 +1,111 @@
+"""
+Total-count strategies for paginated responses.
+
+* ``exact``     - ``SELECT count(*)`` over the filtered query.
+* ``estimated`` - the planner's row estimate from ``EXPLAIN``; no scan at all.
+  Small estimates are cheap to count, so below ESTIMATE_EXACT_THRESHOLD an
+  exact count is run instead.
+* ``cached``    - an exact count kept per normalized filter for a short TTL.
+* ``window``    - ``COUNT(*) OVER()`` added to the page query itself, so one
+  statement returns the page and the total. Only queries that add the column
+  support it (company search); `count_total` treats it as ``exact``.
+
+Every helper returns ``(total, mode)`` where ``mode`` is what actually produced
+the number, so responses can say "about 12,400 results" only when true.
+"""
+import json
+import logging
+from typing import Any, Hashable, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from api.utils.settings import settings
+from api.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+COUNT_MODES = ("exact", "estimated", "cached", "window")
+ESTIMATE_EXACT_THRESHOLD = 1000
+COUNT_CACHE_SIZE = 2048
+
+
+count_cache = TTLCache(ttl=settings.COUNT_CACHE_TTL_SECONDS, max_size=COUNT_CACHE_SIZE)
+
+
+def _count_statement(stmt):
+    return select(func.count()).select_from(stmt.order_by(None).subquery())
+
+
+def _explain_statement(stmt, dialect):
+    """
+    EXPLAIN can't take bind parameters through text(), so render literals;
+    values go through the dialect's literal processors (quotes escaped).
+    Returns None when a value type has no literal form, so the caller counts
+    exactly instead. Failing here, before anything is sent, keeps the
+    transaction usable.
+    """
+    try:
+        sql = stmt.order_by(None).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    except Exception as e:
+        logger.error(f"Count estimate unavailable, falling back to exact: {str(e)}")
+        return None
+    # Escape colons so text() doesn't read casts or user input as bind params
+    return text("EXPLAIN (FORMAT JSON) " + str(sql).replace(":", "\\:"))
+
+
+def _plan_rows(plan: Any) -> int:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _normalize_mode(mode: Optional[str]) -> str:
+    return mode if mode in COUNT_MODES else "exact"
+
+
+async def count_total(
+    db: AsyncSession, stmt, mode: str = "exact", cache_key: Optional[Hashable] = None
+) -> Tuple[int, str]:
+    """Count rows of the SELECT `stmt` on an AsyncSession using `mode`"""
+    mode = _normalize_mode(mode)
+
+    if mode == "cached" and cache_key is not None:
+        cached = count_cache.get(cache_key)
+        if cached is not None:
+            return cached, "cached"
+
+    explain = _explain_statement(stmt, db.bind.dialect) if mode == "estimated" else None
+    if explain is not None:
+        estimate = _plan_rows((await db.execute(explain)).scalar())
+        if estimate >= ESTIMATE_EXACT_THRESHOLD:
+            return estimate, "estimated"
+
+    total = (await db.execute(_count_statement(stmt))).scalar_one()
+    if mode == "cached" and cache_key is not None:
+        count_cache.set(cache_key, total)
+    return total, "exact"
+
+
+def count_total_sync(
+    db: Session, stmt, mode: str = "exact", cache_key: Optional[Hashable] = None
+) -> Tuple[int, str]:
+    """Count rows of the SELECT `stmt` on a Session using `mode`"""
+    mode = _normalize_mode(mode)
+
+    if mode == "cached" and cache_key is not None:
+        cached = count_cache.get(cache_key)
+        if cached is not None:
+            return cached, "cached"
+
+    explain = _explain_statement(stmt, db.get_bind().dialect) if mode == "estimated" else None
+    if explain is not None:
+        estimate = _plan_rows(db.execute(explain).scalar())
+        if estimate >= ESTIMATE_EXACT_THRESHOLD:
+            return estimate, "estimated"
+
+    total = db.execute(_count_statement(stmt)).scalar_one()
+    if mode == "cached" and cache_key is not None:
+        count_cache.set(cache_key, total)
+    return total, "exact"
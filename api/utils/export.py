@@ -0,0 +1,59 @@
+"""
+Incremental CSV / NDJSON encoders for streamed exports.
+
+Both take an async iterator of row batches (SQLAlchemy Rows, e.g. from a
+`yield_per` server-side cursor) and yield one text chunk per batch, so a
+StreamingResponse sends the first rows as soon as the database returns them
+and never holds more than one batch.
+"""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(jsonable_encoder(value))
+    return value
+
+
+async def csv_stream(
+    batches: AsyncIterator[Sequence],
+    fields: Sequence[str],
+    converters: Optional[Dict[str, Callable[[Any], Any]]] = None,
+) -> AsyncIterator[str]:
+    """Header line, then one chunk of CSV lines per batch; `converters` flatten nested fields"""
+    converters = converters or {}
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            mapping = row._mapping
+            writer.writerow([
+                _csv_value(converters[field](mapping[field]) if field in converters else mapping[field])
+                for field in fields
+            ])
+        yield buffer.getvalue()
+
+
+async def ndjson_stream(batches: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """One JSON object per row and line, one chunk per batch"""
+    async for rows in batches:
+        yield "".join(
+            json.dumps(jsonable_encoder(dict(row._mapping)), separators=(",", ":")) + "\n"
+            for row in rows
+        )
@@ -1,9 +1,91 @@
-from typing import Any, Dict, List, Optional
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from api.db.database import Base
 
 from api.utils.success_response import success_response
+from api.utils.counts import count_total_sync
+
+
+# ------------------------- KEYSET (CURSOR) PAGINATION -------------------------
+#
+# A cursor is an opaque token holding the sort key values of the last row of a
+# page, plus the name of the sort it belongs to. The next page is fetched with
+# `WHERE (sort_key, id) < (:last_sort_key, :last_id)` (or `>` for ascending
+# sorts) against a matching (sort_key, id) index, so page 5,000 costs the same
+# as page 1.
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any], sort: str = "default") -> str:
+    """Build an opaque cursor from the last row's sort key values"""
+    payload = {"s": sort, "k": [_encode_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str = "default", size: int = 2) -> List[Any]:
+    """Return the sort key values in `cursor`; 400 if it is malformed or from another sort"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(v) for v in payload["k"]]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+    if payload.get("s") != sort or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pagination cursor does not match the requested sort",
+        )
+    return values
+
+
+def keyset_order(keys: Sequence[Any], descending: bool) -> list:
+    """ORDER BY clauses for a keyset; every key sorts in the same direction"""
+    return [key.desc() if descending else key.asc() for key in keys]
+
+
+def keyset_after(keys: Sequence[Any], values: Sequence[Any], descending: bool):
+    """Row-value predicate selecting rows strictly after `values` in keyset order"""
+    if descending:
+        return tuple_(*keys) < tuple_(*values)
+    return tuple_(*keys) > tuple_(*values)
+
+
+def keyset_page(rows: list, per_page: int, key_values, sort: str = "default") -> Tuple[list, Optional[str]]:
+    """
+    Trim a page fetched with `LIMIT per_page + 1` and build the next cursor.
+    `key_values(row)` returns the sort key values of a row.
+    """
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    return rows, encode_cursor(key_values(rows[-1]), sort)
 
 
 def paginated_response(
@@ -12,7 +94,9 @@ def paginated_response(
     skip: int,
     limit: int,
     join: Optional[Any] = None,
-    filters: Optional[Dict[str, Any]]=None
+    filters: Optional[Dict[str, Any]]=None,
+    cursor: Optional[str] = None,
+    count_mode: str = "exact"
 ):
 
     '''
@@ -25,6 +109,9 @@ def paginated_response(
         be a query parameter
         * join- this is an optional argument to join a table to the query
         * filters- this is an optional dictionary of filters to apply to the query
+        * cursor- optional keyset cursor from a previous response's `next_cursor`. When given,
+        `skip` is ignored and the page starts right after the cursor's row
+        * count_mode- "exact", "estimated" or "cached", see api.utils.counts
 
     Example use:
         **Without filter**
@@ -80,8 +167,24 @@ def paginated_response(
                     getattr(getattr(join, "columns"),
                             attr).like(f"%{value}%"))
 
-    total = int(query.count())
-    results = jsonable_encoder(query.offset(skip).limit(limit).all())
+    total, total_mode = count_total_sync(
+        db,
+        query.statement,
+        count_mode,
+        cache_key=(model.__tablename__, str(join), repr(sorted((filters or {}).items()))),
+    )
+
+    # Newest first, with id as a tie-breaker so the order is stable for cursors
+    keys = (model.created_at, model.id)
+    query = query.order_by(*keyset_order(keys, descending=True))
+    if cursor:
+        query = query.filter(keyset_after(keys, decode_cursor(cursor), descending=True))
+    else:
+        query = query.offset(skip)
+    rows, next_cursor = keyset_page(
+        query.limit(limit + 1).all(), limit, lambda row: (row.created_at, row.id)
+    )
+    results = jsonable_encoder(rows)
     total_pages = int(total / limit) + (total % limit > 0)
 
     return success_response(
@@ -90,8 +193,10 @@ def paginated_response(
         data={
             "pages": total_pages,
             "total": total,
+            "total_mode": total_mode,
             "skip": skip,
             "limit": limit,
+            "next_cursor": next_cursor,
             "items": jsonable_encoder(
                 results,
                 exclude={
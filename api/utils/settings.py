@@ -34,5 +34,56 @@ class Settings(BaseSettings):
     DB_TYPE: str = config("DB_TYPE")
     DB_URL: str = config("DB_URL")
 
+    # Connection pool configuration (per engine, per worker process)
+    DB_POOL_SIZE: int = config("DB_POOL_SIZE", cast=int, default=5)
+    DB_MAX_OVERFLOW: int = config("DB_MAX_OVERFLOW", cast=int, default=10)
+    DB_POOL_TIMEOUT: int = config("DB_POOL_TIMEOUT", cast=int, default=30)
+    DB_POOL_RECYCLE: int = config("DB_POOL_RECYCLE", cast=int, default=1800)
+    DB_POOL_PRE_PING: bool = config("DB_POOL_PRE_PING", cast=bool, default=True)
+
+    # Read replica. Leave DB_REPLICA_HOST empty to send reads to the primary.
+    DB_REPLICA_HOST: str = config("DB_REPLICA_HOST", default="")
+    DB_REPLICA_PORT: int = config("DB_REPLICA_PORT", cast=int, default=5432)
+    # After a write, keep that client's reads on the primary for this many
+    # seconds so they see their own changes despite replica lag (0 = off)
+    DB_READ_YOUR_WRITES_SECONDS: int = config("DB_READ_YOUR_WRITES_SECONDS", cast=int, default=0)
+
+    # How long "cached" pagination totals are reused for the same filters
+    COUNT_CACHE_TTL_SECONDS: int = config("COUNT_CACHE_TTL_SECONDS", cast=int, default=30)
+
+    # Per-request SQL telemetry (Server-Timing header, /internal/queries).
+    # A statement repeated this many times in one request is flagged as N+1.
+    SQL_METRICS_ENABLED: bool = config("SQL_METRICS_ENABLED", cast=bool, default=True)
+    SQL_N_PLUS_ONE_THRESHOLD: int = config("SQL_N_PLUS_ONE_THRESHOLD", cast=int, default=5)
+
+    # In-process company search index (public directory). Other workers'
+    # writes are only picked up by the rebuild after MAX_AGE seconds.
+    COMPANY_INDEX_ENABLED: bool = config("COMPANY_INDEX_ENABLED", cast=bool, default=False)
+    COMPANY_INDEX_MAX_AGE_SECONDS: int = config("COMPANY_INDEX_MAX_AGE_SECONDS", cast=int, default=300)
+    # /public/companies/suggest from an in-memory name array, reloaded this
+    # often; disabled, suggestions are name prefix queries against Postgres
+    COMPANY_SUGGEST_ENABLED: bool = config("COMPANY_SUGGEST_ENABLED", cast=bool, default=False)
+    COMPANY_SUGGEST_MAX_AGE_SECONDS: int = config("COMPANY_SUGGEST_MAX_AGE_SECONDS", cast=int, default=300)
+    # NumPy column snapshot for filter-only company browsing: refreshed from
+    # the updated_at watermark, rebuilt in full after the max age
+    COMPANY_COLUMNS_ENABLED: bool = config("COMPANY_COLUMNS_ENABLED", cast=bool, default=False)
+    COMPANY_COLUMNS_REFRESH_SECONDS: int = config("COMPANY_COLUMNS_REFRESH_SECONDS", cast=int, default=5)
+    COMPANY_COLUMNS_MAX_AGE_SECONDS: int = config("COMPANY_COLUMNS_MAX_AGE_SECONDS", cast=int, default=300)
+
+    # Search facet counts are cached per filter set; any company write clears them
+    FACET_CACHE_TTL_SECONDS: int = config("FACET_CACHE_TTL_SECONDS", cast=int, default=60)
+    # Whole /public/companies/search responses (0 = off); cleared whenever a
+    # visible (active/completed) company changes
+    SEARCH_CACHE_TTL_SECONDS: int = config("SEARCH_CACHE_TTL_SECONDS", cast=int, default=30)
+    SEARCH_CACHE_SIZE: int = config("SEARCH_CACHE_SIZE", cast=int, default=1024)
+    # Company detail projections by id (0 = off). Each worker keeps its own
+    # copies for TTL seconds, so other workers' writes show after at most TTL;
+    # set COMPANY_CACHE_REDIS_URL (any Redis-protocol server) to share
+    # entries and invalidations between workers.
+    COMPANY_CACHE_TTL_SECONDS: int = config("COMPANY_CACHE_TTL_SECONDS", cast=int, default=30)
+    COMPANY_CACHE_SIZE: int = config("COMPANY_CACHE_SIZE", cast=int, default=4096)
+    COMPANY_CACHE_REDIS_URL: str = config("COMPANY_CACHE_REDIS_URL", default="")
+    COMPANY_CACHE_SHARED_TTL_SECONDS: int = config("COMPANY_CACHE_SHARED_TTL_SECONDS", cast=int, default=300)
+
 
 settings = Settings()
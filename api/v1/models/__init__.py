@@ -1,5 +1,6 @@
 from api.v1.models.user import User
 from api.v1.models.company import Company
+from api.v1.models.company_entries import CompanyServiceEntry, CompanyFounderEntry
 from api.v1.models.notification import Notification
 from api.v1.models.audit import AuditTrail as ActivityLog
 from api.v1.models.review import Review
@@ -15,6 +15,9 @@ class BaseTableModel(Base):
     """This model creates helper methods for all models"""
 
     __abstract__ = True
+    # Fetch server-generated values (created_at/updated_at, server defaults)
+    # with RETURNING during flush, so writes need no refresh() SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid7()))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
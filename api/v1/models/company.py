@@ -1,22 +1,47 @@
 from api.v1.models.base_model import BaseTableModel
 from uuid_extensions import uuid7
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, text, Boolean, Index, ForeignKey, Numeric, ARRAY, JSON
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import DDL, Column, Computed, Integer, String, event, text, Boolean, Index, ForeignKey, Numeric, ARRAY, JSON
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+
+# Text search configuration used for both the search document and queries
+SEARCH_CONFIG = "english"
+
+# Weighted full-text search document: name (A), niche and services (B),
+# description and founders (C), country (D). jsonb_to_tsvector indexes every
+# string value in the services/founders arrays. Every function used here is
+# immutable, as a generated column requires.
+SEARCH_DOCUMENT = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(company_name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(niche, '')), 'B') || "
+    f"setweight(jsonb_to_tsvector('{SEARCH_CONFIG}', coalesce(services, '[]'::jsonb), '[\"string\"]'), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C') || "
+    f"setweight(jsonb_to_tsvector('{SEARCH_CONFIG}', coalesce(founders, '[]'::jsonb), '[\"string\"]'), 'C') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(country, '')), 'D')"
+)
+
+# Ordinal for company_size buckets ("1-10", "51-200", "500+", "10,000+"): the
+# bucket's lower bound, so ranges sort by headcount instead of as strings.
+# At most 9 digits are read so the cast can't overflow.
+EMPLOYEE_RANGE = (
+    "substring(replace(company_size, ',', '') from '[0-9]{1,9}')::integer"
+)
 
 class Company(BaseTableModel):
     __tablename__ = "companies"
     creator_id = Column(
         String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
-    acquisitions = Column(Numeric, nullable=True)
+    acquisitions = Column(Integer, nullable=True)
     company_type = Column(String, nullable=False)
     company_name = Column(String, nullable=False)
     company_email = Column(String, nullable=False)
     company_phone = Column(String, nullable=True)
     company_website = Column(String, nullable=True)
     company_size = Column(String, nullable=True)
-    year_founded = Column(Numeric, nullable=True)
+    # Maintained by PostgreSQL from company_size; NULL when it holds no number
+    employee_range = Column(Integer, Computed(EMPLOYEE_RANGE, persisted=True))
+    year_founded = Column(Integer, nullable=True)
     headquarters = Column(String, nullable=True)
     country = Column(String, nullable=True)
     description = Column(String, nullable=True)
@@ -30,6 +55,9 @@ class Company(BaseTableModel):
     niche = Column(String, nullable=True)
     company_password = Column(String, nullable=True)
     founders = Column(JSONB, nullable=True)
+    # Maintained by PostgreSQL; not mapped (see __mapper_args__) so it is never
+    # loaded with, or returned after writing, a Company
+    search_document = Column(TSVECTOR, Computed(SEARCH_DOCUMENT, persisted=True))
 
     creator = relationship("User", back_populates="companies")
 
@@ -39,14 +67,49 @@ class Company(BaseTableModel):
     advertisements = relationship("Advertisement", back_populates="company", cascade="all, delete-orphan")
     favorite_by = relationship("FavoriteCompany", back_populates="company", cascade="all, delete-orphan")
     profile = relationship("CompanyProfile", back_populates="company", uselist=False, cascade="all, delete-orphan")
+    # Normalized copies of services/founders, written by sync_company_entries
+    service_entries = relationship("CompanyServiceEntry", back_populates="company", cascade="all, delete-orphan", passive_deletes=True)
+    founder_entries = relationship("CompanyFounderEntry", back_populates="company", cascade="all, delete-orphan", passive_deletes=True)
     
     __table_args__ = (
         Index('ix_companies_name', 'company_name'),
         Index('ix_companies_status', 'status'),
         Index('ix_companies_creator_id', 'creator_id'),
+        # One company per email; also the ON CONFLICT target of CompanyService.create
+        Index('uq_companies_company_email', 'company_email', unique=True),
         Index('ix_company_services', 'services', postgresql_using='gin'),
         Index('ix_company_founders', 'founders', postgresql_using='gin'),
+        # Keyset pagination: one (sort key, id) index per list/search sort
+        Index('ix_companies_status_created_at_id', 'status', 'created_at', 'id'),
+        Index('ix_companies_created_at_id', 'created_at', 'id'),
+        Index('ix_companies_name_id', 'company_name', 'id'),
+        Index('ix_companies_founded_id', text('coalesce(year_founded, 0)'), 'id'),
+        Index('ix_companies_employees_id', text('coalesce(employee_range, 0)'), 'id'),
+        # Filter combinations used by the directory (status, niche, founding year)
+        Index('ix_companies_status_niche_year', 'status', 'niche', 'year_founded'),
+        # Watermark reads of recently changed companies
+        Index('ix_companies_updated_at', 'updated_at'),
+        Index('ix_companies_search_document', 'search_document', postgresql_using='gin'),
+        # Trigram indexes: serve ILIKE '%x%' filters and fuzzy (%>) matching
+        Index('ix_companies_name_trgm', 'company_name', postgresql_using='gin',
+              postgresql_ops={'company_name': 'gin_trgm_ops'}),
+        Index('ix_companies_country_trgm', 'country', postgresql_using='gin',
+              postgresql_ops={'country': 'gin_trgm_ops'}),
+        Index('ix_companies_niche_trgm', 'niche', postgresql_using='gin',
+              postgresql_ops={'niche': 'gin_trgm_ops'}),
     )
+    __mapper_args__ = {
+        **BaseTableModel.__mapper_args__,
+        "exclude_properties": ["search_document"],
+    }
     
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+# gin_trgm_ops comes from the pg_trgm extension
+event.listen(
+    Company.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,71 @@
+from api.v1.models.base_model import BaseTableModel
+from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, Column, String, Index, ForeignKey, Integer, event, text
+
+# One row per element of Company.services / Company.founders. The JSONB arrays
+# stay the source of truth; these rows are rewritten whenever they change (see
+# api.v1.services.company.sync_company_entries) so filters on a service or
+# founder name are a b-tree lookup plus a join instead of a scan of every array.
+
+
+class CompanyServiceEntry(BaseTableModel):
+    __tablename__ = "company_services"
+
+    company_id = Column(String, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    name = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+
+    company = relationship("Company", back_populates="service_entries")
+
+    __table_args__ = (
+        Index('ix_company_services_company_id', 'company_id'),
+        Index('ix_company_services_lower_name', text('lower(name)'), 'company_id'),
+    )
+
+    def __str__(self):
+        return self.name
+
+
+class CompanyFounderEntry(BaseTableModel):
+    __tablename__ = "company_founders"
+
+    company_id = Column(String, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    name = Column(String, nullable=False)
+    role = Column(String, nullable=True)
+
+    company = relationship("Company", back_populates="founder_entries")
+
+    __table_args__ = (
+        Index('ix_company_founders_company_id', 'company_id'),
+        Index('ix_company_founders_lower_name', text('lower(name)'), 'company_id'),
+    )
+
+    def __str__(self):
+        return self.name
+
+
+def entry_projection(table: str, extra: str, source: str) -> str:
+    """
+    INSERT ... SELECT of the entry rows projected from the `source` JSONB
+    arrays (elements with a non-blank name); append a condition on `c` to
+    restrict the companies.
+    """
+    return (
+        f"INSERT INTO {table} (id, company_id, position, name, {extra}) "
+        f"SELECT gen_random_uuid()::text, c.id, item.position - 1, item.value->>'name', item.value->>'{extra}' "
+        f"FROM companies c, jsonb_array_elements("
+        f"CASE WHEN jsonb_typeof(c.{source}) = 'array' THEN c.{source} ELSE '[]'::jsonb END"
+        f") WITH ORDINALITY AS item(value, position) "
+        f"WHERE jsonb_typeof(item.value) = 'object' AND coalesce(btrim(item.value->>'name'), '') <> ''"
+    )
+
+
+def _backfill(table: str, extra: str, source: str) -> DDL:
+    """Fill a new entry table from the existing JSONB arrays"""
+    return DDL(entry_projection(table, extra, source)).execute_if(dialect="postgresql")
+
+
+event.listen(CompanyServiceEntry.__table__, "after_create", _backfill("company_services", "description", "services"))
+event.listen(CompanyFounderEntry.__table__, "after_create", _backfill("company_founders", "role", "founders"))
@@ -53,6 +53,7 @@ class User(BaseTableModel):
         Index('ix_users_is_deleted', 'is_deleted'),
         Index('ix_users_is_superadmin', 'is_superadmin'),
         Index('ix_users_first_name_last_name', 'first_name', 'last_name'),
+        Index('ix_users_created_at_id', 'created_at', 'id'),
     )
 
     def to_dict(self):
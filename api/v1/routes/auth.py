@@ -29,7 +29,7 @@ from api.v1.schemas.user import (
     UserCreate,
 )
 # from api.v1.services.login_notification import send_login_notification
-from api.db.database import get_db
+from api.db.database import get_db, get_uow
 from api.v1.services.user import user_service
 from api.utils.settings import settings
 
@@ -44,7 +44,7 @@ def register(
     background_tasks: BackgroundTasks,
     response: Response,
     user_schema: UserCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
 ):
     """Endpoint for a user to register their account"""
 
@@ -83,7 +83,7 @@ def register(
 
 @auth.post(path="/register-admin", status_code=status.HTTP_201_CREATED, response_model=auth_response)
 def register_as_super_admin(
-    request: Request, user: AdminCreate, db: Session = Depends(get_db)
+    request: Request, user: AdminCreate, db: Session = Depends(get_uow)
 ):
     """Endpoint for super admin creation"""
 
@@ -1,10 +1,15 @@
-from typing import Any, List, Optional
-from fastapi import Depends, APIRouter, Request, status, Query, HTTPException
+from typing import Any, List, Literal, Optional
+from fastapi import Depends, APIRouter, Request, status, Query, Path, HTTPException, UploadFile, File
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from api.utils.success_response import success_response
+from api.utils.conditional import REVALIDATE_PRIVATE, not_modified, set_validators, weak_etag
+from api.utils.export import EXPORT_MEDIA_TYPES, csv_stream, ndjson_stream
+from api.utils.settings import settings
 from api.v1.models.user import User
 from api.v1.schemas.company import (
     CompanyChangePasswordSchema,
@@ -22,10 +27,15 @@ from api.v1.schemas.company import (
     SuccessResponse,
     ListSuccessResponse,
     PaginationData,
-    CompanySearchResponse
+    CompanySearchResponse,
+    CompanySuggestResponse,
+    CompanyImportReport
 )
-from api.db.database import get_db
-from api.v1.services.company import company_service
+from api.db.database import get_async_db, get_db, get_read_db, get_write_db
+from api.v1.services.company import EXPORT_COLUMNS, company_service, search_cache, search_cache_key
+from api.v1.services.company_import import IMPORT_FORMATS, import_companies, import_format
+from api.v1.services.company_cache import company_cache, detail_version
+from api.v1.services.company_suggest import company_suggester
 from api.v1.services.user import user_service
 
 
@@ -46,11 +56,11 @@ public_router = APIRouter(
 @company_router.post("/register", response_model=SuccessResponse, status_code=status.HTTP_201_CREATED)
 async def create_company(
     schema: CompanyCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async),
 ):
     try:
-        company_created = company_service.create(db, creator_id = current_user.id, company_in = schema)
+        company_created = await company_service.create(db, creator_id = current_user.id, company_in = schema)
         return success_response(
             status_code=status.HTTP_201_CREATED,
             message="Company created successfully",
@@ -62,13 +72,34 @@ async def create_company(
             detail=f"Failed to create company: {str(e)}",
         )
 
+@company_router.post("/import", response_model=CompanyImportReport)
+def import_company_file(
+    file: UploadFile = File(..., description="CSV with a header row of CompanyCreate fields, or NDJSON; search exports with a company_email column added also work"),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Defaults to the file extension"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(user_service.get_current_user),
+):
+    """
+    Bulk-create companies from an uploaded file. Rows are committed in batches;
+    invalid rows and duplicate company emails are skipped and listed in the
+    report rather than failing the upload. Runs on the threadpool (sync) since
+    COPY and bcrypt are blocking.
+    """
+    fmt = format or import_format(file.filename, file.content_type)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown file format; pass format=csv or format=ndjson",
+        )
+    return import_companies(db, file.file, fmt, creator_id=current_user.id)
+
 @company_router.post("/login",  response_model=CompanyInDB)
 async def login_company(
     schema: CompanyLogin,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(user_service.get_current_user_async)
 ):
-    company_login = company_service.fetch(db, company_login = schema, user_id = current_user.id)
+    company_login = await company_service.fetch(db, company_login = schema, user_id = current_user.id)
     return success_response(
         status_code=status.HTTP_200_OK,
         message="Company logged in successfully",
@@ -78,17 +109,35 @@ async def login_company(
 
 @company_router.get("/all", response_model=ListSuccessResponse)
 async def get_all_companies(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     status = "active",
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Literal["exact", "estimated", "cached"] = Query("exact", description="How the total is computed"),
 ):
-    companies, total_count = company_service.fetch_all(
+    # Revalidate against the page's row versions before loading the rows
+    total, versions = await company_service.list_version(
+        db, status=status, page=page, per_page=per_page, cursor=cursor, count_mode=count
+    )
+    etag = weak_etag("companies.all", status, page, per_page, cursor, total, versions)
+    last_modified = max((updated_at for _, updated_at in versions if updated_at), default=None)
+    cached = not_modified(request, etag, last_modified, modified_since=False)
+    if cached is not None:
+        return cached
+
+    companies, total_count, next_cursor, total_mode = await company_service.fetch_all(
         db, 
         status=status, 
         page=int(page),
-        per_page=int(per_page)
+        per_page=int(per_page),
+        cursor=cursor,
+        count_mode=count,
+        total=total
     )
+    set_validators(response, etag, last_modified)
     return {
         "status": "success",
         "status_code": 200,
@@ -98,7 +147,9 @@ async def get_all_companies(
             "page": page,
             "per_page": per_page,
             "total": total_count,
-            "total_pages": (total_count + per_page - 1) // per_page
+            "total_pages": (total_count + per_page - 1) // per_page,
+            "total_mode": total_mode,
+            "next_cursor": next_cursor
         }
     }
 
@@ -106,58 +157,43 @@ async def get_all_companies(
 @company_router.get("/{company_id}", response_model=CompanyResponseData)
 async def get_company(
     company_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(user_service.get_current_user_async)
 ):
-    company = company_service.get_company(db, company_id=company_id)
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-    
-    company_data = CompanyData(
-        id=str(company.id),
-        name=company.company_name,  # Map company_name to name
-        company_type=company.company_type,
-        email=company.company_email,
-        phone=company.company_phone,
-        website=company.company_website,
-        company_size=company.company_size,
-        year_founded=company.year_founded,
-        headquarters=company.headquarters,
-        description=company.description,
-        founders=company.founders,
-        services=company.services,
-        logo=company.logo,
-        country=company.country,
-        last_funding_date=company.last_funding_date,
-        niche=company.niche,
-        status=company.status or "active",
-        social_media_linkedIn= company.social_media_linkedIn,
-        social_media_ig=company.social_media_ig,
-        social_media_X=company.social_media_X,
-        creator_id=str(company.creator_id),
-        created_at=company.created_at,
-        updated_at=company.updated_at
-    )
+    # Served from company_cache: a hot company costs no query, and an
+    # unchanged one is answered with 304 without building a body.
+    # Revalidations are not counted as views: mostly a client polling.
+    detail = await company_cache.load(db, company_id)
+    updated_at = detail_version(detail)
+    etag = weak_etag("company", company_id, updated_at)
+    cached = not_modified(request, etag, updated_at, REVALIDATE_PRIVATE)
+    if cached is not None:
+        return cached
+
+    company_suggester.record_view(company_id)
+    set_validators(response, etag, updated_at, REVALIDATE_PRIVATE)
 
     # Ensure we're not returning sensitive data
     return CompanyResponseData(
         status="success",
         status_code=200,
         message="Company retrieved",
-        data=company_data
+        data=CompanyData(**detail)
     )
 
 @company_router.put("/{company_id}")
 async def update_company(
     company_id: str,
     request_data: dict,  # Receive raw request data
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user)
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async)
 ):
     # Extract apiData if it exists, otherwise use the whole request
     update_data = request_data.get('apiData', request_data)
     
-    company = company_service.get_company(db, company_id=company_id)
+    company = await company_service.get_company(db, company_id=company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -180,21 +216,106 @@ async def update_company(
             detail=e.errors()
         )
     
-    updated_company = company_service.update(db, company=company, company_in=update_schema)
+    updated_company = await company_service.update(db, company=company, company_in=update_schema)
     return success_response(
         status_code=status.HTTP_200_OK,
         message="Company updated successfully",
         data=updated_company
     )
 
+
+ENTRY_EDIT_MESSAGES = {"add": "added", "replace": "updated", "remove": "removed"}
+
+
+async def _edit_entry(db: AsyncSession, user: User, company_id: str, field: str, operation: str, index=None, item=None):
+    result = await company_service.edit_entry(
+        db,
+        company_id=company_id,
+        user_id=user.id,
+        field=field,
+        operation=operation,
+        index=index,
+        item=item.model_dump(mode="json") if item is not None else None,
+    )
+    entry = "Service" if field == "services" else "Founder"
+    return success_response(
+        status_code=status.HTTP_201_CREATED if operation == "add" else status.HTTP_200_OK,
+        message=f"{entry} {ENTRY_EDIT_MESSAGES[operation]}",
+        data=result,
+    )
+
+
+@company_router.post("/{company_id}/services", status_code=status.HTTP_201_CREATED)
+async def add_company_service(
+    company_id: str,
+    service: ServiceModel,
+    position: Optional[int] = Query(None, ge=0, description="Insert before this position; appends by default"),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async),
+):
+    return await _edit_entry(db, current_user, company_id, "services", "add", position, service)
+
+
+@company_router.put("/{company_id}/services/{index}")
+async def replace_company_service(
+    company_id: str,
+    service: ServiceModel,
+    index: int = Path(..., ge=0),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async),
+):
+    return await _edit_entry(db, current_user, company_id, "services", "replace", index, service)
+
+
+@company_router.delete("/{company_id}/services/{index}")
+async def remove_company_service(
+    company_id: str,
+    index: int = Path(..., ge=0),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async),
+):
+    return await _edit_entry(db, current_user, company_id, "services", "remove", index)
+
+
+@company_router.post("/{company_id}/founders", status_code=status.HTTP_201_CREATED)
+async def add_company_founder(
+    company_id: str,
+    founder: CompanyFounder,
+    position: Optional[int] = Query(None, ge=0, description="Insert before this position; appends by default"),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async),
+):
+    return await _edit_entry(db, current_user, company_id, "founders", "add", position, founder)
+
+
+@company_router.put("/{company_id}/founders/{index}")
+async def replace_company_founder(
+    company_id: str,
+    founder: CompanyFounder,
+    index: int = Path(..., ge=0),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async),
+):
+    return await _edit_entry(db, current_user, company_id, "founders", "replace", index, founder)
+
+
+@company_router.delete("/{company_id}/founders/{index}")
+async def remove_company_founder(
+    company_id: str,
+    index: int = Path(..., ge=0),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async),
+):
+    return await _edit_entry(db, current_user, company_id, "founders", "remove", index)
+
 @company_router.get("/creator/me", response_model=ListSuccessResponse)
 async def get_my_companies(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(user_service.get_current_user_async),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
 ):
-    companies = company_service.get_companies_by_creator(
+    companies = await company_service.get_companies_by_creator(
         db, creator_id=current_user.id, skip=skip, limit=limit
     )
     return success_response(
@@ -203,6 +324,71 @@ async def get_my_companies(
         data=companies
     )
 
+def _entry_names(items) -> str:
+    """services/founders as a "; "-separated list of names for CSV cells"""
+    return "; ".join(
+        item["name"] for item in (items or [])
+        if isinstance(item, dict) and isinstance(item.get("name"), str)
+    )
+
+
+@public_router.get("/search/export")
+async def export_companies(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    search_term: Optional[str] = Query(None),
+    country: Optional[str] = Query(None),
+    size: Optional[str] = Query(None),
+    niche: Optional[str] = Query(None),
+    year_founded_min: Optional[int] = Query(None),
+    year_founded_max: Optional[int] = Query(None),
+    service: Optional[str] = Query(None),
+    founder: Optional[str] = Query(None),
+    sort_by: str = Query("relevance"),
+    match: Literal["fulltext", "fuzzy"] = Query("fulltext"),
+):
+    """
+    Stream every company matching a search (same filters and order as
+    /search) as CSV or NDJSON. Rows come from a server-side cursor and are
+    sent batch by batch; in CSV, services and founders are lists of names.
+    """
+    query = company_service.export_query(
+        search_term=search_term,
+        country=country,
+        size=size,
+        niche=niche,
+        year_founded_min=year_founded_min,
+        year_founded_max=year_founded_max,
+        service=service,
+        founder=founder,
+        sort_by=sort_by,
+        match=match
+    )
+    batches = company_service.stream_export(query)
+    if format == "csv":
+        fields = [column.name for column in EXPORT_COLUMNS]
+        body = csv_stream(batches, fields, {"services": _entry_names, "founders": _entry_names})
+    else:
+        body = ndjson_stream(batches)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="companies.{format}"'},
+    )
+
+
+@public_router.get("/suggest", response_model=CompanySuggestResponse)
+async def suggest_companies(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(8, ge=1, le=20),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Autocomplete: popular visible companies with a name word starting with `q`"""
+    if not settings.COMPANY_SUGGEST_ENABLED:
+        return {"data": await company_service.suggest_names(db, q, limit)}
+    await company_suggester.ready()
+    return {"data": company_suggester.suggest(q, limit)}
+
+
 @public_router.get(
     "/search",
     response_model=CompanySearchResponse,  # Now properly defined
@@ -214,12 +400,41 @@ async def search_companies(
     niche: Optional[str] = Query(None),
     year_founded_min: Optional[int] = Query(None),
     year_founded_max: Optional[int] = Query(None),
+    service: Optional[str] = Query(None, description="Comma list of service names offered (case-insensitive)"),
+    founder: Optional[str] = Query(None, description="Comma list of founder names (case-insensitive)"),
     sort_by: str = Query("relevance"),
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=20),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Literal["exact", "estimated", "cached", "window"] = Query("exact", description="How the total is computed"),
+    match: Literal["fulltext", "fuzzy"] = Query("fulltext", description="Word search, or typo-tolerant similarity"),
+    facets: bool = Query(False, description="Also return country, size, niche and founding decade counts"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    companies_rows, total_count = company_service.search_companies(
+    cache_key = search_cache_key(
+        search_term=search_term,
+        country=country,
+        size=size,
+        niche=niche,
+        year_founded_min=year_founded_min,
+        year_founded_max=year_founded_max,
+        service=service,
+        founder=founder,
+        match=match,
+        sort_by=sort_by,
+        page=page,
+        per_page=per_page,
+        cursor=cursor,
+        count_mode=count,
+        facets=facets
+    )
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    # Read before querying, so a result that raced with a company write isn't cached
+    generation = search_cache.generation
+
+    companies_rows, total_count, next_cursor, total_mode = await company_service.search_companies(
         db,
         search_term=search_term,
         country=country,
@@ -227,11 +442,35 @@ async def search_companies(
         niche=niche,
         year_founded_min=year_founded_min,
         year_founded_max=year_founded_max,
+        service=service,
+        founder=founder,
         sort_by=sort_by,
         page=int(page),
-        per_page=int(per_page)
+        per_page=int(per_page),
+        cursor=cursor,
+        count_mode=count,
+        match=match
     )
     
+    did_you_mean = None
+    if search_term and not companies_rows and page == 1 and not cursor:
+        did_you_mean = await company_service.suggest_spelling(db, search_term)
+    
+    facet_counts = None
+    if facets:
+        facet_counts = await company_service.search_facets(
+            db,
+            search_term=search_term,
+            country=country,
+            size=size,
+            niche=niche,
+            year_founded_min=year_founded_min,
+            year_founded_max=year_founded_max,
+            service=service,
+            founder=founder,
+            match=match
+        )
+    
     # Convert Row objects to dictionaries
     companies = []
     for row in companies_rows:
@@ -254,23 +493,29 @@ async def search_companies(
         companies.append(company_dict)
     
     # Create the properly structured response
-    return {
+    response = {
         "data": companies,
         "pagination": {
             "page": page,
             "per_page": per_page,
             "total": total_count,
-            "total_pages": (total_count + per_page - 1) // per_page
-        }
+            "total_pages": (total_count + per_page - 1) // per_page,
+            "total_mode": total_mode,
+            "next_cursor": next_cursor
+        },
+        "did_you_mean": did_you_mean,
+        "facets": facet_counts
     }
+    search_cache.set(cache_key, response, generation=generation)
+    return response
 
 @company_router.delete("/{company_id}", response_model=CompanyInDB)
 async def delete_company(
     company_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user)
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async)
 ):
-    company = company_service.get_company(db, company_id=company_id)
+    company = await company_service.get_company(db, company_id=company_id)
     
     if company.creator_id != current_user.id:
         raise HTTPException(
@@ -278,7 +523,7 @@ async def delete_company(
             detail="You don't have permission to delete this company"
         )
     
-    deleted_company = company_service.delete(db, company_id=company_id)
+    deleted_company = await company_service.delete(db, company_id=company_id)
     return success_response(
         status_code=status.HTTP_200_OK,
         message="Company deleted successfully",
@@ -289,8 +534,8 @@ async def delete_company(
 @company_router.post("/change-password", status_code=status.HTTP_200_OK)
 async def change_company_password(
     schema: CompanyChangePasswordSchema,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async),
     company_id: str = Query(..., description="ID of the company to change password for")
 ):
     """
@@ -312,7 +557,7 @@ async def change_company_password(
         HTTPException: 422 if new password is same as current
     """
     # Get the company
-    company = company_service.get_company(db, company_id=company_id)
+    company = await company_service.get_company(db, company_id=company_id)
     
     # Check if current user has permission (company creator)
     if str(company.creator_id) != str(current_user.id):
@@ -322,7 +567,7 @@ async def change_company_password(
         )
     
     # Change password
-    company_service.change_password(
+    await company_service.change_password(
         db=db,
         company=company,
         current_password=schema.current_password,
@@ -332,25 +577,26 @@ async def change_company_password(
     return {"message": "Company password updated successfully"}
 
 @company_router.patch("/{company_id}/status", response_model=dict)
-def update_company_status(
+async def update_company_status(
     company_id: str,
     status_update: CompanyStatusUpdate,
-    db: Session = Depends(get_db),
-    current_user = Depends(user_service.get_current_user)
+    db: AsyncSession = Depends(get_write_db),
+    current_user = Depends(user_service.get_current_user_async)
 ) -> Any:
     """
     Update company status.
     Only the company creator or an admin can update the status.
     """
     # Get the company
-    company = company_service.get_company(db, company_id=company_id)
+    company = await company_service.get_company(db, company_id=company_id)
     
     # Update the status
-    updated_company = company_service.update_status(
+    updated_company = await company_service.update_status(
         db=db,
         company=company,
         status=status_update.status,
-        current_user_id=current_user.id
+        current_user_id=current_user.id,
+        is_superadmin=bool(current_user.is_superadmin)
     )
     
     return {
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from api.db.database import get_db
+from api.db.database import get_read_db
 from api.v1.services.user import user_service
 from api.v1.models import User, Company, ActivityLog, Notification
 from api.utils.success_response import success_response
@@ -16,8 +17,8 @@ dashboard_router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 @dashboard_router.get("", status_code=200)
 async def get_dashboard_data(
 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(user_service.get_current_user_async)
 ):
     """
     Get dashboard overview data for the current user
@@ -30,7 +31,9 @@ async def get_dashboard_data(
             "newsletters": 3,      # Replace with actual query
             "activities": 15,      # Replace with actual query
             
-            "companies": db.query(Company).filter(Company.creator_id == current_user.id).count()
+            "companies": (await db.execute(
+                select(func.count()).select_from(Company).filter(Company.creator_id == current_user.id)
+            )).scalar_one()
         }
         
         # Get recent activities (last 15)
@@ -53,11 +56,12 @@ async def get_dashboard_data(
         # ]
         
         # Get notifications (last 15)
-        notifications = db.query(Notification)\
-            .filter(Notification.user_id == current_user.id)\
-            .order_by(Notification.created_at.desc())\
-            .limit(15)\
-            .all()
+        notifications = (await db.execute(
+            select(Notification)
+            .filter(Notification.user_id == current_user.id)
+            .order_by(Notification.created_at.desc())
+            .limit(15)
+        )).scalars().all()
         
         formatted_notifications = [
             {
@@ -71,10 +75,11 @@ async def get_dashboard_data(
         ]
         
         # Get user's companies
-        companies = db.query(Company)\
-            .filter(Company.creator_id == current_user.id)\
-            .order_by(Company.updated_at.desc())\
-            .all()
+        companies = (await db.execute(
+            select(Company)
+            .filter(Company.creator_id == current_user.id)
+            .order_by(Company.updated_at.desc())
+        )).scalars().all()
         
         formatted_companies = [
             {
@@ -1,43 +1,56 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import csv
 from io import StringIO
 
-from api.db.database import get_db
-from api.v1.models import User, Company
+from api.db.database import get_async_db, get_write_db
+from api.v1.models import User, Company, FavoriteCompany
+from api.v1.schemas.company import CompanySearchItem
+from api.v1.services.company import SEARCH_COLUMNS
 from api.v1.services.user import user_service
 from api.utils.success_response import success_response
 
 favorites_router = APIRouter(prefix="/favorites", tags=["Favorites"])
 
-@favorites_router.get("", response_model=List[Company])
+@favorites_router.get("")
 async def get_user_favorites(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(user_service.get_current_user_async)
 ):
     """Get all favorite companies for current user"""
-    return current_user.favorites
+    # The search result fields only: never the company's password hash or contact email
+    rows = (await db.execute(
+        select(*SEARCH_COLUMNS)
+        .join(FavoriteCompany, FavoriteCompany.company_id == Company.id)
+        .filter(FavoriteCompany.user_id == current_user.id)
+    )).all()
+    return success_response(
+        message="Favorites retrieved successfully",
+        status_code=status.HTTP_200_OK,
+        data=[CompanySearchItem.model_validate(row).model_dump() for row in rows]
+    )
 
 @favorites_router.delete("/{company_id}")
 async def remove_favorite(
     company_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user)
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(user_service.get_current_user_async)
 ):
     """Remove a company from favorites"""
-    company = next((c for c in current_user.favorites if str(c.id) == company_id), None)
+    result = await db.execute(
+        delete(FavoriteCompany)
+        .where(FavoriteCompany.user_id == current_user.id, FavoriteCompany.company_id == company_id)
+    )
     
-    if not company:
+    if not result.rowcount:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found in favorites"
         )
     
-    current_user.favorites.remove(company)
-    db.commit()
-    
     return success_response(
         message="Company removed from favorites",
         status_code=status.HTTP_200_OK
@@ -45,10 +58,17 @@ async def remove_favorite(
 
 @favorites_router.get("/export")
 async def export_favorites(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(user_service.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(user_service.get_current_user_async)
 ):
     """Export favorites as CSV"""
+    # Load everything up front; the generator below runs after the session is gone
+    favorites = (await db.execute(
+        select(Company, FavoriteCompany.created_at)
+        .join(FavoriteCompany, FavoriteCompany.company_id == Company.id)
+        .filter(FavoriteCompany.user_id == current_user.id)
+    )).all()
+
     def generate_csv():
         output = StringIO()
         writer = csv.writer(output)
@@ -61,17 +81,16 @@ async def export_favorites(
         ])
         
         # Data
-        for company in current_user.favorites:
+        for company, added_at in favorites:
             writer.writerow([
-                company.name,
-                company.website,
-                ", ".join(company.services),
+                company.company_name,
+                company.company_website,
+                ", ".join(s.get("name", "") for s in (company.services or [])),
                 company.niche,
-                company.location,
-                company.employees,
+                company.country,
+                company.company_size,
                 company.last_funding_date,
-                # Assuming you have a relationship attribute for when it was favorited
-                company.added_at.strftime("%Y-%m-%d")  
+                added_at.strftime("%Y-%m-%d") if added_at else ""
             ])
         
         output.seek(0)
@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter, Request, status, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from api.db.database import get_db
+from api.db.database import get_write_db
 from api.v1.models import Payment, Subscription
 from datetime import datetime, timedelta, timezone
 import hmac
@@ -15,7 +15,7 @@ FLUTTERWAVE_SECRET_KEY = os.getenv("FLW_SECRET_KEY")  # Store this securely
 FLUTTERWAVE_WEBHOOK_HASH = os.getenv("FLW_WEBHOOK_HASH")
 
 @router.post("/webhook/flutterwave", status_code=status.HTTP_200_OK)
-async def flutterwave_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+async def flutterwave_webhook(request: Request, db: AsyncSession = Depends(get_write_db)):
     received_hash = request.headers.get("verif-hash")
     if FLUTTERWAVE_WEBHOOK_HASH and received_hash != FLUTTERWAVE_WEBHOOK_HASH:
         raise HTTPException(status_code=403, detail="Invalid webhook hash")
@@ -73,5 +73,4 @@ async def flutterwave_webhook(request: Request, db: AsyncSession = Depends(get_d
     elif subscription.billing_cycle == "yearly":
         subscription.end_date += timedelta(days=365)
 
-    await db.commit()
     return {"message": "Payment verified and subscription updated"}
@@ -1,21 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 from typing import List
 
+from api.db.database import get_write_db
 from api.v1.models.notification import Notification
 
 from ..schemas.notification import NotificationOut, NotificationCreate
-from api.db.database import get_db
 from api.v1.services.user import user_service
-from ..services.notification import NotificationService, get_notification_service
+from ..services.notification import AsyncNotificationService, get_async_notification_service
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
-@router.post("/", response_model=NotificationOut)
+@router.post("/", response_model=NotificationOut, dependencies=[Depends(get_write_db)])
 async def create_user_notification(
     notification: NotificationCreate,
-    notification_service: NotificationService = Depends(get_notification_service),
-    current_user: dict = Depends(user_service.get_current_user)
+    notification_service: AsyncNotificationService = Depends(get_async_notification_service),
+    current_user: dict = Depends(user_service.get_current_user_async)
 ):
     """Create a new notification (typically called internally)"""
     if current_user.id != notification.user_id:
@@ -23,7 +22,7 @@ async def create_user_notification(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Cannot create notifications for other users"
         )
-    return notification_service.create_notification(
+    return await notification_service.create_notification(
         title=notification.title,
         message=notification.message,
         user_id=notification.user_id,
@@ -36,23 +35,23 @@ async def create_user_notification(
 async def get_current_user_notifications(
     skip: int = 0,
     limit: int = 100,
-    notification_service: NotificationService = Depends(get_notification_service),
-    current_user: dict = Depends(user_service.get_current_user)
+    notification_service: AsyncNotificationService = Depends(get_async_notification_service),
+    current_user: dict = Depends(user_service.get_current_user_async)
 ):
     """Get authenticated user's notifications"""
-    return notification_service.get_user_notifications(
+    return await notification_service.get_user_notifications(
         user_id=current_user.id, 
         limit=limit
     )
 
-@router.put("/{notification_id}/read")
+@router.put("/{notification_id}/read", dependencies=[Depends(get_write_db)])
 async def mark_notification_as_read(
     notification_id: str,
-    notification_service: NotificationService = Depends(get_notification_service),
-    current_user: dict = Depends(user_service.get_current_user)
+    notification_service: AsyncNotificationService = Depends(get_async_notification_service),
+    current_user: dict = Depends(user_service.get_current_user_async)
 ):
     """Mark a notification as read"""
-    success = notification_service.mark_notification_as_read(notification_id)
+    success = await notification_service.mark_notification_as_read(notification_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -13,7 +13,7 @@ from api.v1.schemas.permissions.roles import RoleDeleteResponse, RoleUpdate
 from fastapi.responses import JSONResponse
 from api.utils.success_response import success_response
 
-from api.db.database import get_db
+from api.db.database import get_db, get_uow
 from uuid_extensions import uuid7
 from api.v1.models.user import User
 from api.v1.services.user import user_service
@@ -26,7 +26,7 @@ role_perm = APIRouter(tags=["permissions management"])
 @role_perm.post("/custom/roles", tags=["Create Custom Role"])
 def create_custom_role_endpoint(
     role: RoleCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_user),
 ):
     # Ensure it's a custom role
@@ -37,7 +37,7 @@ def create_custom_role_endpoint(
 @role_perm.post("/built-in/roles", tags=["Create Built-in Role"])
 def create_built_in_role_endpoint(
     role: RoleCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_super_admin),
 ):  # Only super admin can create
     if not current_user.is_superadmin:
@@ -59,7 +59,7 @@ def assign_role(
     request: RoleAssignRequest,
     org_id: str = Path(..., description="The ID of the organisation"),
     user_id: str = Path(..., description="The ID of the user"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_user),
 ):
     return role_service.assign_role_to_user(db, org_id, user_id, request.role_id)
@@ -73,7 +73,7 @@ def remove_user_from_role(
     org_id: str = Path(..., description="The ID of the organisation"),
     user_id: str = Path(..., description="The ID of the user"),
     role_id: str = Path(..., description="The ID of the role"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_user),
 ):
     """
@@ -104,7 +104,7 @@ def remove_user_from_role(
 )
 def delete_role(
     role_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_user),
 ):
     """ An endpoint that fetches all product comment"""
@@ -139,7 +139,7 @@ def get_roles_for_organisation(
 def update_role_permissions(
     role_id: str,
     permissions: List[str],
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_super_admin),
 ):
     updated_role = role_service.update_role_permissions(db, role_id, permissions)
@@ -154,7 +154,7 @@ def update_role_permissions(
 def update_custom_role_endpoint(
     role_id: str,
     role_update: RoleUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_super_admin)
 ):
     # Ensure it's a custom role
@@ -166,7 +166,7 @@ def update_custom_role_endpoint(
 def update_builtin_role_endpoint(
     role_id: str,
     role_update: RoleUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_super_admin)
 ):
     if not current_user.is_superadmin:
@@ -12,7 +12,7 @@ from api.v1.schemas.user import (
     AllUsersResponse, ChangePasswordSchema, UserUpdate,
     AdminCreateUserResponse, AdminCreateUser
 )
-from api.db.database import get_db
+from api.db.database import get_db, get_uow
 from api.v1.services.user import user_service
 from api.v1.services.notification import NotificationService, get_notification_service
 
@@ -21,9 +21,9 @@ user_router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @user_router.delete('/delete', status_code=status.HTTP_200_OK)
-async def delete_account(
+def delete_account(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_user),
     user_id: Optional[str] = None
 ):
@@ -96,7 +96,7 @@ async def delete_account(
 def update_current_user(
     current_user : Annotated[User , Depends(user_service.get_current_user)],
     schema : UserUpdate,
-    db : Session = Depends(get_db),
+    db : Session = Depends(get_uow),
     notification_service: NotificationService = Depends(get_notification_service)
 ):
 
@@ -127,7 +127,7 @@ def update_user(
     user_id: str,
     current_user: Annotated[User, Depends(user_service.get_current_super_admin)],
     schema: UserUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     notification_service: NotificationService = Depends(get_notification_service)
 ):
     user = user_service.update(db=db, schema=schema, id=user_id, current_user=current_user)
@@ -154,7 +154,7 @@ def update_user(
 def delete_user(
     user_id: str,
     current_user: Annotated[User, Depends(user_service.get_current_super_admin)],
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
 ):
     """Endpoint for user deletion (soft-delete)"""
 
@@ -162,7 +162,7 @@ def delete_user(
     Args:
         user_id (str): User ID
         current_user (User): Current logged in user
-        db (Session, optional): Database Session. Defaults to Depends(get_db).
+        db (Session, optional): Database Session. Defaults to Depends(get_uow).
 
     Raises:
         HTTPException: 403 FORBIDDEN (Current user is not a super admin)
@@ -188,10 +188,12 @@ def delete_user(
     )
 
 @user_router.get('', status_code=status.HTTP_200_OK, response_model=AllUsersResponse)
-async def get_users(
+def get_users(
     current_user: Annotated[User, Depends(user_service.get_current_super_admin)],
     db: Annotated[Session, Depends(get_db)],
     page: int = 1, per_page: int = 10,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Literal["exact", "estimated", "cached"] = Query("exact", description="How the total is computed"),
     is_active: Optional[bool] = Query(None),
     is_deleted: Optional[bool] = Query(None),
     is_verified: Optional[bool] = Query(None),
@@ -204,6 +206,8 @@ async def get_users(
         db: database Session object
         page: the page number
         per_page: the maximum size of users for each page
+        cursor: keyset cursor from the previous page's next_cursor
+        count: how the total is computed (exact, estimated or cached)
         is_active: boolean to filter active users
         is_deleted: boolean to filter deleted users
         is_verified: boolean to filter verified users
@@ -217,13 +221,13 @@ async def get_users(
         'is_verified': is_verified,
         'is_superadmin': is_superadmin,
     }
-    return user_service.fetch_all(db, page, per_page, **query_params)
+    return user_service.fetch_all(db, page, per_page, cursor=cursor, count_mode=count, **query_params)
 
 @user_router.post("", status_code=status.HTTP_201_CREATED, response_model=AdminCreateUserResponse)
 def admin_registers_user(
     user_request: AdminCreateUser,
     current_user: Annotated[User, Depends(user_service.get_current_super_admin)],
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_uow)
 ):
     '''
     Endpoint for an admin to register a user.
@@ -238,7 +242,7 @@ def admin_registers_user(
     
 
 @user_router.get('/{role_id}/roles', status_code=status.HTTP_200_OK)
-async def get_users_by_role(
+def get_users_by_role(
     role_id: Literal["admin", "user", "guest", "owner"], 
     db: Session = Depends(get_db), 
     current_user: User = Depends(user_service.get_current_user)
@@ -286,9 +290,9 @@ def get_user_by_id(
     )
 
 @user_router.post("/change-password", status_code=status.HTTP_200_OK)
-async def change_password(
+def change_password(
     schema: ChangePasswordSchema,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow),
     current_user: User = Depends(user_service.get_current_user)
 ):
     user_service.change_password(
@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict, Any, Literal
+from typing import Optional, List, Dict, Any, Literal, Union
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict, validator
 from datetime import datetime
@@ -188,6 +188,8 @@ class PaginationData(BaseModel):
     per_page: int
     total: int
     total_pages: int
+    total_mode: str = "exact"  # exact | estimated | cached; "estimated" means "about N"
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
 
 class CompanySearchItem(BaseModel):
     id: str
@@ -208,14 +210,51 @@ class CompanySearchItem(BaseModel):
         arbitrary_types_allowed=True
     )
 
+class FacetCount(BaseModel):
+    value: Union[int, str]
+    count: int
+
+
 class CompanySearchResponse(BaseModel):
     data: List[CompanySearchItem]
     pagination: PaginationData
+    did_you_mean: Optional[str] = None  # set when a search term matched nothing
+    # country, company_size, niche, year_founded (decade start); only with facets=true
+    facets: Optional[Dict[str, List[FacetCount]]] = None
     
     model_config = ConfigDict(
         from_attributes=True
     )
 
+class CompanySuggestion(BaseModel):
+    id: str
+    name: str
+
+
+class CompanySuggestResponse(BaseModel):
+    data: List[CompanySuggestion]
+
+class ImportFieldError(BaseModel):
+    field: str
+    message: str
+
+
+class ImportRowError(BaseModel):
+    row: int  # 1-based data row (CSV header and blank NDJSON lines not counted)
+    errors: List[ImportFieldError]
+
+
+class CompanyImportReport(BaseModel):
+    rows: int
+    imported: int
+    duplicates: int  # company_email already in the database or earlier in the file
+    failed: int
+    seconds: float
+    rows_per_second: float
+    errors: List[ImportRowError]  # first MAX_REPORTED_ERRORS rejected rows
+    errors_truncated: bool
+    aborted: Optional[str] = None  # why reading stopped early (bad encoding, malformed CSV)
+
 class SuccessResponse(BaseModel):
     status: str
     status_code: int
@@ -226,6 +226,8 @@ class AllUsersResponse(BaseModel):
     page: int
     per_page: int
     total: int
+    total_mode: str = "exact"  # exact | estimated | cached
+    next_cursor: Optional[str] = None
     data: Union[List[UserData], List[None]]    
 
 class AdminCreateUser(BaseModel):
@@ -1,14 +1,24 @@
-from typing import List, Optional, Tuple
-from sqlalchemy import func, text, or_
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Integer, Text, case, cast, delete, exists, func, insert, literal, or_, select, literal_column, text, union_all, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from uuid_extensions import uuid7
 import json
-from api.v1.models.company import Company
+from api.v1.models.company import SEARCH_CONFIG, Company
+from api.v1.models.company_entries import CompanyFounderEntry, CompanyServiceEntry, entry_projection
 from api.v1.schemas.company import CompanyCreate, CompanyUpdate, CompanyInDB, CompanyLogin
 from api.core.base.services import Service
 from api.v1.services.user import user_service
+from api.utils.pagination import decode_cursor, keyset_after, keyset_order, keyset_page
+from api.db.changes import PREVIOUS, on_commit, track, track_row
+from api.utils.counts import count_cache, count_total
+from api.utils.ttl_cache import TTLCache
+from api.utils.settings import settings
+from api.v1.services.company_index import VISIBLE_STATUSES, company_index
+from api.v1.services.company_columns import company_columns
+from api.db.database import AsyncReadSessionLocal
 import logging
 
 # Configure logging
@@ -29,102 +39,391 @@ DEFAULT_PAGE = 1
 DEFAULT_PER_PAGE = 10  # We had used 10 items per page
 MAX_PER_PAGE = 100
 
-class CompanyService(Service):
-    def create(self, db: Session, *, creator_id: str, company_in: CompanyCreate) -> Company:
-        """Create a new company"""
-        # Check if company with same email already exists
-        if company_in.company_email:
-            existing_company = db.query(Company).filter(
-                Company.company_email == company_in.company_email
-            ).first()
-            if existing_company:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Company with this email already exists"
-                )
+# Keyset for each search sort: (sort key expressions, descending). The id
+# tie-breaker makes the order total; each keyset has a matching index on
+# Company. Nullable keys are coalesced so row comparisons never hit NULL;
+# the fallbacks are literals so the SQL matches the expression indexes.
+SEARCH_SORT_KEYS = {
+    "name": ((Company.company_name, Company.id), False),
+    "founded": ((func.coalesce(Company.year_founded, literal_column("0")), Company.id), True),
+    "employees": ((func.coalesce(Company.employee_range, literal_column("0")), Company.id), True),
+    "relevance": ((Company.created_at, Company.id), True),
+}
+LIST_SORT_KEYS = ((Company.created_at, Company.id), True)
 
-        # Convert the company_in to a dictionary
-        company_data = company_in.model_dump()
-        
-        # Create a new dictionary with only the fields we want to save
-        db_company_data = {
-            "creator_id": creator_id,
-            "id": str(uuid7())
-        }
-        
-        # Map fields from company_data to db_company_data
-        field_mapping = {
-            "company_type": "company_type",
-            "company_name": "company_name", 
-            "company_email": "company_email",
-            "company_phone": "company_phone",
-            "company_website": "company_website",
-            "company_size": "company_size",
-            "year_founded": "year_founded",
-            "headquarters": "headquarters",
-            "description": "description",
-            "status": "status",
-            "logo": "logo",
-            "last_funding_date": "last_funding_date",
-            "niche": "niche",
-            "company_password": "company_password",
-            "country": "country"
-        }
-        
-        # Copy mapped fields
-        for source, target in field_mapping.items():
-            if source in company_data and company_data[source] is not None:
-                if source == "company_password":
+
+# How `search_term` is matched: full-text (stemmed words, ranked) or fuzzy
+# (trigram word similarity, tolerates typos and partial names)
+SEARCH_MATCH_MODES = ("fulltext", "fuzzy")
+FUZZY_COLUMNS = (Company.company_name, Company.niche, Company.country)
+
+# Facets returned with search results: name -> grouped expression. Founding
+# years are bucketed by decade (2010 = 2010-2019) with integer division;
+# literals rather than bind parameters keep the SELECT and GROUP BY
+# expressions textually identical.
+FACET_COLUMNS = {
+    "country": Company.country,
+    "company_size": Company.company_size,
+    "niche": Company.niche,
+    "year_founded": Company.year_founded // literal_column("10", Integer) * literal_column("10", Integer),
+}
+FACET_LIMIT = 20
+
+# Fields of a search result row (CompanySearchItem)
+SEARCH_COLUMNS = (
+    Company.id,
+    Company.company_name.label("name"),
+    Company.company_website.label("website"),
+    Company.last_funding_date.label("lastFundingDate"),
+    Company.company_size.label("employees"),
+    Company.acquisitions,
+    Company.company_type.label("type"),
+    Company.country,
+    Company.logo,
+    Company.niche,
+    Company.services,
+    Company.founders,
+)
+
+# Fields of /public/companies/search/export, in column order
+EXPORT_COLUMNS = (
+    Company.id,
+    Company.company_name.label("name"),
+    Company.company_website.label("website"),
+    Company.company_type.label("type"),
+    Company.country,
+    Company.niche,
+    Company.company_size.label("employees"),
+    Company.year_founded,
+    Company.acquisitions,
+    Company.last_funding_date,
+    Company.services,
+    Company.founders,
+)
+# Rows fetched per round trip by the export's server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+facet_cache = TTLCache(ttl=settings.FACET_CACHE_TTL_SECONDS)
+# Whole public search responses, keyed by search_cache_key()
+search_cache = TTLCache(ttl=settings.SEARCH_CACHE_TTL_SECONDS, max_size=settings.SEARCH_CACHE_SIZE)
+
+
+def _touches_public_directory(changed: List[dict], deleted_ids: list) -> bool:
+    """True if a committed write may change what public search returns"""
+    if deleted_ids:
+        return True
+    for row in changed:
+        if "status" not in row:
+            return True
+        if row["status"] in VISIBLE_STATUSES or row.get(PREVIOUS, {}).get("status") in VISIBLE_STATUSES:
+            return True
+    return False
+
+
+def _invalidate_search_caches(changed: List[dict], deleted_ids: list):
+    if _touches_public_directory(changed, deleted_ids):
+        facet_cache.clear()
+        search_cache.clear()
+
+
+on_commit(Company, _invalidate_search_caches)
+
+
+def search_cache_key(*, sort_by: str, page: int, per_page: int, cursor: Optional[str], count_mode: str, facets: bool, **filters) -> tuple:
+    """Canonical key for a public search request: normalized filters plus paging"""
+    return normalize_search_params(**filters) + (sort_by, page, per_page, cursor, count_mode, facets)
+
+
+# JSONB array on Company -> (entry model, extra key copied besides "name")
+ENTRY_SOURCES = {
+    "services": (CompanyServiceEntry, "description"),
+    "founders": (CompanyFounderEntry, "role"),
+}
+
+
+def company_record(company_in: CompanyCreate, *, creator_id: str, hash_password: bool = True) -> dict:
+    """
+    Column values for a new Company row from the create payload. With
+    `hash_password=False` the password is left out, for callers that hash it
+    themselves (see api.v1.services.company_import).
+    """
+    # Convert the company_in to a dictionary
+    company_data = company_in.model_dump()
+
+    # Create a new dictionary with only the fields we want to save
+    db_company_data = {
+        "creator_id": creator_id,
+        "id": str(uuid7())
+    }
+
+    # Map fields from company_data to db_company_data
+    field_mapping = {
+        "company_type": "company_type",
+        "company_name": "company_name", 
+        "company_email": "company_email",
+        "company_phone": "company_phone",
+        "company_website": "company_website",
+        "company_size": "company_size",
+        "year_founded": "year_founded",
+        "headquarters": "headquarters",
+        "description": "description",
+        "status": "status",
+        "logo": "logo",
+        "last_funding_date": "last_funding_date",
+        "niche": "niche",
+        "company_password": "company_password",
+        "country": "country"
+    }
+
+    # Copy mapped fields
+    for source, target in field_mapping.items():
+        if source in company_data and company_data[source] is not None:
+            if source == "company_password":
+                if hash_password:
                     db_company_data[target] = user_service.hash_password(company_data[source])
-                else:
-                    db_company_data[target] = company_data[source]
-
-        # Handle social_media field specifically
-        if 'social_media' in company_data and company_data['social_media']:
-            # Initialize social media fields
-            social_media_linkedIn = None
-            social_media_ig = None
-            social_media_X = None
-            
-            # Map social media objects to their respective fields
-            for item in company_data['social_media']:
-                platform = item.get('platform', '').lower()
-                url = item.get('url', '')
-                
-                if 'linkedin' in platform:
-                    social_media_linkedIn = url
-                elif 'instagram' in platform or 'ig' in platform:
-                    social_media_ig = url
-                elif 'x' in platform or 'twitter' in platform:
-                    social_media_X = url
-            
-            # Add the mapped social media fields
-            if social_media_linkedIn:
-                db_company_data['social_media_linkedIn'] = social_media_linkedIn
-            if social_media_ig:
-                db_company_data['social_media_ig'] = social_media_ig
-            if social_media_X:
-                db_company_data['social_media_X'] = social_media_X
-        
-        # Handle services field - ensure it's an array
-        if 'services' in company_data:
-            db_company_data['services'] = company_data['services']
+            else:
+                db_company_data[target] = company_data[source]
 
-        # Handle founders field - ensure it's a proper array
-        if 'founders' in company_data:
-            db_company_data['founders'] = company_data['founders']
-        
-        # Create the company with the processed data
-        company = Company(**db_company_data)
-        db.add(company)
-        db.commit()
-        db.refresh(company)
+    # Handle social_media field specifically
+    if 'social_media' in company_data and company_data['social_media']:
+        # Initialize social media fields
+        social_media_linkedIn = None
+        social_media_ig = None
+        social_media_X = None
+
+        # Map social media objects to their respective fields
+        for item in company_data['social_media']:
+            platform = item.get('platform', '').lower()
+            url = item.get('url', '')
+
+            if 'linkedin' in platform:
+                social_media_linkedIn = url
+            elif 'instagram' in platform or 'ig' in platform:
+                social_media_ig = url
+            elif 'x' in platform or 'twitter' in platform:
+                social_media_X = url
+
+        # Add the mapped social media fields
+        if social_media_linkedIn:
+            db_company_data['social_media_linkedIn'] = social_media_linkedIn
+        if social_media_ig:
+            db_company_data['social_media_ig'] = social_media_ig
+        if social_media_X:
+            db_company_data['social_media_X'] = social_media_X
+
+    # Handle services field - ensure it's an array
+    if 'services' in company_data:
+        db_company_data['services'] = company_data['services']
+
+    # Handle founders field - ensure it's a proper array
+    if 'founders' in company_data:
+        db_company_data['founders'] = company_data['founders']
+
+    return db_company_data
+
+
+def entry_rows(company_id: str, field: str, items) -> List[dict]:
+    """company_services / company_founders rows for the JSONB array `items` of `field`"""
+    _, extra = ENTRY_SOURCES[field]
+    return [
+        {"company_id": company_id, "position": position, "name": item["name"], extra: item.get(extra)}
+        for position, item in enumerate(items or [])
+        if isinstance(item, dict) and isinstance(item.get("name"), str) and item["name"].strip()
+    ]
+
+
+async def sync_company_entries(db: AsyncSession, company: Company, fields=tuple(ENTRY_SOURCES)):
+    """
+    Rewrite the company_services / company_founders rows of `company` from its
+    JSONB `fields`. Call after changing them, in the same transaction, so the
+    normalized rows never disagree with the arrays once committed. Elements
+    without a non-blank string name are not projected.
+    """
+    for field in fields:
+        model, _ = ENTRY_SOURCES[field]
+        await db.execute(delete(model).where(model.company_id == company.id))
+        rows = entry_rows(company.id, field, getattr(company, field))
+        if rows:
+            await db.execute(insert(model), rows)
+
+
+async def project_company_entries(db: AsyncSession, company_id: str, field: str):
+    """
+    sync_company_entries done by the database: re-project the entry rows of one
+    company from the stored `field` array, which never leaves the server.
+    """
+    model, extra = ENTRY_SOURCES[field]
+    await db.execute(delete(model).where(model.company_id == company_id))
+    await db.execute(
+        text(entry_projection(model.__tablename__, extra, field) + " AND c.id = :company_id"),
+        {"company_id": company_id},
+    )
+
+
+# Single-element edits of Company.services / Company.founders
+ENTRY_OPERATIONS = ("add", "replace", "remove")
+
+
+def list_page_query(query, *, page: int, per_page: int, cursor: Optional[str]):
+    """One fetch_all page of `query`, newest first, plus a look-ahead row for keyset_page"""
+    keys, descending = LIST_SORT_KEYS
+    query = query.order_by(*keyset_order(keys, descending))
+    if cursor:
+        query = query.filter(keyset_after(keys, decode_cursor(cursor), descending))
+    else:
+        query = query.offset((page - 1) * per_page)
+    return query.limit(per_page + 1)
+
+
+def text_search_query(search_term: str):
+    """
+    tsquery for a user's search box input. websearch_to_tsquery accepts any
+    input ("quoted phrases", or, -negation) without raising on bad syntax.
+    """
+    return func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), search_term)
+
+
+def search_criteria(
+    *,
+    ts_query=None,
+    fuzzy_term: Optional[str] = None,
+    country: Optional[str] = None,
+    size: Optional[str] = None,
+    niche: Optional[str] = None,
+    year_founded_min: Optional[int] = None,
+    year_founded_max: Optional[int] = None,
+    service: Optional[str] = None,
+    founder: Optional[str] = None,
+) -> list:
+    """WHERE criteria shared by the search page, its count and its facets"""
+    criteria = [(Company.status == "active") | (Company.status == "completed")]
+    
+    # Text search: one GIN-indexed match against the generated search
+    # document (name, niche, services, description, founders, country)
+    if ts_query is not None:
+        criteria.append(Company.search_document.op("@@")(ts_query))
+    elif fuzzy_term:
+        criteria.append(or_(*[column.op("%>")(fuzzy_term) for column in FUZZY_COLUMNS]))
+    
+    # Apply filters
+    if country:
+        countries = [country.strip() for country in country.split(",")]
+        criteria.append(or_(*[Company.country.ilike(f"%{c}%") for c in countries]))
+    
+    if size:
+        sizes = [size.strip() for size in size.split(",")]
+        criteria.append(or_(*[Company.company_size == s for s in sizes]))
+    
+    if niche:
+        niches = [n.strip() for n in niche.split(",")]
+        criteria.append(or_(*[Company.niche == n for n in niches]))
+    
+    if year_founded_min:
+        criteria.append(Company.year_founded >= year_founded_min)
+    
+    if year_founded_max:
+        criteria.append(Company.year_founded <= year_founded_max)
+    
+    # Service / founder names: case-insensitive exact matches, answered by the
+    # lower(name) indexes on the normalized entry tables
+    for names, model in ((service, CompanyServiceEntry), (founder, CompanyFounderEntry)):
+        if names:
+            criteria.append(exists().where(
+                model.company_id == Company.id,
+                func.lower(model.name).in_(_split_csv(names, lower=True)),
+            ))
+    return criteria
+
+
+def search_order(search_term: Optional[str], match: str, sort_by: str) -> tuple:
+    """
+    How a search is matched and ordered:
+    (ts_query, fuzzy, sort_keys, descending, cursor_sort). With a search term,
+    "relevance" ranks by ts_rank_cd (full-text) or word similarity (fuzzy);
+    cursors carry the rank, so those orders get their own sort names.
+    """
+    sort_keys, descending = SEARCH_SORT_KEYS[sort_by]
+    cursor_sort = sort_by
+    fuzzy = bool(search_term) and match == "fuzzy"
+    ts_query = text_search_query(search_term) if search_term and not fuzzy else None
+    if ts_query is not None and sort_by == "relevance":
+        sort_keys = (func.ts_rank_cd(Company.search_document, ts_query), Company.id)
+        cursor_sort = "relevance:rank"
+    elif fuzzy and sort_by == "relevance":
+        similarity = func.greatest(*[func.word_similarity(search_term, column) for column in FUZZY_COLUMNS])
+        sort_keys = (similarity, Company.id)
+        cursor_sort = "relevance:similarity"
+    return ts_query, fuzzy, sort_keys, descending, cursor_sort
+
+
+def _split_csv(value: Optional[str], lower: bool = False) -> tuple:
+    """Canonical form of a comma list filter: trimmed, de-duplicated, sorted"""
+    if not value:
+        return ()
+    items = {item.strip().lower() if lower else item.strip() for item in value.split(",")}
+    return tuple(sorted(item for item in items if item))
+
+
+def normalize_search_params(
+    *,
+    search_term: Optional[str] = None,
+    country: Optional[str] = None,
+    size: Optional[str] = None,
+    niche: Optional[str] = None,
+    year_founded_min: Optional[int] = None,
+    year_founded_max: Optional[int] = None,
+    service: Optional[str] = None,
+    founder: Optional[str] = None,
+    match: str = "fulltext",
+) -> tuple:
+    """
+    Hashable canonical form of the search filters, so equivalent queries
+    ("Nigeria, Kenya" vs "kenya,nigeria") share count cache entries.
+    Country, service and founder matching is case-insensitive; size and
+    niche are exact matches.
+    """
+    return (
+        (search_term or "").strip().lower(),
+        _split_csv(country, lower=True),
+        _split_csv(size),
+        _split_csv(niche),
+        year_founded_min or None,
+        year_founded_max or None,
+        _split_csv(service, lower=True),
+        _split_csv(founder, lower=True),
+        match,
+    )
+
+class CompanyService(Service):
+    async def create(self, db: AsyncSession, *, creator_id: str, company_in: CompanyCreate) -> Company:
+        """
+        Create a new company in one INSERT ... ON CONFLICT DO NOTHING RETURNING
+        statement. The unique index on company_email settles concurrent
+        registrations of the same email: no row comes back for the loser.
+        """
+        db_company_data = company_record(company_in, creator_id=creator_id)
+        statement = (
+            pg_insert(Company)
+            .values(**db_company_data)
+            .on_conflict_do_nothing(index_elements=[Company.company_email])
+            .returning(Company)
+        )
+        company = (await db.execute(statement)).scalars().first()
+        if company is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Company with this email already exists"
+            )
+        track(db.sync_session, company)
+        await sync_company_entries(db, company)
         return company
 
-    def fetch(self, db: Session, *, company_login: CompanyLogin, user_id: str) -> Optional[Company]:
+    async def fetch(self, db: AsyncSession, *, company_login: CompanyLogin, user_id: str) -> Optional[Company]:
         """Login in"""
-        company = db.query(Company).filter(Company.company_email == company_login.email,
-        Company.creator_id == user_id).first()
+        company = (await db.execute(
+            select(Company).filter(Company.company_email == company_login.email,
+            Company.creator_id == user_id)
+        )).scalars().first()
         if not company:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -137,25 +436,40 @@ class CompanyService(Service):
             )
         return company
 
-    def fetch_all(
+    async def fetch_all(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         *, 
         status: Optional[str] = "active",
         page: int = DEFAULT_PAGE,
-        per_page: int = DEFAULT_PER_PAGE
-    ) -> Tuple[List[dict], int]:
-        """Get paginated and filtered list of companies."""
+        per_page: int = DEFAULT_PER_PAGE,
+        cursor: Optional[str] = None,
+        count_mode: str = "exact",
+        total: Optional[Tuple[int, str]] = None,
+    ) -> Tuple[List[dict], int, Optional[str], str]:
+        """
+        Get paginated and filtered list of companies, newest first.
+        Pass the previous page's `next_cursor` as `cursor` for keyset pagination;
+        `page` is then ignored. `count_mode` is one of api.utils.counts.COUNT_MODES;
+        the mode that produced the total is returned last. A `total` already
+        obtained from `list_version` is reused instead of counting again.
+        """
         # Create the base query
-        base_query = db.query(Company)
+        base_query = select(Company)
         if status:
             base_query = base_query.filter(Company.status == status)
         
         # Get total count before pagination
-        total_count = base_query.count()
+        total_count, total_mode = total or await count_total(
+            db, base_query, count_mode, cache_key=("companies.all", status)
+        )
         
         # Apply pagination to get the results
-        companies = base_query.offset((page - 1) * per_page).limit(per_page).all()
+        companies, next_cursor = keyset_page(
+            (await db.execute(list_page_query(base_query, page=page, per_page=per_page, cursor=cursor))).scalars().all(),
+            per_page,
+            lambda company: (company.created_at, company.id),
+        )
         
         result = []
         for company in companies:
@@ -181,9 +495,32 @@ class CompanyService(Service):
                 "location": company.country,
                 "logo": company.logo,
             })
-        return result, total_count
+        return result, total_count, next_cursor, total_mode
     
-    def update(self, db: Session, *, company: Company, company_in: CompanyUpdate) -> Company:
+    async def list_version(
+        self,
+        db: AsyncSession,
+        *,
+        status: Optional[str] = "active",
+        page: int = DEFAULT_PAGE,
+        per_page: int = DEFAULT_PER_PAGE,
+        cursor: Optional[str] = None,
+        count_mode: str = "exact",
+    ) -> Tuple[Tuple[int, str], list]:
+        """
+        What a fetch_all page depends on, without loading it: the total and
+        (id, updated_at) of the page's rows plus the look-ahead row that
+        decides `next_cursor`. Served from the (created_at, id) indexes.
+        """
+        base_query = select(Company)
+        if status:
+            base_query = base_query.filter(Company.status == status)
+        total = await count_total(db, base_query, count_mode, cache_key=("companies.all", status))
+        version_query = base_query.with_only_columns(Company.id, Company.created_at, Company.updated_at)
+        rows = (await db.execute(list_page_query(version_query, page=page, per_page=per_page, cursor=cursor))).all()
+        return total, [(row.id, row.updated_at) for row in rows]
+
+    async def update(self, db: AsyncSession, *, company: Company, company_in: CompanyUpdate) -> Company:
         try:
             update_data = company_in.model_dump(exclude_unset=True)
             
@@ -200,20 +537,100 @@ class CompanyService(Service):
                 company.founders = update_data['founders'] or []
                 
             db.add(company)
-            db.commit()
-            db.refresh(company)
+            await db.flush()
+            changed_arrays = [field for field in ENTRY_SOURCES if field in update_data]
+            if changed_arrays:
+                await sync_company_entries(db, company, changed_arrays)
             
             return company
         except Exception as e:
-            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Failed to update company: {str(e)}"
             )
 
-    def delete(self, db: Session, *, company_id: str) -> Company:
+    async def edit_entry(
+        self,
+        db: AsyncSession,
+        *,
+        company_id: str,
+        user_id: str,
+        field: str,
+        operation: str,
+        index: Optional[int] = None,
+        item: Optional[dict] = None,
+    ) -> dict:
+        """
+        Add, replace or remove one element of the `field` array ("services" or
+        "founders") in a single UPDATE: `array || [item]` or jsonb_insert to
+        add (at `index` when given), jsonb_set to replace and `array - index`
+        to remove. The stored array is never read into Python for the edit;
+        RETURNING hands back the new array only for a visible company, whose
+        in-memory index entry must follow.
+
+        Returns the element's position and the array's new length.
+        """
+        column = getattr(Company, field)
+        # SQL NULL, and the JSON null stored for a company created without the field, edit as []
+        array = case(
+            (func.jsonb_typeof(column) == "array", column),
+            else_=literal_column("'[]'::jsonb"),
+        )
+        length = func.jsonb_array_length(array)
+        path = literal([str(index)], ARRAY(Text))
+        if operation == "add" and index is None:
+            value, in_range = array.op("||")(literal([item], JSONB)), True
+        elif operation == "add":
+            value, in_range = func.jsonb_insert(array, path, literal(item, JSONB)), length >= index
+        elif operation == "replace":
+            value, in_range = func.jsonb_set(array, path, literal(item, JSONB)), length > index
+        else:
+            # Typed so PostgreSQL picks `jsonb - integer` (position), not `jsonb - text` (key)
+            value, in_range = array.op("-")(cast(index, Integer)), length > index
+
+        statement = (
+            update(Company)
+            .where(Company.id == company_id, Company.creator_id == user_id, in_range)
+            .values({field: value})
+            .returning(
+                Company.status,
+                Company.updated_at,
+                func.jsonb_array_length(array).label("length"),
+                # Only a visible company's array is needed, by the in-memory index
+                case((Company.status.in_(VISIBLE_STATUSES), column)).label("array"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        row = (await db.execute(statement)).first()
+        if row is None:
+            # Nothing updated: say why, without loading the arrays
+            found = (await db.execute(
+                select(Company.creator_id).filter(Company.id == company_id)
+            )).first()
+            if found is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company not found")
+            if str(found.creator_id) != str(user_id):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You don't have permission to update this company"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No {field} entry at position {index}"
+            )
+
+        await project_company_entries(db, company_id, field)
+        changed = {"id": company_id, "status": row.status, "updated_at": row.updated_at}
+        if row.status in VISIBLE_STATUSES:
+            changed[field] = row.array
+        track_row(db.sync_session, Company, changed)
+        if operation == "add" and index is None:
+            index = row.length - 1
+        return {"index": None if operation == "remove" else index, "length": row.length}
+
+    async def delete(self, db: AsyncSession, *, company_id: str) -> Company:
         """Soft delete a company by setting status to inactive"""
-        company = self.get_company(db, company_id)
+        company = await self.get_company(db, company_id=company_id)
         if not company:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -221,28 +638,27 @@ class CompanyService(Service):
             )
         company.status = "inactive"
         db.add(company)
-        db.commit()
+        await db.flush()
         return company
 
-    def get_companies_by_creator(
+    async def get_companies_by_creator(
         self,
-        db: Session,
+        db: AsyncSession,
         creator_id: str,
         skip: int = 0,
         limit: int = 100
     ) -> List[Company]:
         """Get all companies created by a specific user"""
-        return (
-            db.query(Company)
+        return (await db.execute(
+            select(Company)
             .filter(Company.creator_id == creator_id)
             .offset(skip)
             .limit(limit)
-            .all()
-        )
+        )).scalars().all()
 
-    def search_companies(
+    async def search_companies(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         search_term: Optional[str] = None,
         country: Optional[str] = None,
@@ -250,118 +666,325 @@ class CompanyService(Service):
         niche: Optional[str] = None,
         year_founded_min: Optional[int] = None,
         year_founded_max: Optional[int] = None,
+        service: Optional[str] = None,
+        founder: Optional[str] = None,
         sort_by: str = "relevance",
         page: int = DEFAULT_PAGE,
-        per_page: int = DEFAULT_PER_PAGE
-    ) -> Tuple[List[Company], int]:
-        """Search companies with pagination and filters with safe JSON array handling"""
+        per_page: int = DEFAULT_PER_PAGE,
+        cursor: Optional[str] = None,
+        count_mode: str = "exact",
+        match: str = "fulltext"
+    ) -> Tuple[List[Company], int, Optional[str], str]:
+        """
+        Search companies with pagination and filters with safe JSON array handling.
+        Pass the previous page's `next_cursor` as `cursor` for keyset pagination
+        (`page` is then ignored); a cursor is only valid for the sort that issued it.
+        `count_mode` picks how the total is computed (see api.utils.counts); the
+        mode that produced it is returned last.
+
+        With count_mode="window" the page and `COUNT(*) OVER()` come back in one
+        statement, so the filters are evaluated once instead of twice. Cursor
+        pages can't use it (the window would only count rows after the cursor),
+        so they reuse the total the first page cached.
+
+        `service` and `founder` are comma lists of names, matched through the
+        normalized company_services / company_founders tables.
+
+        `match` is one of SEARCH_MATCH_MODES. "fuzzy" matches names, niches and
+        countries by trigram word similarity (pg_trgm `%>`, GIN-indexed) and
+        ranks relevance by the best similarity.
+
+        Full-text searches are answered from the in-process index (see
+        api.v1.services.company_index) while it is fresh and can evaluate the
+        term's tsquery exactly, and searches without a term from the columnar
+        snapshot (api.v1.services.company_columns); totals are then exact.
+        """
+        if sort_by not in SEARCH_SORT_KEYS:
+            sort_by = "relevance"
         
-        # Base query
-        query = db.query(
-            Company.id,
-            Company.company_name.label("name"),
-            Company.company_website.label("website"),
-            Company.last_funding_date.label("lastFundingDate"),
-            Company.company_size.label("employees"),
-            Company.acquisitions,
-            Company.company_type.label("type"),
-            Company.country,
-            Company.logo,
-            Company.niche,
-            Company.services,
-            Company.founders
-        ).filter((Company.status == "active") | (Company.status == "completed"))
+        if match not in SEARCH_MATCH_MODES:
+            match = "fulltext"
+        params = normalize_search_params(
+            search_term=search_term,
+            country=country,
+            size=size,
+            niche=niche,
+            year_founded_min=year_founded_min,
+            year_founded_max=year_founded_max,
+            service=service,
+            founder=founder,
+            match=match,
+        )
         
-        # Text search
-        if search_term:
-            name_filter = Company.company_name.ilike(f"%{search_term}%")
-            desc_filter = Company.description.ilike(f"%{search_term}%")
-            country_filter = Company.country.ilike(f"%{search_term}%")
-            niche_filter = Company.niche.ilike(f"%{search_term}%")
-            
-            # Safe array access using EXISTS with array_elements and type checking
-            services_filter = text("""
-                jsonb_typeof(services) = 'array' AND
-                EXISTS (
-                    SELECT 1 FROM jsonb_array_elements(services) AS service
-                    WHERE 
-                        service->>'name' ILIKE :search_term OR
-                        service->>'description' ILIKE :search_term
-                )
-            """).bindparams(search_term=f"%{search_term}%")
-            
-            founders_filter = text("""
-                jsonb_typeof(founders) = 'array' AND
-                EXISTS (
-                    SELECT 1 FROM jsonb_array_elements(founders) AS founder
-                    WHERE 
-                        founder->>'name' ILIKE :search_term OR
-                        founder->>'role' ILIKE :search_term OR
-                        founder->>'bio' ILIKE :search_term
+        term, countries, sizes, niches, founded_min, founded_max, services, founders, _ = params
+        
+        # Filter-only browsing: masks over the columnar snapshot pick the
+        # page, then only that page's rows are read. Name order follows the
+        # database collation, so it stays with SQL
+        if not term and not services and not founders and sort_by != "name" and company_columns.is_fresh():
+            try:
+                ids, total_count, next_cursor = company_columns.search(
+                    countries=countries,
+                    sizes=sizes,
+                    niches=niches,
+                    year_founded_min=founded_min,
+                    year_founded_max=founded_max,
+                    sort_by=sort_by,
+                    page=page,
+                    per_page=per_page,
+                    cursor=cursor,
                 )
-            """).bindparams(search_term=f"%{search_term}%")
-            
-            query = query.filter(or_(
-                name_filter,
-                desc_filter,
-                country_filter,
-                niche_filter,
-                services_filter,
-                founders_filter
-            ))
+            except HTTPException:
+                # A cursor from another sort order; SQL reports it
+                pass
+            else:
+                rows = (await db.execute(select(*SEARCH_COLUMNS).filter(Company.id.in_(ids)))).all() if ids else []
+                by_id = {row.id: row for row in rows}
+                return [by_id[id] for id in ids if id in by_id], total_count, next_cursor, "exact"
         
-        # Apply filters
-        if country:
-            countries = [country.strip() for country in country.split(",")]
-            country_filters = [Company.country.ilike(f"%{c}%") for c in countries]
-            query = query.filter(or_(*country_filters))
+        # The in-process index has no service/founder entries, and leaves
+        # queries it can't evaluate exactly to SQL
+        if match == "fulltext" and not services and not founders and company_index.is_fresh():
+            text_query = await company_index.text_query(db, term) if term else None
+            if not term or text_query is not None:
+                try:
+                    rows, total_count, next_cursor = company_index.search(
+                        query=text_query,
+                        countries=countries,
+                        sizes=sizes,
+                        niches=niches,
+                        year_founded_min=founded_min,
+                        year_founded_max=founded_max,
+                        sort_by=sort_by,
+                        page=page,
+                        per_page=per_page,
+                        cursor=cursor,
+                    )
+                    return rows, total_count, next_cursor, "exact"
+                except HTTPException:
+                    # A cursor issued by the SQL path; let SQL continue the paging
+                    pass
+        ts_query, fuzzy, sort_keys, descending, cursor_sort = search_order(search_term, match, sort_by)
         
-        if size:
-            sizes = [size.strip() for size in size.split(",")]
-            size_filters = [Company.company_size == s for s in sizes]
-            query = query.filter(or_(*size_filters))
+        # Base query
+        query = select(
+            *SEARCH_COLUMNS,
+            sort_keys[0].label("sort_key")
+        ).filter(*search_criteria(
+            ts_query=ts_query,
+            fuzzy_term=search_term if fuzzy else None,
+            country=country,
+            size=size,
+            niche=niche,
+            year_founded_min=year_founded_min,
+            year_founded_max=year_founded_max,
+            service=service,
+            founder=founder,
+        ))
         
-        if niche:
-            niches = [n.strip() for n in niche.split(",")]
-            niche_filters = [Company.niche == n for n in niches]
-            query = query.filter(or_(*niche_filters))
+        cache_key = ("companies.search",) + params
+        use_window = count_mode == "window" and not cursor
+        if count_mode == "window" and cursor:
+            count_mode = "cached"
         
-        if year_founded_min:
-            query = query.filter(Company.year_founded >= year_founded_min)
+        # Get total count before pagination
+        if not use_window:
+            total_count, total_mode = await count_total(db, query, count_mode, cache_key=cache_key)
         
-        if year_founded_max:
-            query = query.filter(Company.year_founded <= year_founded_max)
+        # Apply sorting and pagination
+        page_query = query.order_by(*keyset_order(sort_keys, descending))
+        if use_window:
+            page_query = page_query.add_columns(func.count().over().label("total_count"))
+        if cursor:
+            page_query = page_query.filter(keyset_after(sort_keys, decode_cursor(cursor, cursor_sort), descending))
+        else:
+            page_query = page_query.offset((page - 1) * per_page)
+        rows = (await db.execute(page_query.limit(per_page + 1))).all()
+        companies, next_cursor = keyset_page(rows, per_page, lambda row: (row.sort_key, row.id), cursor_sort)
         
-        # Apply sorting
-        if sort_by == "name":
-            query = query.order_by(Company.company_name)
-        elif sort_by == "founded":
-            query = query.order_by(Company.year_founded.desc())
-        elif sort_by == "employees":
-            query = query.order_by(Company.company_size.desc())
-        else:  # relevance
-            query = query.order_by(Company.created_at.desc())
+        if use_window:
+            if rows:
+                total_count, total_mode = rows[0].total_count, "exact"
+                count_cache.set(cache_key, total_count)
+            elif page == 1:
+                total_count, total_mode = 0, "exact"
+            else:
+                # Past the last page there is no row to carry the window total
+                total_count, total_mode = await count_total(db, query, "cached", cache_key=cache_key)
         
-        # Get total count before pagination - Using a safer approach to count
-        try:
-            subquery = query.subquery()
-            total_count = db.query(func.count()).select_from(subquery).scalar()
-        except Exception as e:
-            logger.error(f"Error counting results: {str(e)}")
-            total_count = 0
+        return companies, total_count, next_cursor, total_mode
+    
+    def export_query(
+        self,
+        *,
+        search_term: Optional[str] = None,
+        country: Optional[str] = None,
+        size: Optional[str] = None,
+        niche: Optional[str] = None,
+        year_founded_min: Optional[int] = None,
+        year_founded_max: Optional[int] = None,
+        service: Optional[str] = None,
+        founder: Optional[str] = None,
+        sort_by: str = "relevance",
+        match: str = "fulltext"
+    ):
+        """Every company matching a search, in search order, with the EXPORT_COLUMNS"""
+        if sort_by not in SEARCH_SORT_KEYS:
+            sort_by = "relevance"
+        if match not in SEARCH_MATCH_MODES:
+            match = "fulltext"
+        ts_query, fuzzy, sort_keys, descending, _ = search_order(search_term, match, sort_by)
+        return select(*EXPORT_COLUMNS).filter(*search_criteria(
+            ts_query=ts_query,
+            fuzzy_term=search_term if fuzzy else None,
+            country=country,
+            size=size,
+            niche=niche,
+            year_founded_min=year_founded_min,
+            year_founded_max=year_founded_max,
+            service=service,
+            founder=founder,
+        )).order_by(*keyset_order(sort_keys, descending))
+    
+    async def stream_export(self, query, batch_size: int = EXPORT_BATCH_SIZE):
+        """
+        Yield the rows of `query` in batches of `batch_size` from a server-side
+        cursor, so memory stays flat for any result size. Opens its own replica
+        session: a streamed response outlives the request's dependencies.
+        """
+        async with AsyncReadSessionLocal() as db:
+            result = await db.stream(query.execution_options(yield_per=batch_size))
+            async for rows in result.partitions():
+                yield rows
+    
+    async def search_facets(
+        self,
+        db: AsyncSession,
+        *,
+        search_term: Optional[str] = None,
+        country: Optional[str] = None,
+        size: Optional[str] = None,
+        niche: Optional[str] = None,
+        year_founded_min: Optional[int] = None,
+        year_founded_max: Optional[int] = None,
+        service: Optional[str] = None,
+        founder: Optional[str] = None,
+        match: str = "fulltext"
+    ) -> Dict[str, List[dict]]:
+        """
+        Counts per country, company size, niche and founding decade for the
+        companies matching the search filters: one GROUPING SETS query for all
+        four facets, cached per normalized filter set until a company changes.
+        Each facet lists up to FACET_LIMIT values, most frequent first
+        (decades newest first); empty values are left out.
+        """
+        if match not in SEARCH_MATCH_MODES:
+            match = "fulltext"
+        cache_key = normalize_search_params(
+            search_term=search_term,
+            country=country,
+            size=size,
+            niche=niche,
+            year_founded_min=year_founded_min,
+            year_founded_max=year_founded_max,
+            service=service,
+            founder=founder,
+            match=match,
+        )
+        cached = facet_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        # Apply pagination
-        try:
-            companies = query.offset((page - 1) * per_page).limit(per_page).all()
-        except Exception as e:
-            logger.error(f"Error fetching companies: {str(e)}")
-            companies = []
+        fuzzy = bool(search_term) and match == "fuzzy"
+        columns = list(FACET_COLUMNS.values())
+        query = select(
+            *columns,
+            *[func.grouping(column) for column in columns],
+            func.count().label("count"),
+        ).filter(*search_criteria(
+            ts_query=text_search_query(search_term) if search_term and not fuzzy else None,
+            fuzzy_term=search_term if fuzzy else None,
+            country=country,
+            size=size,
+            niche=niche,
+            year_founded_min=year_founded_min,
+            year_founded_max=year_founded_max,
+            service=service,
+            founder=founder,
+        )).group_by(func.grouping_sets(*columns))
+        
+        facets = {name: [] for name in FACET_COLUMNS}
+        names = list(FACET_COLUMNS)
+        width = len(names)
+        for row in (await db.execute(query)).all():
+            # grouping(column) is 0 only for the column this row groups by
+            index = list(row[width:2 * width]).index(0)
+            value = row[index]
+            if value is None or value == "":
+                continue
+            if names[index] == "year_founded":
+                value = int(value)
+            facets[names[index]].append({"value": value, "count": row.count})
         
-        return companies, total_count
+        for name, values in facets.items():
+            if name == "year_founded":
+                values.sort(key=lambda item: item["value"], reverse=True)
+            else:
+                values.sort(key=lambda item: (-item["count"], str(item["value"])))
+            del values[FACET_LIMIT:]
+        facet_cache.set(cache_key, facets)
+        return facets
+    
+    async def suggest_spelling(self, db: AsyncSession, search_term: str) -> Optional[str]:
+        """
+        "Did you mean": the company name or niche nearest to `search_term` by
+        trigram word similarity, or None if nothing is similar enough. Uses
+        the trigram indexes through the `%>` filter.
+        """
+        term = (search_term or "").strip()
+        if not term:
+            return None
+        visible = (Company.status == "active") | (Company.status == "completed")
+        candidates = [
+            select(
+                column.label("suggestion"),
+                func.word_similarity(term, column).label("score"),
+            ).filter(visible, column.op("%>")(term))
+            for column in (Company.company_name, Company.niche)
+        ]
+        nearest = union_all(*candidates).subquery()
+        suggestion = (await db.execute(
+            select(nearest.c.suggestion).order_by(nearest.c.score.desc()).limit(1)
+        )).scalar()
+        if suggestion is None or suggestion.strip().lower() == term.lower():
+            return None
+        return suggestion
     
-    def get_company(self, db: Session, *, company_id: str) -> Company:
+    async def suggest_names(self, db: AsyncSession, query: str, limit: int = 8) -> List[dict]:
+        """
+        Autocomplete without the in-memory suggester (COMPANY_SUGGEST_ENABLED
+        off): visible companies with a name word starting with `query`, most
+        acquisitions first. The ILIKE patterns use the name trigram index.
+        """
+        query = " ".join(query.split())
+        if not query:
+            return []
+        visible = (Company.status == "active") | (Company.status == "completed")
+        rows = (await db.execute(
+            select(Company.id, Company.company_name.label("name"))
+            .filter(
+                visible,
+                Company.company_name.istartswith(query, autoescape=True)
+                | Company.company_name.icontains(" " + query, autoescape=True),
+            )
+            .order_by(Company.acquisitions.desc().nulls_last(), Company.company_name, Company.id)
+            .limit(limit)
+        )).all()
+        return [{"id": row.id, "name": row.name} for row in rows]
+    
+    async def get_company(self, db: AsyncSession, *, company_id: str) -> Company:
         """Get a company by ID."""
-        company = db.query(Company).filter(Company.id == company_id).first()
+        company = await db.get(Company, company_id)
         if not company:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -369,13 +992,13 @@ class CompanyService(Service):
             )
         return company
     
-    def update_status(
+    async def update_status(
         self,
-        db: Session,
+        db: AsyncSession,
         company: Company,
         status: str,
         current_user_id: str,
-        access_token: str = Depends(oauth2_scheme),
+        is_superadmin: bool = False,
     ):
         """
         Update company status
@@ -385,6 +1008,7 @@ class CompanyService(Service):
             company: Company object
             status: New status to set (active/inactive)
             current_user_id: ID of the user making the request
+            is_superadmin: Whether the user making the request is a super admin
             
         Raises:
             HTTPException: If the status is invalid
@@ -399,59 +1023,54 @@ class CompanyService(Service):
             )
         
         # Check if user is authorized (creator or admin)
-        if company.creator_id != current_user_id:
-            # You'll need to check if the user is an admin here
-            # This implementation assumes you have a user_service.is_admin method
-            is_admin = user_service.get_current_super_admin(access_token=access_token, db=db)
-            if not is_admin:
-                raise HTTPException(
-                    status_code=403,
-                    detail="Not authorized to update this company's status"
-                )
+        if company.creator_id != current_user_id and not is_superadmin:
+            raise HTTPException(
+                status_code=403,
+                detail="Not authorized to update this company's status"
+            )
         
         # Update status
         company.status = status
-        db.commit()
-        db.refresh(company)
+        await db.flush()
         return company
 
-company_service = CompanyService()
-
-def change_password(
-    self,
-    db: Session,
-    company: Company,
-    current_password: str,
-    new_password: str
-):
-    """
-    Change company password
+    async def change_password(
+        self,
+        db: AsyncSession,
+        company: Company,
+        current_password: str,
+        new_password: str
+    ):
+        """
+        Change company password
     
-    Args:
-        db: Database session
-        company: Company object
-        current_password: Current password
-        new_password: New password to set
+        Args:
+            db: Database session
+            company: Company object
+            current_password: Current password
+            new_password: New password to set
         
-    Raises:
-        HTTPException: If the current password is incorrect
-        HTTPException: If the new password is the same as the current password
-    """
-    # Verify current password matches
-    if company.company_password != current_password:
-        raise HTTPException(
-            status_code=400, 
-            detail="Incorrect current password"
-        )
+        Raises:
+            HTTPException: If the current password is incorrect
+            HTTPException: If the new password is the same as the current password
+        """
+        # Verify current password matches
+        if company.company_password != current_password:
+            raise HTTPException(
+                status_code=400, 
+                detail="Incorrect current password"
+            )
     
-    # Check if new password is different from current
-    if current_password == new_password:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="Current Password and New Password cannot be the same"
-        )
+        # Check if new password is different from current
+        if current_password == new_password:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Current Password and New Password cannot be the same"
+            )
     
-    # Update password
-    company.company_password = new_password
-    db.commit()
-    db.refresh(company)
\ No newline at end of file
+        # Update password
+        company.company_password = new_password
+        await db.flush()
+
+
+company_service = CompanyService()
@@ -0,0 +1,265 @@
+"""
+Write-through cache of company detail projections (the CompanyData fields of
+GET /company/{company_id}), keyed by company id.
+
+Two layers: a per-worker TTL + LRU cache, and optionally a shared backend
+speaking the Redis protocol (COMPANY_CACHE_REDIS_URL: Redis, Valkey, or a
+local stand-in) so one worker's load or write serves the others. Committed
+writes reach the cache through on_commit: a full snapshot replaces the entry
+(write-through), anything partial or deleted drops it. Shared-layer errors
+are logged and treated as misses; the database stays the source of truth.
+
+Shared entries carry their row's `updated_at` as a version and only move
+forward: a set is a compare-and-set (WATCH / MULTI) that gives way to a newer
+stored version, so a worker that read a lagging replica can't overwrite a
+later write. A partial snapshot leaves a fence at its new version, which only
+a row at least that new replaces, and a delete leaves a tombstone. How stale
+a read can be:
+
+- this worker: never older than its own commits;
+- another worker's local copy: up to COMPANY_CACHE_TTL_SECONDS, since only
+  the writing worker's on_commit sees a write;
+- the shared layer: current, unless the update after a commit failed (backend
+  unreachable); then up to COMPANY_CACHE_SHARED_TTL_SECONDS.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.db.changes import on_commit
+from api.utils.background import spawn
+from api.utils.settings import settings
+from api.utils.ttl_cache import TTLCache
+from api.v1.models.company import Company
+
+logger = logging.getLogger(__name__)
+
+# Bump when company_detail() or the entry layout changes, so old entries are ignored.
+# Each key is a hash: "version" (updated_at in epoch microseconds) and "detail" (JSON).
+SHARED_KEY_PREFIX = "company:detail:v2:"
+# Version of a deleted company: no row is newer
+DELETED_VERSION = 2 ** 63 - 1
+# Compare-and-set attempts when other workers keep writing the same key
+CAS_ATTEMPTS = 3
+
+# Columns company_detail() reads
+DETAIL_COLUMNS = (
+    Company.id, Company.company_type, Company.company_name, Company.company_email,
+    Company.company_phone, Company.country, Company.company_website, Company.company_size,
+    Company.year_founded, Company.headquarters, Company.description, Company.founders,
+    Company.services, Company.logo, Company.social_media_linkedIn, Company.social_media_ig,
+    Company.social_media_X, Company.status, Company.last_funding_date, Company.niche,
+    Company.creator_id, Company.created_at, Company.updated_at,
+)
+DETAIL_KEYS = frozenset(column.key for column in DETAIL_COLUMNS)
+
+
+def company_detail(row: Mapping[str, Any]) -> dict:
+    """JSON-ready CompanyData fields from Company column values"""
+    return jsonable_encoder({
+        "id": str(row["id"]),
+        "name": row["company_name"],
+        "company_type": row["company_type"],
+        "email": row["company_email"],
+        "phone": row["company_phone"],
+        "website": row["company_website"],
+        "company_size": row["company_size"],
+        "year_founded": row["year_founded"],
+        "headquarters": row["headquarters"],
+        "description": row["description"],
+        "founders": row["founders"],
+        "services": row["services"],
+        "logo": row["logo"],
+        "country": row["country"],
+        "last_funding_date": row["last_funding_date"],
+        "niche": row["niche"],
+        "status": row["status"] or "active",
+        "social_media_linkedIn": row["social_media_linkedIn"],
+        "social_media_ig": row["social_media_ig"],
+        "social_media_X": row["social_media_X"],
+        "creator_id": str(row["creator_id"]),
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"] or row["created_at"],
+    })
+
+
+def detail_version(detail: dict) -> datetime:
+    """When the cached company last changed (its ETag / Last-Modified source)"""
+    return datetime.fromisoformat(detail["updated_at"])
+
+
+def shared_version(updated_at: datetime) -> int:
+    """Ordered shared-layer version of an `updated_at` value"""
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return int(updated_at.timestamp() * 1_000_000)
+
+
+class SharedCompanyCache:
+    """The Redis-protocol layer; every call degrades to a miss / no-op on error"""
+
+    def __init__(self, url: str, ttl: int):
+        # Imported here: the dependency is only needed with a shared backend
+        from redis.asyncio import Redis
+
+        self.client = Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.ttl = ttl
+        self.errors = 0
+
+    async def get(self, company_id: str) -> Optional[dict]:
+        try:
+            value = await self.client.hget(SHARED_KEY_PREFIX + company_id, "detail")
+        except Exception as e:
+            self._failed("get", e)
+            return None
+        return json.loads(value) if value is not None else None
+
+    async def set(self, company_id: str, version: int, detail: Optional[dict] = None) -> bool:
+        """
+        Store `detail` at `version` - or, without a detail, only a fence that
+        turns away older versions - unless a newer version is stored. False
+        if it gave way (or failed).
+        """
+        from redis.exceptions import WatchError
+
+        key = SHARED_KEY_PREFIX + company_id
+        entry = {"version": version}
+        if detail is not None:
+            entry["detail"] = json.dumps(detail)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                for _ in range(CAS_ATTEMPTS):
+                    try:
+                        await pipe.watch(key)
+                        current = await pipe.hget(key, "version")
+                        if current is not None and int(current) > version:
+                            return False
+                        pipe.multi()
+                        pipe.delete(key)
+                        pipe.hset(key, mapping=entry)
+                        pipe.expire(key, self.ttl)
+                        await pipe.execute()
+                        return True
+                    except WatchError:
+                        continue  # written meanwhile: compare again
+        except Exception as e:
+            self._failed("set", e)
+        return False
+
+    async def delete(self, company_ids: List[str]):
+        try:
+            await self.client.delete(*(SHARED_KEY_PREFIX + company_id for company_id in company_ids))
+        except Exception as e:
+            self._failed("delete", e)
+
+    def _failed(self, operation: str, error: Exception):
+        self.errors += 1
+        logger.warning(f"Shared company cache {operation} failed: {str(error)}")
+
+
+class CompanyCache:
+    """Company detail projections by id, in front of the database"""
+
+    def __init__(self):
+        self.local = TTLCache(ttl=settings.COMPANY_CACHE_TTL_SECONDS, max_size=settings.COMPANY_CACHE_SIZE)
+        self.shared: Optional[SharedCompanyCache] = None
+        if settings.COMPANY_CACHE_REDIS_URL:
+            self.shared = SharedCompanyCache(settings.COMPANY_CACHE_REDIS_URL, settings.COMPANY_CACHE_SHARED_TTL_SECONDS)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loads = 0
+
+    async def get(self, company_id: str) -> Optional[dict]:
+        self._loop = asyncio.get_running_loop()
+        detail = self.local.get(company_id)
+        if detail is None and self.shared is not None:
+            generation = self.local.generation
+            detail = await self.shared.get(company_id)
+            if detail is not None:
+                self.local.set(company_id, detail, generation=generation)
+        return detail
+
+    async def load(self, db: AsyncSession, company_id: str) -> dict:
+        """The detail of `company_id`, from the cache or one SELECT of DETAIL_COLUMNS"""
+        detail = await self.get(company_id)
+        if detail is not None:
+            return detail
+        generation = self.local.generation
+        row = (await db.execute(select(*DETAIL_COLUMNS).filter(Company.id == company_id))).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Company not found"
+            )
+        self.loads += 1
+        detail = company_detail(row._mapping)
+        # A write committed while we read bumped the generation: don't cache the old row
+        if generation == self.local.generation:
+            self.local.set(company_id, detail, generation=generation)
+            if self.shared is not None:
+                # Gives way to anything newer, e.g. when `db` is a lagging replica
+                await self.shared.set(company_id, shared_version(detail_version(detail)), detail)
+        return detail
+
+    def apply(self, changed: List[dict], deleted_ids: List[Any]):
+        """on_commit listener: write complete snapshots through, drop everything else"""
+        # id -> version to fence the shared entry at (None: unknown, just delete it)
+        stale: Dict[str, Optional[int]] = {str(company_id): DELETED_VERSION for company_id in deleted_ids}
+        fresh: Dict[str, dict] = {}
+        for row in changed:
+            if "id" not in row:
+                continue
+            if DETAIL_KEYS <= row.keys():
+                fresh[str(row["id"])] = company_detail(row)
+            elif row.get("updated_at") is not None:
+                stale[str(row["id"])] = shared_version(row["updated_at"])
+            else:
+                stale[str(row["id"])] = None
+        if not stale and not fresh:
+            return
+        self.local.discard(*stale, *fresh)
+        generation = self.local.generation
+        for company_id, detail in fresh.items():
+            self.local.set(company_id, detail, generation=generation)
+        if self.shared is not None:
+            self._spawn(self._write_shared(stale, fresh))
+
+    async def _write_shared(self, stale: Dict[str, Optional[int]], fresh: Dict[str, dict]):
+        unversioned = [company_id for company_id, version in stale.items() if version is None]
+        if unversioned:
+            await self.shared.delete(unversioned)
+        for company_id, version in stale.items():
+            if version is not None:
+                await self.shared.set(company_id, version)
+        for company_id, detail in fresh.items():
+            await self.shared.set(company_id, shared_version(detail_version(detail)), detail)
+
+    def _spawn(self, coroutine):
+        """Run a shared-layer update from the event loop or from a threadpool route"""
+        try:
+            spawn(coroutine)
+            return
+        except RuntimeError:
+            pass
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(spawn, coroutine)
+        else:
+            coroutine.close()
+
+    def stats(self) -> dict:
+        return {
+            **self.local.stats(),
+            "loads": self.loads,
+            "shared": self.shared is not None,
+            "shared_errors": self.shared.errors if self.shared is not None else 0,
+        }
+
+
+company_cache = CompanyCache()
+on_commit(Company, company_cache.apply)
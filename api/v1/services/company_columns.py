@@ -0,0 +1,421 @@
+"""
+Columnar snapshot of the public company directory for filter-only browsing.
+
+Most directory requests have no search term, only country / size / niche /
+founding year filters. Each worker can hold the visible (active/completed)
+companies as NumPy arrays - country, niche and size dictionary-encoded as
+int32 codes, founding year, employee range and created_at as int64 - so a
+filter is a handful of vectorized boolean masks and a sort is a precomputed
+permutation. Only the ids of the requested page go to the database.
+
+The snapshot is loaded at startup (COMPANY_COLUMNS_ENABLED) and then follows
+the `updated_at` watermark: every COMPANY_COLUMNS_REFRESH_SECONDS rows updated
+since the watermark are re-read and upserted or dropped. The watermark query
+overlaps the previous one by WATERMARK_OVERLAP, because `updated_at` is set
+when a transaction writes, not when it commits; rows older than the version
+already held are ignored. Hard deletes from other workers aren't visible to
+the watermark, so the snapshot is rebuilt from scratch every
+COMPANY_COLUMNS_MAX_AGE_SECONDS, and searches use SQL until that rebuild is in.
+
+This worker's own committed writes are applied before the snapshot answers
+again: deletes at once, other changes by re-reading those companies from the
+primary (a replica may not have them yet). Until then searches use SQL, so a
+user never browses past a change they just made.
+
+Sort orders and cursors match api.v1.services.company.SEARCH_SORT_KEYS, so a
+page served here can be continued by SQL and vice versa. "name" sorts are
+left to SQL: names order by the database collation, which code point
+comparison here can't reproduce.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from api.db.changes import on_commit
+from api.utils.background import spawn
+from api.utils.pagination import decode_cursor, encode_cursor
+from api.utils.settings import settings
+from api.v1.models.company import Company
+from api.v1.services.company_index import VISIBLE_STATUSES
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_COLUMNS = (
+    Company.id, Company.country, Company.niche, Company.company_size,
+    Company.year_founded, Company.employee_range, Company.created_at, Company.updated_at,
+    Company.status,
+)
+WATERMARK_OVERLAP = timedelta(seconds=60)
+# Stored version of deleted companies: no replica row can bring them back
+_DELETED = datetime.max.replace(tzinfo=timezone.utc)
+INITIAL_CAPACITY = 1024
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# (array attribute, dtype, fill value for empty slots)
+_ARRAYS = (
+    ("live", np.bool_, False),
+    ("country", np.int32, -1),
+    ("niche", np.int32, -1),
+    ("size", np.int32, -1),
+    ("year", np.int64, 0),
+    ("year_known", np.bool_, False),
+    ("employees", np.int64, 0),
+    ("created", np.int64, 0),
+)
+
+SORTS = ("relevance", "founded", "employees")
+
+
+def _microseconds(value: Optional[datetime]) -> int:
+    if value is None:
+        return 0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _datetime(microseconds: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(microseconds))
+
+
+class Dictionary:
+    """Dictionary encoding of a string column: value <-> int code; NULL is -1"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def codes_where(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        return np.array([code for code, value in enumerate(self.values) if predicate(value)], dtype=np.int32)
+
+
+class CompanyColumns:
+    """NumPy column store over visible companies, owned by one worker"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.built_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+        self.watermark: Optional[datetime] = None
+        # Companies this worker wrote that the snapshot hasn't re-read yet
+        self._pending: set = set()
+        self._busy = False
+        self.hits = 0
+        self.fallbacks = 0
+
+    # ----------------------------- storage -----------------------------
+    def _reset(self):
+        self.count = 0  # slots used, live or not
+        self.dead = 0
+        self.ids: List[str] = []
+        self._slot_of: Dict[str, int] = {}
+        self._updated_at: Dict[str, Any] = {}
+        for name, dtype, fill in _ARRAYS:
+            setattr(self, name, np.full(INITIAL_CAPACITY, fill, dtype=dtype))
+        self.countries, self.niches, self.sizes = Dictionary(), Dictionary(), Dictionary()
+        self._invalidate_orders()
+
+    def _invalidate_orders(self):
+        self._orders: Dict[str, np.ndarray] = {}
+        self._sorted_ids: Optional[np.ndarray] = None
+        self._id_rank: Optional[np.ndarray] = None
+
+    def _slot(self, company_id: str) -> int:
+        slot = self._slot_of.get(company_id)
+        if slot is not None:
+            return slot
+        slot = self.count
+        if slot == len(self.live):
+            for name, dtype, fill in _ARRAYS:
+                grown = np.full(2 * slot, fill, dtype=dtype)
+                grown[:slot] = getattr(self, name)
+                setattr(self, name, grown)
+        self.count += 1
+        self.ids.append(company_id)
+        self._slot_of[company_id] = slot
+        return slot
+
+    def _upsert(self, row: dict) -> bool:
+        """Store one row; False if it was already stored at this version or a later one"""
+        stored = self._updated_at.get(row["id"])
+        updated_at = row.get("updated_at")
+        if stored is not None and updated_at is not None and updated_at < stored:
+            return False
+        if row["status"] not in VISIBLE_STATUSES:
+            self._updated_at[row["id"]] = updated_at
+            return self._remove(row["id"])
+        slot = self._slot_of.get(row["id"])
+        if slot is not None and self.live[slot] and stored == updated_at:
+            return False
+        self._updated_at[row["id"]] = updated_at
+        revived = row["id"] in self._slot_of
+        slot = self._slot(row["id"])
+        if revived and not self.live[slot]:
+            self.dead -= 1
+        self.live[slot] = True
+        self.country[slot] = self.countries.encode(row["country"])
+        self.niche[slot] = self.niches.encode(row["niche"])
+        self.size[slot] = self.sizes.encode(row["company_size"])
+        self.year_known[slot] = row["year_founded"] is not None
+        self.year[slot] = row["year_founded"] or 0
+        self.employees[slot] = row["employee_range"] or 0
+        self.created[slot] = _microseconds(row["created_at"])
+        return True
+
+    def _remove(self, company_id: str) -> bool:
+        slot = self._slot_of.get(company_id)
+        if slot is None or not self.live[slot]:
+            return False
+        self.live[slot] = False
+        self.dead += 1
+        return True
+
+    def _apply_rows(self, rows: Iterable[dict]):
+        changed = False
+        for row in rows:
+            changed = self._upsert(row) or changed
+            updated_at = row.get("updated_at")
+            if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+        if changed:
+            self._invalidate_orders()
+            self._prepare()
+
+    # ------------------------------ loading ------------------------------
+    def load(self, rows: Iterable[dict]):
+        """Replace the snapshot with `rows` (dicts of SNAPSHOT_COLUMNS)"""
+        with self._lock:
+            self._reset()
+            self.watermark = None
+            self._apply_rows(rows)
+            self.built_at = self.refreshed_at = time.monotonic()
+
+    def merge(self, rows: Iterable[dict]):
+        """Upsert rows changed since the watermark; hidden companies are dropped"""
+        with self._lock:
+            self._apply_rows(rows)
+            self.refreshed_at = time.monotonic()
+
+    async def rebuild(self):
+        from api.db.database import AsyncReadSessionLocal
+
+        async with AsyncReadSessionLocal() as db:
+            result = await db.execute(
+                select(*SNAPSHOT_COLUMNS).filter(Company.status.in_(VISIBLE_STATUSES))
+            )
+            rows = [dict(row._mapping) for row in result]
+        self.load(rows)
+        logger.info(f"Company column snapshot built: {len(rows)} companies")
+
+    async def refresh(self):
+        """Incremental refresh from the updated_at watermark, then this worker's writes"""
+        from api.db.database import AsyncReadSessionLocal, AsyncSessionLocal
+
+        if self.watermark is None:
+            return await self.rebuild()
+        pending, self._pending = self._pending, set()
+        try:
+            async with AsyncReadSessionLocal() as db:
+                result = await db.execute(
+                    select(*SNAPSHOT_COLUMNS).filter(Company.updated_at >= self.watermark - WATERMARK_OVERLAP)
+                )
+                rows = [dict(row._mapping) for row in result]
+            if pending:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(select(*SNAPSHOT_COLUMNS).filter(Company.id.in_(pending)))
+                    rows += [dict(row._mapping) for row in result]
+        except Exception:
+            self._pending |= pending
+            raise
+        self.merge(rows)
+
+    def _schedule(self, job: Callable):
+        if self._busy:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._busy = True
+
+        async def _run():
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"Company column snapshot {job.__name__} failed: {str(e)}")
+            finally:
+                self._busy = False
+
+        spawn(_run())
+
+    def note_change(self, changed: List[dict], deleted_ids: List[Any]):
+        """This worker committed a company write: drop deletes now, re-read the rest before answering"""
+        if deleted_ids:
+            with self._lock:
+                for company_id in deleted_ids:
+                    self._updated_at[str(company_id)] = _DELETED
+                if any([self._remove(str(company_id)) for company_id in deleted_ids]):
+                    self._invalidate_orders()
+        self._pending.update(str(row["id"]) for row in changed if "id" in row)
+
+    def is_fresh(self) -> bool:
+        """True when the snapshot may answer; schedules refreshes and rebuilds as they fall due"""
+        if not settings.COMPANY_COLUMNS_ENABLED:
+            return False
+        now = time.monotonic()
+        if self.built_at is None:
+            self.fallbacks += 1
+            self._schedule(self.rebuild)
+            return False
+        if now - self.built_at >= settings.COMPANY_COLUMNS_MAX_AGE_SECONDS:
+            # Other workers' deletes may be missing; answer from SQL until rebuilt
+            self.fallbacks += 1
+            self._schedule(self.rebuild)
+            return False
+        if self._pending or now - self.refreshed_at >= settings.COMPANY_COLUMNS_REFRESH_SECONDS:
+            self._schedule(self.refresh)
+        if self._pending:
+            self.fallbacks += 1
+            return False
+        return True
+
+    # ------------------------------ sorting ------------------------------
+    def _prepare(self):
+        """Id ranks and every sort order; run once per change"""
+        ids = np.array(self.ids, dtype=str)
+        order = np.argsort(ids, kind="stable")
+        self._sorted_ids = ids[order]
+        self._id_rank = np.empty(self.count, dtype=np.int64)
+        self._id_rank[order] = np.arange(self.count)
+        for sort_by in SORTS:
+            self._order(sort_by)
+
+    def _key(self, sort_by: str) -> np.ndarray:
+        if sort_by == "founded":
+            return self.year[:self.count]
+        if sort_by == "employees":
+            return self.employees[:self.count]
+        return self.created[:self.count]
+
+    def _order(self, sort_by: str) -> np.ndarray:
+        """Live slots in descending (key, id) order"""
+        order = self._orders.get(sort_by)
+        if order is None:
+            if self._id_rank is None:
+                self._prepare()
+                return self._orders[sort_by]
+            slots = np.flatnonzero(self.live[:self.count])
+            order = slots[np.lexsort((self._id_rank[slots], self._key(sort_by)[slots]))][::-1]
+            self._orders[sort_by] = order
+        return order
+
+    def _after(self, sort_by: str, values: Sequence[Any]) -> np.ndarray:
+        """Slots strictly after a cursor's (key, id) in `sort_by` order"""
+        key_value, company_id = values
+        id_rank = self._id_rank
+        if sort_by == "relevance":
+            key_value = _microseconds(key_value)
+        else:
+            key_value = int(key_value)
+        key = self._key(sort_by)
+        # key < cursor key, or equal key and id < cursor id
+        return (key < key_value) | ((key == key_value) & (id_rank < np.searchsorted(self._sorted_ids, company_id, "left")))
+
+    def _cursor_values(self, sort_by: str, slot: int) -> tuple:
+        if sort_by == "relevance":
+            value = _datetime(self.created[slot])
+        else:
+            value = int(self._key(sort_by)[slot])
+        return value, self.ids[slot]
+
+    # ------------------------------ search ------------------------------
+    def search(
+        self,
+        *,
+        countries: Tuple[str, ...] = (),
+        sizes: Tuple[str, ...] = (),
+        niches: Tuple[str, ...] = (),
+        year_founded_min: Optional[int] = None,
+        year_founded_max: Optional[int] = None,
+        sort_by: str = "relevance",
+        page: int = 1,
+        per_page: int = 10,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[str], int, Optional[str]]:
+        """
+        Filter-only search with the semantics of search_criteria: countries
+        are lower-cased substrings, sizes and niches exact values; `sort_by`
+        is one of SORTS. Returns (ids of the page, total, next_cursor).
+        """
+        if sort_by not in SORTS:
+            sort_by = "relevance"
+        with self._lock:
+            count = self.count
+            mask = self.live[:count].copy()
+            if countries:
+                codes = self.countries.codes_where(lambda value: any(country in value.lower() for country in countries))
+                mask &= np.isin(self.country[:count], codes)
+            if sizes:
+                mask &= np.isin(self.size[:count], self.sizes.codes_where(lambda value: value in sizes))
+            if niches:
+                mask &= np.isin(self.niche[:count], self.niches.codes_where(lambda value: value in niches))
+            if year_founded_min:
+                mask &= self.year_known[:count] & (self.year[:count] >= year_founded_min)
+            if year_founded_max:
+                mask &= self.year_known[:count] & (self.year[:count] <= year_founded_max)
+
+            order = self._order(sort_by)
+            matched = order[mask[order]]
+            total = len(matched)
+            if cursor:
+                after = self._after(sort_by, decode_cursor(cursor, sort_by))
+                matched = matched[after[matched]]
+            else:
+                matched = matched[(page - 1) * per_page:]
+            slots = matched[:per_page + 1]
+            next_cursor = None
+            if len(slots) > per_page:
+                slots = slots[:per_page]
+                next_cursor = encode_cursor(self._cursor_values(sort_by, slots[-1]), sort_by)
+            ids = [self.ids[slot] for slot in slots]
+        self.hits += 1
+        return ids, total, next_cursor
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": settings.COMPANY_COLUMNS_ENABLED,
+                "companies": self.count - self.dead,
+                "slots": self.count,
+                "countries": len(self.countries.values),
+                "niches": len(self.niches.values),
+                "sizes": len(self.sizes.values),
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+                "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at is not None else None,
+                "refreshed_seconds_ago": round(time.monotonic() - self.refreshed_at, 1) if self.refreshed_at is not None else None,
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "pending_writes": len(self._pending),
+            }
+
+
+company_columns = CompanyColumns()
+on_commit(Company, company_columns.note_change)
@@ -0,0 +1,311 @@
+"""
+Bulk company import from an uploaded CSV or NDJSON file.
+
+The upload is read as a stream and handled in batches of IMPORT_BATCH_SIZE
+rows, each in its own transaction:
+
+1. every row is validated against CompanyCreate; failures are reported by
+   row number and the rest of the batch carries on,
+2. company emails already in the database are found with one query per batch
+   (`company_email IN (...)`); emails repeated within the file keep
+   their first row,
+3. the remaining rows, and their company_services / company_founders entry
+   rows, go in through api.db.bulk.BulkLoader (COPY, or multi-row INSERT).
+   If the batch fails (a registration racing the import on the unique index
+   uq_companies_company_email, a value the column rejects) it is retried one
+   row per savepoint, so only the offending rows are reported.
+
+Passwords are optional; the ones present are bcrypt-hashed on a small thread
+pool since hashing dominates the cost of an import that carries them.
+
+Files from /public/companies/search/export are read too: its column labels
+(name, website, type, employees) map to the CompanyCreate fields, its
+"; "-separated services / founders names become entries with just a name,
+and its id column is ignored. The export has no company_email (it is public
+data), so that column has to be added before such a file imports.
+"""
+import csv
+import io
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import IO, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from api.db.bulk import BulkLoader
+from api.db.changes import notify
+from api.v1.models.company import Company
+from api.v1.schemas.company import CompanyCreate
+from api.v1.services.company import ENTRY_SOURCES, company_record, entry_rows
+from api.v1.services.company_index import INDEXED_COLUMNS, VISIBLE_STATUSES
+from api.v1.services.user import user_service
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_BATCH_SIZE = 1000
+HASH_WORKERS = 4
+MAX_REPORTED_ERRORS = 1000
+
+# CSV cells holding JSON arrays
+JSON_FIELDS = ("services", "founders", "social_media")
+# JSON_FIELDS that may instead hold "; "-separated names, as the CSV export writes them
+NAME_LIST_FIELDS = ("services", "founders")
+# Labels of the search export (api.v1.services.company.EXPORT_COLUMNS) -> CompanyCreate fields
+EXPORT_ALIASES = {
+    "name": "company_name",
+    "website": "company_website",
+    "type": "company_type",
+    "employees": "company_size",
+}
+
+
+def import_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Guess the upload format from its file name or content type"""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in (content_type or ""):
+        return "csv"
+    return None
+
+
+def _csv_rows(text: IO[str]) -> Iterator[Tuple[int, object]]:
+    for number, row in enumerate(csv.DictReader(text), start=1):
+        values = {}
+        for key, value in row.items():
+            if key is None:
+                continue  # cells beyond the header
+            key = key.strip()
+            value = (value or "").strip()
+            if not value:
+                values[key] = None
+            elif key in NAME_LIST_FIELDS and not value.startswith("["):
+                values[key] = [{"name": name.strip()} for name in value.split(";") if name.strip()]
+            elif key in JSON_FIELDS:
+                try:
+                    values[key] = json.loads(value)
+                except ValueError:
+                    values[key] = value  # rejected by validation
+            else:
+                values[key] = value
+        yield number, values
+
+
+def _ndjson_rows(text: IO[str]) -> Iterator[Tuple[int, object]]:
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, e
+
+
+def _errors(error: ValidationError) -> List[dict]:
+    return [
+        {"field": ".".join(str(part) for part in item["loc"]), "message": item["msg"]}
+        for item in error.errors()
+    ]
+
+
+class ImportReport:
+    """Running totals of an import, and the rows that were not imported"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.aborted: Optional[str] = None
+        self.started = time.perf_counter()
+
+    def reject(self, row: int, errors: List[dict], duplicate: bool = False):
+        if duplicate:
+            self.duplicates += 1
+        else:
+            self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self) -> dict:
+        seconds = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.rows / seconds, 1) if seconds else float(self.rows),
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.duplicates + self.failed > len(self.errors),
+            "aborted": self.aborted,
+        }
+
+
+class CompanyImporter:
+    """Imports one uploaded file for one creator"""
+
+    def __init__(self, db: Session, *, creator_id: str, batch_size: int = IMPORT_BATCH_SIZE):
+        self.db = db
+        self.creator_id = creator_id
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        self.seen_emails = set()
+
+    def run(self, upload: IO[bytes], fmt: str) -> dict:
+        text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+        rows = _csv_rows(text) if fmt == "csv" else _ndjson_rows(text)
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as hasher:
+            while True:
+                try:
+                    batch = list(islice(rows, self.batch_size))
+                except (UnicodeDecodeError, csv.Error) as e:
+                    # Earlier batches are committed; report them and stop here
+                    self.report.aborted = f"Unreadable input after row {self.report.rows}: {str(e)}"
+                    break
+                if not batch:
+                    break
+                self.report.rows += len(batch)
+                self._import_batch(batch, hasher)
+        text.detach()
+        return self.report.as_dict()
+
+    def _validate(self, batch) -> List[Tuple[int, CompanyCreate]]:
+        valid = []
+        for number, data in batch:
+            if not isinstance(data, dict):
+                message = str(data) if isinstance(data, Exception) else "Expected a JSON object"
+                self.report.reject(number, [{"field": "", "message": message}])
+                continue
+            for label, field in EXPORT_ALIASES.items():
+                if label in data and field not in data:
+                    data[field] = data.pop(label)
+            # Status may be left out of a file; the company is then pending
+            data.setdefault("status", None)
+            try:
+                company = CompanyCreate.model_validate(data)
+            except ValidationError as e:
+                self.report.reject(number, _errors(e))
+                continue
+            if not company.company_email:
+                self.report.reject(number, [{"field": "company_email", "message": "Field required"}])
+                continue
+            valid.append((number, company))
+        return valid
+
+    def _drop_duplicates(self, valid: List[Tuple[int, CompanyCreate]]) -> List[Tuple[int, CompanyCreate]]:
+        emails = list({company.company_email for _, company in valid})
+        existing = set()
+        if emails:
+            existing = set(self.db.execute(
+                select(Company.company_email).filter(Company.company_email.in_(emails))
+            ).scalars())
+        unique = []
+        for number, company in valid:
+            email = company.company_email
+            if email in existing or email in self.seen_emails:
+                where = "database" if email in existing else "file"
+                self.report.reject(
+                    number,
+                    [{"field": "company_email", "message": f"Company with this email already exists ({where})"}],
+                    duplicate=True,
+                )
+                continue
+            self.seen_emails.add(email)
+            unique.append((number, company))
+        return unique
+
+    def _import_batch(self, batch, hasher: ThreadPoolExecutor):
+        valid = self._drop_duplicates(self._validate(batch))
+        if not valid:
+            self.db.rollback()  # end the read transaction of the duplicate check
+            return
+
+        now = datetime.now(timezone.utc)
+        records = []
+        for _, company in valid:
+            record = company_record(company, creator_id=self.creator_id, hash_password=False)
+            record.setdefault("status", Company.__table__.c.status.default.arg)
+            record["created_at"] = record["updated_at"] = now
+            records.append(record)
+        pending = [
+            (record, company.company_password)
+            for record, (_, company) in zip(records, valid) if company.company_password
+        ]
+        hashed = hasher.map(user_service.hash_password, [password for _, password in pending])
+        for (record, _), password_hash in zip(pending, hashed):
+            record["company_password"] = password_hash
+
+        try:
+            self._load(records)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Company import batch failed, retrying row by row: {str(e)}")
+            records = self._load_rows(valid, records)
+
+        self.report.imported += len(records)
+        if records:
+            self._notify(records)
+
+    def _load(self, records: List[dict]):
+        BulkLoader(self.db, Company, chunk_size=self.batch_size).load(records)
+        for field, (model, _) in ENTRY_SOURCES.items():
+            entries = [row for record in records for row in entry_rows(record["id"], field, record.get(field))]
+            if entries:
+                BulkLoader(self.db, model, chunk_size=self.batch_size * 4).load(entries)
+
+    def _load_rows(self, valid: List[Tuple[int, CompanyCreate]], records: List[dict]) -> List[dict]:
+        """Load a failed batch one row per savepoint; returns the records saved"""
+        saved = []
+        for (number, company), record in zip(valid, records):
+            try:
+                with self.db.begin_nested():
+                    self._load([record])
+            except Exception as e:
+                # The driver's message, without the statement and its parameters
+                reason = str(getattr(e, "orig", e)).strip().splitlines()[0]
+                if "uq_companies_company_email" in reason:
+                    self.report.reject(
+                        number,
+                        [{"field": "company_email", "message": "Company with this email already exists (database)"}],
+                        duplicate=True,
+                    )
+                else:
+                    self.report.reject(number, [{"field": "", "message": f"Could not be saved: {reason}"}])
+                    self.seen_emails.discard(company.company_email)
+                continue
+            saved.append(record)
+        self.db.commit()
+        return saved
+
+    def _notify(self, records: List[dict]):
+        """Let caches and in-memory indexes follow the import (COPY bypasses the ORM)"""
+        visible = [record["id"] for record in records if record["status"] in VISIBLE_STATUSES]
+        changed = [
+            {"id": record["id"], "status": record["status"]}
+            for record in records if record["status"] not in VISIBLE_STATUSES
+        ]
+        if visible:
+            # Full rows, including database-computed columns (employee_range)
+            changed += [
+                dict(row._mapping)
+                for row in self.db.execute(select(*INDEXED_COLUMNS).filter(Company.id.in_(visible)))
+            ]
+            self.db.rollback()
+        notify(Company, changed, [])
+
+
+def import_companies(db: Session, upload: IO[bytes], fmt: str, *, creator_id: str) -> dict:
+    """Import companies from a CSV / NDJSON stream; returns the import report"""
+    return CompanyImporter(db, creator_id=creator_id).run(upload, fmt)
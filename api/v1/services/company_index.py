@@ -0,0 +1,508 @@
+"""
+In-process search engine for the public company directory.
+
+Each worker can keep an inverted index over the visible (active/completed)
+companies. Documents are the database's own `search_document` tsvectors
+(name, niche, services, description, founders, country), read as text, so
+stemming, stopwords and weights are exactly PostgreSQL's: each lexeme maps
+to a posting list of document numbers stored as sorted `array('I')`, and
+each document keeps its lexemes' positions and best weight.
+
+Queries are parsed by PostgreSQL too: `websearch_to_tsquery(...)::text` for a
+search term is fetched once and memoized, then evaluated here - `&` and `|`
+as posting set operations, `!` against every live document and phrases
+(`<->`, `<N>`) by lexeme positions. A tsquery this evaluator can't answer
+exactly (empty, prefix or weight labels, `!`/`|` inside a phrase) is left to
+SQL.
+
+The index is built at startup (COMPANY_INDEX_ENABLED) and is considered
+stale COMPANY_INDEX_MAX_AGE_SECONDS after its last full build, since other
+workers' writes never reach it. A stale index is rebuilt in the background
+while searches fall back to SQL. This worker's committed company writes are
+followed through `api.db.changes`: deletes and hidden companies are dropped
+at once; other changes carry no search document, so those companies are
+re-read from the primary before the index answers again.
+
+Removed or replaced documents are tombstoned; postings are compacted once
+dead documents make up a quarter of the index.
+"""
+import asyncio
+import logging
+import re
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Text, cast, select
+
+from api.db.changes import on_commit
+from api.utils.background import spawn
+from api.utils.pagination import decode_cursor, encode_cursor
+from api.utils.settings import settings
+from api.v1.models.company import Company
+
+logger = logging.getLogger(__name__)
+
+VISIBLE_STATUSES = ("active", "completed")
+
+# ts_rank's default weights {D, C, B, A} = {0.1, 0.2, 0.4, 1.0}; D is unlabelled
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+# A quoted lexeme as tsvector/tsquery text prints it ('' and \\ escaped),
+# with its position list or query label
+_LEXEME = r"'((?:[^'\\]|''|\\.)*)'"
+_DOCUMENT_ENTRY = re.compile(_LEXEME + r"(?::([0-9A-D,]+))?")
+_QUERY_TOKEN = re.compile(r"\s*(?:" + _LEXEME + r"(:[*A-D]+)?|<(-|\d+)>|([&|!()]))")
+_POSITION = re.compile(r"(\d+)([A-D]?)")
+
+# Memoized parsed queries per search term
+QUERY_CACHE_SIZE = 1024
+
+# Compact once this share of document numbers are tombstones
+COMPACT_RATIO = 0.25
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"''|\\(.)", lambda match: match.group(1) or "'", value)
+
+
+def parse_document(text: Optional[str]) -> Dict[str, Tuple[float, Tuple[int, ...]]]:
+    """tsvector text -> {lexeme: (best weight, positions)}"""
+    lexemes = {}
+    for match in _DOCUMENT_ENTRY.finditer(text or ""):
+        weight, positions = WEIGHTS["D"], []
+        for position, label in _POSITION.findall(match.group(2) or ""):
+            positions.append(int(position))
+            weight = max(weight, WEIGHTS[label or "D"])
+        lexemes[_unescape(match.group(1))] = (weight, tuple(positions))
+    return lexemes
+
+
+class _UnsupportedQuery(Exception):
+    pass
+
+
+def parse_query(text: str) -> Optional[tuple]:
+    """
+    tsquery text -> expression tree, or None when the index can't evaluate it
+    exactly. Nodes: ("lexeme", text), ("not", node), ("and", left, right),
+    ("or", left, right), ("phrase", left, right, distance); operators bind
+    tightest to loosest as ! <-> & |, as in PostgreSQL.
+    """
+    tokens, position = [], 0
+    text = text.strip()
+    while position < len(text):
+        match = _QUERY_TOKEN.match(text, position)
+        if match is None or match.group(2):
+            # Unparseable, or a prefix / weight label
+            return None
+        lexeme, _, distance, operator = match.groups()
+        if lexeme is not None:
+            tokens.append(("lexeme", _unescape(lexeme)))
+        elif distance is not None:
+            tokens.append(("phrase", 1 if distance == "-" else int(distance)))
+        else:
+            tokens.append((operator, None))
+        position = match.end()
+    if not tokens:
+        return None
+
+    def peek():
+        return tokens[0][0] if tokens else None
+
+    def operand():
+        if not tokens:
+            raise _UnsupportedQuery()
+        kind, value = tokens.pop(0)
+        if kind == "lexeme":
+            return ("lexeme", value)
+        if kind == "!":
+            return ("not", operand())
+        if kind == "(":
+            node = either()
+            if peek() != ")":
+                raise _UnsupportedQuery()
+            tokens.pop(0)
+            return node
+        raise _UnsupportedQuery()
+
+    def phrase():
+        node = operand()
+        while peek() == "phrase":
+            distance = tokens.pop(0)[1]
+            right = operand()
+            if not (_is_chain(node) and _is_chain(right)):
+                # ! or | inside a phrase
+                raise _UnsupportedQuery()
+            node = ("phrase", node, right, distance)
+        return node
+
+    def both():
+        node = phrase()
+        while peek() == "&":
+            tokens.pop(0)
+            node = ("and", node, phrase())
+        return node
+
+    def either():
+        node = both()
+        while peek() == "|":
+            tokens.pop(0)
+            node = ("or", node, both())
+        return node
+
+    try:
+        tree = either()
+    except _UnsupportedQuery:
+        return None
+    return tree if not tokens else None
+
+
+def _is_chain(node: tuple) -> bool:
+    return node[0] == "lexeme" or node[0] == "phrase"
+
+
+def _lexemes(node: tuple) -> Iterable[str]:
+    """Lexemes of a query tree that aren't negated"""
+    if node[0] == "lexeme":
+        yield node[1]
+    elif node[0] != "not":
+        for child in node[1:3]:
+            yield from _lexemes(child)
+
+
+class IndexedCompany:
+    """One visible company: the search result fields plus its search document"""
+
+    __slots__ = (
+        "id", "name", "website", "lastFundingDate", "employees", "acquisitions",
+        "type", "country", "logo", "niche", "services", "founders",
+        "year_founded", "employee_range", "created_at", "lexemes",
+    )
+
+    def __init__(self, row: dict):
+        self.id = row["id"]
+        self.name = row.get("company_name")
+        self.website = row.get("company_website")
+        self.lastFundingDate = row.get("last_funding_date")
+        self.employees = row.get("company_size")
+        self.acquisitions = row.get("acquisitions")
+        self.type = row.get("company_type")
+        self.country = row.get("country")
+        self.logo = row.get("logo")
+        self.niche = row.get("niche")
+        self.services = row.get("services")
+        self.founders = row.get("founders")
+        self.year_founded = row.get("year_founded")
+        self.employee_range = row.get("employee_range")
+        self.created_at = row.get("created_at")
+        self.lexemes = parse_document(row.get("search_document"))
+
+    def spans(self, node: tuple) -> Set[Tuple[int, int]]:
+        """(first, last) positions where a lexeme or phrase occurs"""
+        if node[0] == "lexeme":
+            return {(position, position) for position in self.lexemes.get(node[1], (0, ()))[1]}
+        _, left, right, distance = node
+        ends = {}
+        for start, end in self.spans(left):
+            ends.setdefault(end, []).append(start)
+        return {
+            (start, last)
+            for first, last in self.spans(right)
+            for start in ends.get(first - distance, ())
+        }
+
+    def score(self, lexemes: Iterable[str]) -> float:
+        return sum(self.lexemes[lexeme][0] for lexeme in lexemes if lexeme in self.lexemes)
+
+
+# sort -> (key, descending, cursor sort). Keys match the SQL keysets in
+# api.v1.services.company, so cursors issued here stay valid if the next page
+# falls back to SQL. Orders SQL can't reproduce get their own cursor sort
+# names: names compare by code point here but by the database collation in
+# SQL, and relevance with a search term ranks by score.
+def _created_key(doc: IndexedCompany):
+    return (doc.created_at, doc.id)
+
+
+SORT_KEYS = {
+    "name": (lambda doc: (doc.name or "", doc.id), False, "name:memory"),
+    "founded": (lambda doc: (doc.year_founded or 0, doc.id), True, "founded"),
+    "employees": (lambda doc: (doc.employee_range or 0, doc.id), True, "employees"),
+    "relevance": (_created_key, True, "relevance"),
+}
+MEMORY_RANK_SORT = "relevance:memory"
+
+# Row fields needed to index a company
+INDEXED_COLUMNS = (
+    Company.id, Company.company_name, Company.company_website, Company.last_funding_date,
+    Company.company_size, Company.acquisitions, Company.company_type, Company.country,
+    Company.logo, Company.niche, Company.services, Company.founders,
+    Company.year_founded, Company.employee_range, Company.created_at, Company.status,
+    cast(Company.search_document, Text).label("search_document"),
+)
+
+
+class CompanyIndex:
+    """Inverted index over visible companies, owned by one worker"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs: List[Optional[IndexedCompany]] = []
+        self._doc_of: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        self._dead = 0
+        self._queries: Dict[str, Optional[tuple]] = {}
+        # Companies this worker wrote, to re-read before answering again
+        self._pending: Set[str] = set()
+        self.built_at: Optional[float] = None
+        self._busy = False
+        self.hits = 0
+        self.fallbacks = 0
+
+    # --------------------------- maintenance ---------------------------
+    def _reset(self):
+        self._docs = []
+        self._doc_of = {}
+        self._postings = {}
+        self._dead = 0
+
+    def _add(self, doc: IndexedCompany):
+        number = len(self._docs)
+        self._docs.append(doc)
+        self._doc_of[doc.id] = number
+        # Numbers only grow, so appending keeps every posting list sorted
+        for lexeme in doc.lexemes:
+            postings = self._postings.get(lexeme)
+            if postings is None:
+                postings = self._postings[lexeme] = array("I")
+            postings.append(number)
+
+    def _remove(self, company_id: str):
+        number = self._doc_of.pop(company_id, None)
+        if number is not None:
+            self._docs[number] = None
+            self._dead += 1
+
+    def _compact_if_needed(self):
+        if self._docs and self._dead / len(self._docs) >= COMPACT_RATIO:
+            live = [doc for doc in self._docs if doc is not None]
+            self._reset()
+            for doc in live:
+                self._add(doc)
+
+    def load(self, rows: Iterable[dict]):
+        """Replace the index contents with `rows` (dicts of INDEXED_COLUMNS)"""
+        with self._lock:
+            self._reset()
+            for row in rows:
+                if row.get("status") in VISIBLE_STATUSES:
+                    self._add(IndexedCompany(row))
+            self.built_at = time.monotonic()
+
+    def merge(self, company_ids: Iterable[str], rows: Iterable[dict]):
+        """Replace the documents of `company_ids` with `rows`; ids without a visible row are dropped"""
+        with self._lock:
+            for company_id in company_ids:
+                self._remove(company_id)
+            for row in rows:
+                if row.get("status") in VISIBLE_STATUSES:
+                    self._add(IndexedCompany(row))
+            self._compact_if_needed()
+
+    def apply(self, changed: List[dict], deleted_ids: List[Any]):
+        """Follow committed writes: drop deleted or hidden companies, queue the rest for a re-read"""
+        with self._lock:
+            for company_id in deleted_ids:
+                self._remove(str(company_id))
+                self._pending.discard(str(company_id))
+            for row in changed:
+                if "id" not in row:
+                    continue
+                company_id = str(row["id"])
+                if "status" not in row and company_id not in self._doc_of:
+                    # Not indexed, and the write didn't make it visible
+                    continue
+                if "status" in row and row["status"] not in VISIBLE_STATUSES:
+                    self._remove(company_id)
+                    self._pending.discard(company_id)
+                elif "search_document" in row and self.built_at is not None:
+                    # Complete row (company_import): index it as is
+                    self.merge([company_id], [row])
+                    self._pending.discard(company_id)
+                else:
+                    # Snapshots never carry the search document
+                    self._pending.add(company_id)
+            self._compact_if_needed()
+
+    async def rebuild(self):
+        """Load every visible company from the database"""
+        from api.db.database import AsyncReadSessionLocal
+
+        # Pending writes stay queued: the replica may not have them yet
+        async with AsyncReadSessionLocal() as db:
+            result = await db.execute(
+                select(*INDEXED_COLUMNS).filter(Company.status.in_(VISIBLE_STATUSES))
+            )
+            rows = [dict(row._mapping) for row in result]
+        self.load(rows)
+        logger.info(f"Company search index built: {len(rows)} companies")
+
+    async def reindex(self):
+        """Re-read the companies this worker wrote, from the primary (a replica may lag)"""
+        from api.db.database import AsyncSessionLocal
+
+        pending, self._pending = self._pending, set()
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(*INDEXED_COLUMNS).filter(Company.id.in_(pending)))
+                rows = [dict(row._mapping) for row in result]
+        except Exception:
+            self._pending |= pending
+            raise
+        self.merge(pending, rows)
+
+    def _schedule(self, job: Callable):
+        if self._busy:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._busy = True
+
+        async def _run():
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"Company search index {job.__name__} failed: {str(e)}")
+            finally:
+                self._busy = False
+
+        spawn(_run())
+
+    def is_fresh(self) -> bool:
+        """True when the index may answer; schedules a rebuild or re-read when it can't"""
+        if not settings.COMPANY_INDEX_ENABLED:
+            return False
+        if self.built_at is None or time.monotonic() - self.built_at >= settings.COMPANY_INDEX_MAX_AGE_SECONDS:
+            self.fallbacks += 1
+            self._schedule(self.rebuild)
+            return False
+        if self._pending:
+            self.fallbacks += 1
+            self._schedule(self.reindex)
+            return False
+        return True
+
+    # ------------------------------ search ------------------------------
+    async def text_query(self, db, search_term: str) -> Optional[tuple]:
+        """
+        PostgreSQL's parse of `search_term` (websearch_to_tsquery, as the SQL
+        search uses) as a query tree, or None when only SQL can answer it.
+        """
+        from api.v1.services.company import text_search_query
+
+        if search_term in self._queries:
+            return self._queries[search_term]
+        text = (await db.execute(select(cast(text_search_query(search_term), Text)))).scalar()
+        if len(self._queries) >= QUERY_CACHE_SIZE:
+            self._queries.clear()
+        query = self._queries[search_term] = parse_query(text or "")
+        return query
+
+    def _evaluate(self, node: tuple) -> Set[int]:
+        """Document numbers (possibly tombstoned) matching a query tree"""
+        kind = node[0]
+        if kind == "lexeme":
+            return set(self._postings.get(node[1], ()))
+        if kind == "not":
+            return set(self._doc_of.values()) - self._evaluate(node[1])
+        if kind == "and":
+            return self._evaluate(node[1]) & self._evaluate(node[2])
+        if kind == "or":
+            return self._evaluate(node[1]) | self._evaluate(node[2])
+        # Phrase: documents with every lexeme, then a check of their positions
+        numbers = set.intersection(*(self._evaluate(("lexeme", lexeme)) for lexeme in _lexemes(node)))
+        return {
+            number for number in numbers
+            if self._docs[number] is not None and self._docs[number].spans(node)
+        }
+
+    def search(
+        self,
+        *,
+        query: Optional[tuple] = None,
+        countries: Tuple[str, ...] = (),
+        sizes: Tuple[str, ...] = (),
+        niches: Tuple[str, ...] = (),
+        year_founded_min: Optional[int] = None,
+        year_founded_max: Optional[int] = None,
+        sort_by: str = "relevance",
+        page: int = 1,
+        per_page: int = 10,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[IndexedCompany], int, Optional[str]]:
+        """
+        Same filters and sorts as CompanyService.search_companies, for a query
+        tree from text_query (None: no search term); countries are lower-cased
+        substrings (like the SQL ILIKE), sizes and niches exact.
+        Returns (page, total, next_cursor).
+        """
+        with self._lock:
+            if query is not None:
+                docs = [self._docs[number] for number in sorted(self._evaluate(query))]
+            else:
+                docs = self._docs
+            docs = [doc for doc in docs if doc is not None]
+
+        if countries:
+            docs = [
+                doc for doc in docs
+                if doc.country and any(country in doc.country.lower() for country in countries)
+            ]
+        if sizes:
+            docs = [doc for doc in docs if doc.employees in sizes]
+        if niches:
+            docs = [doc for doc in docs if doc.niche in niches]
+        if year_founded_min:
+            docs = [doc for doc in docs if doc.year_founded is not None and doc.year_founded >= year_founded_min]
+        if year_founded_max:
+            docs = [doc for doc in docs if doc.year_founded is not None and doc.year_founded <= year_founded_max]
+
+        if sort_by not in SORT_KEYS:
+            sort_by = "relevance"
+        if query is not None and sort_by == "relevance":
+            ranked = set(_lexemes(query))
+            key, descending, cursor_sort = (lambda doc: (doc.score(ranked), doc.id)), True, MEMORY_RANK_SORT
+        else:
+            key, descending, cursor_sort = SORT_KEYS[sort_by]
+        docs.sort(key=key, reverse=descending)
+        total = len(docs)
+
+        if cursor:
+            after = tuple(decode_cursor(cursor, cursor_sort))
+            docs = [doc for doc in docs if (key(doc) < after if descending else key(doc) > after)]
+        else:
+            docs = docs[(page - 1) * per_page:]
+        next_cursor = encode_cursor(key(docs[per_page - 1]), cursor_sort) if len(docs) > per_page else None
+        self.hits += 1
+        return docs[:per_page], total, next_cursor
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": settings.COMPANY_INDEX_ENABLED,
+                "documents": len(self._doc_of),
+                "terms": len(self._postings),
+                "tombstones": self._dead,
+                "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at is not None else None,
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "pending_writes": len(self._pending),
+            }
+
+
+company_index = CompanyIndex()
+on_commit(Company, company_index.apply)
@@ -0,0 +1,278 @@
+"""
+Company name autocomplete served from memory.
+
+Each worker keeps a sorted array of (normalized key, company id) entries for
+the visible companies: one key for the whole name and one starting at each
+later word, so "bank" finds "First Bank". A prefix is a `bisect` range of that
+array, ranked by popularity - how often this worker served the company's
+detail page, then its acquisitions - so a keystroke never reaches Postgres.
+Only with COMPANY_SUGGEST_ENABLED; otherwise the route runs
+CompanyService.suggest_names and nothing is loaded into memory.
+
+Like the search index, the array follows this worker's committed writes
+through `api.db.changes` and is reloaded in the background every
+COMPANY_SUGGEST_MAX_AGE_SECONDS to pick up other workers' writes; stale
+entries keep being served meanwhile.
+
+Ranking a range costs time proportional to its size, so prefixes matching
+more than SCAN_LIMIT entries ("a", "ban" when every other company is a bank)
+keep a precomputed top list. Popularity only grows between reloads, so views
+and additions update those lists in place; only removing or demoting a listed
+company rescans its range.
+"""
+import asyncio
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from api.db.changes import on_commit
+from api.utils.background import spawn
+from api.utils.settings import settings
+from api.v1.models.company import Company
+from api.v1.services.company_index import VISIBLE_STATUSES
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# Keys indexed per name: the full name plus suffixes starting at later words
+MAX_WORD_KEYS = 4
+# Larger prefix ranges are answered from a precomputed top list
+SCAN_LIMIT = 500
+# Length of those lists: the largest `limit` the route accepts
+TOP_SIZE = 20
+# Longest prefix that gets a top list
+MAX_TOP_PREFIX = 16
+
+SUGGEST_COLUMNS = (Company.id, Company.company_name, Company.acquisitions, Company.status)
+
+
+def normalize(value: Optional[str]) -> str:
+    """Case-folded, accent-stripped words joined by single spaces"""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_WORD.sub(" ", stripped).strip()
+
+
+def _keys(name: Optional[str]) -> List[str]:
+    words = normalize(name).split(" ")
+    if not words[0]:
+        return []
+    return [" ".join(words[start:]) for start in range(min(len(words), MAX_WORD_KEYS))]
+
+
+def _prior(acquisitions: Any) -> float:
+    if isinstance(acquisitions, (int, float, Decimal)):
+        return float(acquisitions)
+    return 0.0
+
+
+class CompanySuggester:
+    """Sorted prefix array over visible company names, owned by one worker"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: List[Tuple[str, str]] = []
+        self._names: Dict[str, str] = {}
+        self._priors: Dict[str, float] = {}
+        self._views: Counter = Counter()
+        self._top: Dict[str, List[str]] = {}
+        self.built_at: Optional[float] = None
+        self._rebuilding = False
+        self._build_lock = asyncio.Lock()
+
+    # ----------------------------- ranking -----------------------------
+    def _rank(self, company_id: str) -> tuple:
+        """Sort key, best first: views, acquisitions, then name"""
+        return (
+            -self._views[company_id],
+            -self._priors.get(company_id, 0.0),
+            self._names[company_id].casefold(),
+            company_id,
+        )
+
+    def _range(self, prefix: str, lo: int = 0, hi: Optional[int] = None) -> Tuple[int, int]:
+        hi = len(self._entries) if hi is None else hi
+        start = bisect_left(self._entries, (prefix,), lo, hi)
+        return start, bisect_left(self._entries, (prefix + "\uffff",), start, hi)
+
+    def _best(self, start: int, end: int, limit: int = TOP_SIZE) -> List[str]:
+        companies = {company_id for _, company_id in self._entries[start:end]}
+        return heapq.nsmallest(limit, companies, key=self._rank)
+
+    def _build_top(self, lo: int, hi: int, length: int):
+        """Top lists for every prefix of `length` characters with a range over SCAN_LIMIT"""
+        position = lo
+        while position < hi:
+            key = self._entries[position][0]
+            if len(key) < length:
+                position += 1
+                continue
+            start, end = self._range(key[:length], position, hi)
+            if end - start > SCAN_LIMIT:
+                self._top[key[:length]] = self._best(start, end)
+                if length < MAX_TOP_PREFIX:
+                    self._build_top(start, end, length + 1)
+            position = end
+
+    def _listed_prefixes(self, name: str) -> List[str]:
+        return [
+            key[:length]
+            for key in _keys(name)
+            for length in range(1, min(len(key), MAX_TOP_PREFIX) + 1)
+            if key[:length] in self._top
+        ]
+
+    def _promote(self, company_id: str):
+        """Re-place a company whose rank improved in the top lists it qualifies for"""
+        for prefix in self._listed_prefixes(self._names[company_id]):
+            top = self._top[prefix]
+            if company_id in top:
+                top.remove(company_id)
+            top.append(company_id)
+            top.sort(key=self._rank)
+            del top[TOP_SIZE:]
+
+    # --------------------------- maintenance ---------------------------
+    def _add(self, company_id: str, name: str, acquisitions: Any):
+        self._names[company_id] = name
+        self._priors[company_id] = _prior(acquisitions)
+        for key in _keys(name):
+            insort(self._entries, (key, company_id))
+        self._promote(company_id)
+
+    def _remove(self, company_id: str):
+        name = self._names.get(company_id)
+        if name is None:
+            return
+        stale = [prefix for prefix in self._listed_prefixes(name) if company_id in self._top[prefix]]
+        for key in _keys(name):
+            position = bisect_left(self._entries, (key, company_id))
+            if position < len(self._entries) and self._entries[position] == (key, company_id):
+                del self._entries[position]
+        del self._names[company_id]
+        self._priors.pop(company_id, None)
+        for prefix in stale:
+            self._top[prefix] = self._best(*self._range(prefix))
+
+    def load(self, rows: Iterable[dict]):
+        """Replace the contents with `rows` (dicts with id, company_name, acquisitions, status)"""
+        entries, names, priors = [], {}, {}
+        for row in rows:
+            if row.get("status") in VISIBLE_STATUSES and row.get("company_name"):
+                names[row["id"]] = row["company_name"]
+                priors[row["id"]] = _prior(row.get("acquisitions"))
+                entries.extend((key, row["id"]) for key in _keys(row["company_name"]))
+        entries.sort()
+        with self._lock:
+            self._entries, self._names, self._priors = entries, names, priors
+            self._top = {}
+            self._build_top(0, len(entries), 1)
+            self.built_at = time.monotonic()
+
+    def apply(self, changed: List[dict], deleted_ids: List[Any]):
+        """Follow committed writes: re-key renamed companies, drop deleted or hidden ones"""
+        if self.built_at is None:
+            return
+        with self._lock:
+            for company_id in deleted_ids:
+                self._remove(company_id)
+            for row in changed:
+                company_id = row.get("id")
+                if company_id is None or ("status" not in row and company_id not in self._names):
+                    continue
+                if "status" in row and row["status"] not in VISIBLE_STATUSES:
+                    self._remove(company_id)
+                    continue
+                # An attribute missing from the snapshot wasn't changed
+                name = row.get("company_name", self._names.get(company_id))
+                if name is None:
+                    # Newly visible, but the name wasn't loaded: reload everything
+                    self.built_at = None
+                    break
+                acquisitions = row.get("acquisitions", self._priors.get(company_id))
+                if name == self._names.get(company_id) and _prior(acquisitions) == self._priors.get(company_id):
+                    continue
+                self._remove(company_id)
+                self._add(company_id, name, acquisitions)
+
+    async def rebuild(self):
+        """Load every visible company name from the database"""
+        from api.db.database import AsyncReadSessionLocal
+
+        async with AsyncReadSessionLocal() as db:
+            result = await db.execute(
+                select(*SUGGEST_COLUMNS).filter(Company.status.in_(VISIBLE_STATUSES))
+            )
+            rows = [dict(row._mapping) for row in result]
+        self.load(rows)
+        logger.info(f"Company suggestions built: {len(rows)} companies")
+
+    def _schedule_rebuild(self):
+        if self._rebuilding:
+            return
+        self._rebuilding = True
+
+        async def _run():
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error(f"Company suggestion rebuild failed: {str(e)}")
+            finally:
+                self._rebuilding = False
+
+        spawn(_run())
+
+    async def ready(self):
+        """Build on first use; afterwards refresh stale data in the background"""
+        if self.built_at is None:
+            async with self._build_lock:
+                if self.built_at is None:
+                    await self.rebuild()
+        elif time.monotonic() - self.built_at >= settings.COMPANY_SUGGEST_MAX_AGE_SECONDS:
+            self._schedule_rebuild()
+
+    def record_view(self, company_id: str):
+        """Count a detail page view towards the company's popularity"""
+        with self._lock:
+            self._views[company_id] += 1
+            if company_id in self._names:
+                self._promote(company_id)
+
+    # ------------------------------ lookup ------------------------------
+    def suggest(self, query: str, limit: int = 8) -> List[Dict[str, str]]:
+        """Most popular visible companies with a name word starting with `query`"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is not None and limit <= TOP_SIZE:
+                best = top[:limit]
+            else:
+                best = self._best(*self._range(prefix), limit=limit)
+            return [{"id": company_id, "name": self._names[company_id]} for company_id in best]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "companies": len(self._names),
+                "entries": len(self._entries),
+                "top_lists": len(self._top),
+                "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at is not None else None,
+            }
+
+
+company_suggester = CompanySuggester()
+on_commit(Company, company_suggester.apply)
@@ -2,7 +2,7 @@
 from sqlalchemy.orm import Session
 from api.v1.models.notification import Notification
 from api.v1.services.user import user_service
-from api.db.database import get_db
+from api.db.database import get_db, AsyncSessionLocal
 from fastapi import Depends
 
 
@@ -38,7 +38,8 @@ async def websocket_endpoint(
 ):
     # Validate JWT token here (use your existing auth logic)
     # Example pseudo-code:
-    current_user = await user_service.get_current_user(token)
+    async with AsyncSessionLocal() as db:
+        current_user = await user_service.get_current_user_async(token, db)
     if current_user.id != user_id:
         await websocket.close(code=1008)
         raise HTTPException(
@@ -59,12 +60,14 @@ from fastapi import BackgroundTasks
 
 # api/v1/services/notification.py
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from fastapi import BackgroundTasks, Depends
 import asyncio
 import json
 
 from api.v1.models.notification import Notification
-from api.db.database import get_db
+from api.db.database import get_db, get_async_db, get_uow
 
 class NotificationService:
     def __init__(self, db: Session, bg_tasks: BackgroundTasks = None):
@@ -91,8 +94,7 @@ class NotificationService:
             priority=priority
         )
         self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
+        self.db.flush()
         return notification
 
     def get_user_notifications(self, user_id: str, limit: int = 15):
@@ -113,12 +115,13 @@ class NotificationService:
         notification = self.db.query(Notification).filter(Notification.id == notification_id).first()
         if notification:
             notification.is_read = True
-            self.db.commit()
-            self.db.refresh(notification)
+            self.db.flush()
         return notification
 
     async def send_immediate_notification(self, notification_data: dict):
         """Send notification immediately"""
+        # Also runs from background tasks, after the request's unit of work
+        # has committed, so this commits its own work
         self.create_notification(
             title=notification_data.get('title'),
             message=notification_data.get('message'),
@@ -128,6 +131,7 @@ class NotificationService:
             action_url=notification_data.get('action_url'),
             priority=notification_data.get('priority', 0)
         )
+        self.db.commit()
 
     def schedule_notification(self, notification_data: dict, delay_seconds: int = 0):
         """Schedule notification with delay (using background tasks)"""
@@ -143,5 +147,93 @@ class NotificationService:
         await self.send_immediate_notification(notification_data)
 
 # Factory function to get notification service
-def get_notification_service(db: Session = Depends(get_db), bg_tasks: BackgroundTasks = None):
-    return NotificationService(db, bg_tasks)
\ No newline at end of file
+def get_notification_service(db: Session = Depends(get_uow), bg_tasks: BackgroundTasks = None):
+    return NotificationService(db, bg_tasks)
+
+
+class AsyncNotificationService:
+    """Same operations as NotificationService, on an AsyncSession"""
+
+    def __init__(self, db: AsyncSession, bg_tasks: BackgroundTasks = None):
+        self.db = db
+        self.bg_tasks = bg_tasks
+
+    async def create_notification(
+        self, 
+        title: str, 
+        message: str, 
+        user_id: str = None, 
+        company_id: str = None, 
+        category: str = "system", 
+        action_url: str = None, 
+        priority: int = 0
+    ) -> Notification:
+        notification = Notification(
+            title=title,
+            message=message,
+            user_id=user_id,
+            company_id=company_id,
+            category=category,
+            action_url=action_url,
+            priority=priority
+        )
+        self.db.add(notification)
+        await self.db.flush()
+        return notification
+
+    async def get_user_notifications(self, user_id: str, limit: int = 15):
+        return (await self.db.execute(
+            select(Notification)
+            .filter(Notification.user_id == user_id)
+            .order_by(Notification.created_at.desc())
+            .limit(limit)
+        )).scalars().all()
+
+    async def get_company_notifications(self, company_id: str, limit: int = 15):
+        return (await self.db.execute(
+            select(Notification)
+            .filter(Notification.company_id == company_id)
+            .order_by(Notification.created_at.desc())
+            .limit(limit)
+        )).scalars().all()
+
+    async def mark_notification_as_read(self, notification_id: str):
+        notification = await self.db.get(Notification, notification_id)
+        if notification:
+            notification.is_read = True
+            await self.db.flush()
+        return notification
+
+    async def send_immediate_notification(self, notification_data: dict):
+        """Send notification immediately"""
+        # Also runs from background tasks, after the request's unit of work
+        # has committed, so this commits its own work
+        await self.create_notification(
+            title=notification_data.get('title'),
+            message=notification_data.get('message'),
+            user_id=notification_data.get('user_id'),
+            company_id=notification_data.get('company_id'),
+            category=notification_data.get('category', 'system'),
+            action_url=notification_data.get('action_url'),
+            priority=notification_data.get('priority', 0)
+        )
+        await self.db.commit()
+
+    def schedule_notification(self, notification_data: dict, delay_seconds: int = 0):
+        """Schedule notification with delay (using background tasks)"""
+        if self.bg_tasks:
+            self.bg_tasks.add_task(
+                self._delayed_notification,
+                notification_data,
+                delay_seconds
+            )
+
+    async def _delayed_notification(self, notification_data: dict, delay: int):
+        await asyncio.sleep(delay)
+        # The request session is closed by the time a background task runs
+        async with AsyncSessionLocal() as db:
+            await AsyncNotificationService(db).send_immediate_notification(notification_data)
+
+# Factory function to get async notification service
+def get_async_notification_service(db: AsyncSession = Depends(get_async_db), bg_tasks: BackgroundTasks = None):
+    return AsyncNotificationService(db, bg_tasks)
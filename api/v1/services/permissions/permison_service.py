@@ -16,8 +16,7 @@ class PermissionService:
         try:
             db_permission = Permission(title=permission.title)
             db.add(db_permission)
-            db.commit()
-            db.refresh(db_permission)
+            db.flush()
             response = success_response(200, "permissions created successfully", db_permission)
             return response
         except IntegrityError as e:
@@ -50,7 +49,6 @@ class PermissionService:
             # Assign the permission to the role
             stmt = role_permissions.insert().values(role_id=role_id, permission_id=permission_id)
             db.execute(stmt)
-            db.commit()
             
             response = success_response(200, "Permission assigned successfully")
             return response
@@ -69,7 +67,7 @@ class PermissionService:
             try:
                 db.execute(delete(role_permissions).where(role_permissions.c.permission_id == permission_id))
                 db.delete(permission)
-                db.commit()
+                db.flush()
                 return {}
             except IntegrityError as e :
                db.rollback()
@@ -96,7 +94,6 @@ class PermissionService:
 
             # Assign the new permission to the role
             db.execute(role_permissions.insert().values(role_id=role_id, permission_id=new_permission_id))
-            db.commit()
             return {"success": True, "message": "Permission updated successfully"}
 
         except IntegrityError as e:
@@ -25,8 +25,7 @@ class RoleService:
                 description=role.description or ""
                 )
             db.add(db_role)
-            db.commit()
-            db.refresh(db_role)
+            db.flush()
             response = success_response(201, f'Role {role.name} created successfully', db_role)
             return response
         except IntegrityError as e:
@@ -63,7 +62,6 @@ class RoleService:
             ).values(role_id=role_id)
             
             db.execute(stmt)
-            db.commit()
 
             return success_response(200, "Role assigned to user successfully")
         except Exception as e:
@@ -78,7 +76,7 @@ class RoleService:
             raise HTTPException(status_code=404, detail="Role not found")
 
         db.delete(role)
-        db.commit()
+        db.flush()
         return RoleDeleteResponse(id=role_id, message="Role successfully deleted")
     
     
@@ -130,7 +128,6 @@ class RoleService:
                 user_organisation_roles.c.organisation_id == org_id,
                 user_organisation_roles.c.role_id == role.id,
             ))
-            db.commit()
             
     
     @staticmethod
@@ -143,8 +140,7 @@ class RoleService:
             raise HTTPException(status_code=400, detail="Cannot change role type (builtin/custom)")
 
         role.name = role_update.name
-        db.commit()
-        db.refresh(role)
+        db.flush()
         
         response = success_response(200, f'Role {role.name} updated successfully', role)
         return response
@@ -160,8 +156,7 @@ class RoleService:
             raise HTTPException(status_code=400, detail="Role is not a built-in role")
 
         role.name = role_update.name
-        db.commit()
-        db.refresh(role)
+        db.flush()
         
         response = success_response(200, f'Built-in role {role.name} updated successfully', role)
         return response
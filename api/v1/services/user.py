@@ -7,13 +7,16 @@ from fastapi.security import OAuth2PasswordBearer
 # from jose import JWTError, jwt
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
 from passlib.context import CryptContext
 
 from api.core.base.services import Service
-from api.db.database import get_db
+from api.db.database import get_db, get_async_db
 
 from api.utils.db_validators import check_model_existence
+from api.utils.pagination import decode_cursor, keyset_after, keyset_order, keyset_page
+from api.utils.counts import count_total_sync
 from api.v1.models import User
 from api.v1.schemas import user
 from api.v1.schemas.user import UserStatus
@@ -33,6 +36,8 @@ class UserService(Service):
         db: Session,
         page: int,
         per_page: int,
+        cursor: Optional[str] = None,
+        count_mode: str = "exact",
         **query_params: Optional[Any],
     ):
         """
@@ -41,6 +46,8 @@ class UserService(Service):
             db: database Session object
             page: page number
             per_page: max number of users in a page
+            cursor: next_cursor from a previous page; when given, page is ignored
+            count_mode: how the total is computed, see api.utils.counts
             query_params: params to filter by
         """
         per_page = min(per_page, 10)
@@ -60,22 +67,32 @@ class UserService(Service):
                 if hasattr(User, param):
                     filters.append(getattr(User, param) == value)
         query = db.query(User)
-        total_users = query.count()
         if filters:
             query = query.filter(*filters)
-            total_users = query.count()
+        total_users, total_mode = count_total_sync(
+            db,
+            query.statement,
+            count_mode,
+            cache_key=("users",) + tuple(sorted((k, v) for k, v in query_params.items() if v is not None)),
+        )
 
-        all_users: list = (
-            query.order_by(desc(User.created_at))
-            .limit(per_page)
-            .offset((page - 1) * per_page)
-            .all()
+        keys = (User.created_at, User.id)
+        query = query.order_by(*keyset_order(keys, descending=True))
+        if cursor:
+            query = query.filter(keyset_after(keys, decode_cursor(cursor), descending=True))
+        else:
+            query = query.offset((page - 1) * per_page)
+        all_users, next_cursor = keyset_page(
+            query.limit(per_page + 1).all(),
+            per_page,
+            lambda usr: (usr.created_at, usr.id),
         )
 
-        return self.all_users_response(all_users, total_users, page, per_page)
+        return self.all_users_response(all_users, total_users, page, per_page, next_cursor, total_mode)
 
     def all_users_response(
-        self, users: list, total_users: int, page: int, per_page: int
+        self, users: list, total_users: int, page: int, per_page: int,
+        next_cursor: Optional[str] = None, total_mode: str = "exact"
     ):
         """
         Generates a response for all users
@@ -104,6 +121,8 @@ class UserService(Service):
             page=page,
             per_page=per_page,
             total=total_users,
+            total_mode=total_mode,
+            next_cursor=next_cursor,
             data=all_users,
         )
 
@@ -165,8 +184,7 @@ class UserService(Service):
         # Create user object with hashed password and other attributes from schema
         user = User(**schema.model_dump())
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        db.flush()
 
         return user
 
@@ -189,8 +207,7 @@ class UserService(Service):
             if key == "email":
                 continue
             setattr(user, key, value)
-        db.commit()
-        db.refresh(user)
+        db.flush()
         return user
 
     def delete(
@@ -212,7 +229,7 @@ class UserService(Service):
             )
 
         user.is_deleted = True
-        db.commit()
+        db.flush()
 
         # return super().delete()
 
@@ -302,6 +319,29 @@ class UserService(Service):
             raise credentials_exception
 
         return user
+
+    async def get_current_user_async(
+        self,
+        access_token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_db),
+    ) -> User:
+        """Async counterpart of `get_current_user` for routes on `get_async_db`"""
+        credentials_exception = HTTPException(
+            status_code=401,
+            detail="Could not validate credentials!",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+        token = self.verify_access_token(access_token, credentials_exception)
+
+        user = (await db.execute(
+            select(User).filter(User.id == str(token.user_id))
+        )).scalars().first()
+
+        if not user:
+            raise credentials_exception
+
+        return user
     
     def create_access_token(self, user_id: str) -> str:
         expires = dt.datetime.now(dt.timezone.utc) + dt.timedelta(
@@ -339,12 +379,10 @@ class UserService(Service):
 
         user.is_superadmin = True
         db.add(user)
-        db.commit()
+        db.flush()
 
         # create data privacy setting
 
-        db.refresh(user)
-
         return user
 
     def change_password(
@@ -363,7 +401,7 @@ class UserService(Service):
         if current_password is None:
             if user.password is None:
                 user.password = self.hash_password(new_password)
-                db.commit()
+                db.flush()
                 return
             else:
                 raise HTTPException(
@@ -376,7 +414,7 @@ class UserService(Service):
             )
         else:
             user.password = self.hash_password(new_password)
-            db.commit()
+            db.flush()
 
     def get_current_super_admin(
         self,
@@ -407,8 +445,7 @@ class UserService(Service):
             )
 
         user.status = status
-        db.commit()
-        db.refresh(user)
+        db.flush()
         return user
 
 
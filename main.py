@@ -1,6 +1,7 @@
 import uvicorn
 from fastapi.staticfiles import StaticFiles
 import uvicorn, os
+import logging
 from fastapi import  Query, Request, WebSocket
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, status
@@ -12,14 +13,42 @@ from starlette.middleware.sessions import SessionMiddleware  # required by googl
 from api.utils.json_response import JsonResponseDict
 from api.v1.routes import api_version_one
 from api.utils.settings import settings
+from api.db.pool_metrics import pool_report
+from api.db.database import read_your_writes_middleware
+from api.db.query_metrics import query_report, sql_metrics_middleware
 from api.v1.routes.flutterwave_webhook import router as webhook_router
 from api.v1.routes.company import public_router as company_public
+from api.v1.services.user import user_service
 
 from api.v1.services.notification import websocket_endpoint
+from api.v1.services.company_index import company_index
+from api.v1.services.company_suggest import company_suggester
+from api.v1.services.company_columns import company_columns
+from api.v1.services.company import facet_cache, search_cache
+from api.v1.services.company_cache import company_cache
+from api.utils.counts import count_cache
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan function"""
+    if settings.COMPANY_INDEX_ENABLED:
+        try:
+            await company_index.rebuild()
+        except Exception as e:
+            # Searches use SQL until a later rebuild succeeds
+            logging.getLogger(__name__).error(f"Company search index not built: {str(e)}")
+    if settings.COMPANY_COLUMNS_ENABLED:
+        try:
+            await company_columns.rebuild()
+        except Exception as e:
+            # Browsing uses SQL until a later rebuild succeeds
+            logging.getLogger(__name__).error(f"Company column snapshot not built: {str(e)}")
+    if settings.COMPANY_SUGGEST_ENABLED:
+        try:
+            await company_suggester.rebuild()
+        except Exception as e:
+            # The first /suggest request retries the build
+            logging.getLogger(__name__).error(f"Company suggestions not built: {str(e)}")
 
     yield
 
@@ -40,6 +69,8 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Get absolute path
 TEMPLATE_DIR = os.path.join(BASE_DIR, "api/core/dependencies/email/templates")
 
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
+app.middleware("http")(read_your_writes_middleware)
+app.middleware("http")(sql_metrics_middleware)
 
 app.include_router(api_version_one)
 app.include_router(webhook_router)
@@ -60,14 +91,76 @@ async def get_root(request: Request) -> dict:
     )
 
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 router = APIRouter()
 
 @router.get("/health")
 def health_check():
     return {"status": "healthy"}
 
+
+# Operational telemetry: super admins only, and kept out of the OpenAPI schema
+internal_router = APIRouter(
+    prefix="/internal",
+    dependencies=[Depends(user_service.get_current_super_admin)],
+    include_in_schema=False,
+)
+
+
+@internal_router.get("/pool")
+def pool_stats():
+    """Connection pool saturation: live gauges, checkout wait/hold times, timeouts"""
+    return {
+        "config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        },
+        "engines": pool_report(),
+    }
+
+
+@internal_router.get("/search-index")
+def search_index_stats():
+    """In-process company search index: size, age, hits and SQL fallbacks"""
+    return company_index.stats()
+
+
+@internal_router.get("/browse-index")
+def browse_index_stats():
+    """Columnar company snapshot for filter-only search: size, watermark, hits"""
+    return company_columns.stats()
+
+
+@internal_router.get("/suggest")
+def suggest_stats():
+    """In-process company name autocomplete: size, age and memo hit rate"""
+    return company_suggester.stats()
+
+
+@internal_router.get("/caches")
+def cache_stats():
+    """Hit/miss counters of the per-worker result caches"""
+    return {
+        "search": search_cache.stats(),
+        "facets": facet_cache.stats(),
+        "counts": count_cache.stats(),
+        "company_detail": company_cache.stats(),
+    }
+
+
+@internal_router.get("/queries")
+def query_stats():
+    """Per-route SQL statement counts, DB time, N+1 suspects and slowest statements"""
+    return {
+        "n_plus_one_threshold": settings.SQL_N_PLUS_ONE_THRESHOLD,
+        "routes": query_report(),
+    }
+
 app.include_router(router)
+app.include_router(internal_router)
 
 
 STATIC_DIR = "static/profile_images"